@@ -0,0 +1,49 @@
+## @file bench_common.py
+# @brief Shared parts of benchmark scripts
+# @author Marián Tarageľ
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INTERPRET = os.path.join(os.path.dirname(BENCH_DIR), 'interpret')
+
+def create_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--interpret', metavar='DIR', default=DEFAULT_INTERPRET,
+    help="adresár interpret.py, ktorý sa meria, napr. z 'git worktree add' staršej revízie, predvolene adresár interpret tohto stromu")
+    parser.add_argument('--repeat', metavar='N', type=int, default=3,
+    help="počet opakovaní každého merania, vypíše sa najkratší čas")
+    return parser
+
+def program(name: str) -> str:
+    return os.path.join(BENCH_DIR, name)
+
+# Best wall time of interpret.py run as separate process, works with
+# every revision of the interpret, returns time and stdout of the run
+def time_command(interpret: str, arguments: list, input: bytes, repeat: int) -> tuple:
+    command = [sys.executable, os.path.join(interpret, 'interpret.py')] + arguments
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run(command, input=input, stdout=subprocess.PIPE, cwd=interpret)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best == None or elapsed < best else best
+    return best, process.stdout.decode('utf-8'), process.returncode
+
+# Best time of function called in this process
+def time_function(function, repeat: int) -> tuple:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best == None or elapsed < best else best
+    return best, result
+
+# Modules of measured interpret are imported from its directory
+def import_interpret(interpret: str) -> None:
+    sys.path.insert(0, os.path.abspath(interpret))
@@ -0,0 +1,95 @@
+## @file bench_frames.py
+# @brief Benchmark of local frames and their reuse
+# @author Marián Tarageľ
+
+import timeit
+import bench_common
+
+# Programs measured through command line, program, input and arguments,
+# calls.xml computes fib(22) and ackermann(2, 300)
+PROGRAMS = (
+    ('calls.xml', b'', ['--max-depth', '100000', '--opt-level', '1']),
+    ('frame_loop.xml', b'', []),
+)
+
+POOL_SIZES = (0, 4, 16, 64, 256, 1024)
+SLOT_COUNTS = (4, 16, 64, 128, 256, 512, 1024)
+
+def bench_programs(args) -> None:
+    for name, input, arguments in PROGRAMS:
+        arguments = ['--source', bench_common.program(name)] + arguments
+        elapsed, _, code = bench_common.time_command(args.interpret, arguments, input, args.repeat)
+        print('%-16s %8.3f s  exit %d' % (name, elapsed, code))
+
+    # CREATEFRAME, PUSHFRAME twice and POPFRAME twice without instructions
+    bench_common.import_interpret(args.interpret)
+    from frames import Frames
+    frames = Frames(['x'], ['a', 'b', 'c', 'd', 'e'], 100000)
+    def cycle():
+        frames.create_frame()
+        frames.push_frame()
+        frames.create_frame()
+        frames.push_frame()
+        frames.pop_frame()
+        frames.pop_frame()
+    elapsed = min(timeit.repeat(cycle, number=100000, repeat=args.repeat))
+    print('%-16s %8.3f s' % ('frame cycle', elapsed))
+
+# Hit rate and time of calls.xml with free list of every size
+def bench_pool(args) -> None:
+    bench_common.import_interpret(args.interpret)
+    import api
+    import frames
+
+    interpreter = api.Interpreter(None, 1)
+    source = bench_common.program('calls.xml')
+    # First runs of the process are slower, they would be counted to the
+    # first size
+    for _ in range(args.repeat):
+        interpreter.run(source, max_depth=100000)
+    original = frames.POOL_SIZE
+    print('%-8s %10s %10s' % ('size', 'hit rate', 'time'))
+    try:
+        for size in POOL_SIZES:
+            frames.POOL_SIZE = size
+            elapsed, result = bench_common.time_function(
+                lambda: interpreter.run(source, max_depth=100000), args.repeat)
+            print('%-8d %10.4f %8.3f s' % (size, result.frame_stats['hit_rate'], elapsed))
+    finally:
+        frames.POOL_SIZE = original
+
+# Clearing frame for reuse against allocating new one for every number
+# of slots, pooling stops paying off where the first column gets larger
+def bench_slots(args) -> None:
+    bench_common.import_interpret(args.interpret)
+    from frames import Frame
+
+    print('%-8s %10s %10s' % ('slots', 'clear', 'allocate'))
+    for slots in SLOT_COUNTS:
+        frame = Frame(slots)
+        blank = [None] * slots
+        def clear():
+            frame.values[:] = blank
+            frame.types[:] = blank
+        def allocate():
+            Frame(slots)
+        times = [min(timeit.repeat(function, number=100000, repeat=args.repeat))
+                 for function in (clear, allocate)]
+        print('%-8d %8.3f s %8.3f s' % (slots, times[0], times[1]))
+
+def main() -> None:
+    parser = bench_common.create_parser('Meranie lokálnych rámcov a ich opätovného použitia.')
+    parser.add_argument('--pool', action='store_true',
+    help="namiesto programov zmeria úspešnosť a čas calls.xml pri rôznych veľkostiach zoznamu voľných rámcov")
+    parser.add_argument('--slots', action='store_true',
+    help="namiesto programov porovná vyčistenie rámca s vytvorením nového pri rôznom počte premenných")
+    args = parser.parse_args()
+    if args.pool:
+        bench_pool(args)
+    elif args.slots:
+        bench_slots(args)
+    else:
+        bench_programs(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+## @file bench_strings.py
+# @brief Benchmark of string instructions and threshold of string buffers
+# @author Marián Tarageľ
+
+import sys
+import bench_common
+
+# Total number of characters appended in threshold sweep, strings of every
+# length are built total // length times
+TOTAL = 1 << 18
+LENGTHS = (16, 64, 256, 1024, 4096, 16384, 65536)
+
+# Programs measured through command line, program, input and arguments
+PROGRAMS = (
+    ('concat_literals.xml', b'', []),
+    ('build_string.xml', b'', []),
+)
+
+def bench_programs(args) -> None:
+    for name, input, arguments in PROGRAMS:
+        arguments = ['--source', bench_common.program(name)] + arguments
+        elapsed, _, code = bench_common.time_command(args.interpret, arguments, input, args.repeat)
+        print('%-22s %8.3f s  exit %d' % (name, elapsed, code))
+
+# Strings of every length built with buffers disabled and with buffers
+# used from the first CONCAT, buffers pay off from length where the second
+# column gets smaller than the first
+def bench_thresholds(args) -> None:
+    bench_common.import_interpret(args.interpret)
+    import api
+    import program
+
+    with open(bench_common.program('string_sizes.xml'), 'rb') as file:
+        source = file.read()
+    interpreter = api.Interpreter()
+    # First runs of the process are slower, they would be counted to the
+    # shortest length
+    for _ in range(args.repeat):
+        interpreter.run(source, '%d\n%d\n' % (LENGTHS[0], TOTAL // LENGTHS[0]))
+    original = program.MIN_LENGTH
+    print('%-8s %10s %10s' % ('length', 'plain', 'buffer'))
+    try:
+        for length in LENGTHS:
+            input = '%d\n%d\n' % (length, TOTAL // length)
+            times = []
+            for min_length in (sys.maxsize, 0):
+                program.MIN_LENGTH = min_length
+                elapsed, _ = bench_common.time_function(
+                    lambda: interpreter.run(source, input), args.repeat)
+                times.append(elapsed)
+            print('%-8d %8.3f s %8.3f s' % (length, times[0], times[1]))
+    finally:
+        program.MIN_LENGTH = original
+
+def main() -> None:
+    parser = bench_common.create_parser('Meranie inštrukcií pre prácu s reťazcami.')
+    parser.add_argument('--thresholds', action='store_true',
+    help="namiesto programov zmeria reťazce rôznych dĺžok bez bufferov a s buffermi, iba s api.py aktuálneho stromu")
+    args = parser.parse_args()
+    if args.thresholds:
+        bench_thresholds(args)
+    else:
+        bench_programs(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+## @file api.py
+# @brief Embeddable interface of the interpret
+# @author Marián Tarageľ
+
+from collections import OrderedDict
+import hashlib
+import io
+from error import Error, InterpretExit
+from program import Program
+from output import Output, DEFAULT_BUFFER_SIZE
+from input_provider import MemoryInput
+from stack import DEFAULT_MAX_DEPTH
+from profiler import Profiler
+from checkpoint import Checkpoint
+import checkpoint as snapshot
+import optimizer
+import transpiler
+
+DEFAULT_MAX_LOADED = 32
+
+# Outcome of one program run, captured output is set only
+# when no stream for it was given
+class Result:
+
+    exit_code: int
+    stdout: str
+    stderr: str
+    instructions_executed: int
+    frame_stats: dict
+
+    def __init__(self, exit_code: int, stdout: str, stderr: str, instructions_executed: int,
+                 frame_stats: dict = None):
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+        self.instructions_executed = instructions_executed
+        self.frame_stats = frame_stats
+
+    def __repr__(self) -> str:
+        return ('Result(exit_code=' + str(self.exit_code) + ', instructions_executed='
+                + str(self.instructions_executed) + ')')
+
+# Runs programs in the current process, loaded programs are kept in memory
+# by hash of their source so that repeated runs skip loading entirely
+class Interpreter:
+
+    cache: object
+    opt_level: int
+    engine: str
+    source_format: str
+    loaded: OrderedDict
+    max_loaded: int
+
+    def __init__(self, cache: object = None, opt_level: int = 0, engine: str = 'loop',
+                 source_format: str = 'xml', max_loaded: int = DEFAULT_MAX_LOADED):
+        self.cache = cache
+        self.opt_level = opt_level
+        self.engine = engine
+        self.source_format = source_format
+        self.loaded = OrderedDict()
+        self.max_loaded = max_loaded
+
+    # Load and compile program, source is path to XML file, XML as bytes,
+    # binary stream (never kept loaded) or already loaded program
+    def load(self, source) -> Program:
+        if isinstance(source, Program):
+            return source
+        key = None
+        if isinstance(source, str):
+            key = self.cache.source_key(source) if self.cache != None else self.file_key(source)
+        elif isinstance(source, bytes):
+            key = hashlib.sha256(source).hexdigest()
+            source = io.BytesIO(source)
+        # Cached programs of the same file in other format must not be used
+        if key != None and self.source_format != 'xml':
+            key += '-' + self.source_format
+
+        if key in self.loaded:
+            self.loaded.move_to_end(key)
+            return self.loaded[key]
+
+        program = Program(None)
+        if key == None or self.cache == None or not self.cache.load(key, program):
+            if self.source_format == 'ippcode':
+                program.get_program_from_ippcode(source)
+            else:
+                program.get_program_from_xml(source)
+            program.prepocessing()
+            program.compile()
+            if key != None and self.cache != None:
+                self.cache.store(key, program)
+        self.prepare(program)
+        if key != None:
+            self.remember(key, program)
+        return program
+
+    # Program loaded before under key, hash of its source, from memory
+    # or cache, None when it is in neither of them
+    def load_key(self, key: str) -> Program:
+        if self.source_format != 'xml':
+            key += '-' + self.source_format
+        if key in self.loaded:
+            self.loaded.move_to_end(key)
+            return self.loaded[key]
+        program = Program(None)
+        if self.cache == None or not self.cache.load(key, program):
+            return None
+        self.prepare(program)
+        self.remember(key, program)
+        return program
+
+    # Optimize compiled program and transpile it for block engine
+    def prepare(self, program: Program) -> None:
+        optimizer.optimize(program, self.opt_level)
+        if self.engine == 'block':
+            program.block_code = transpiler.transpile(program.ops)
+
+    def remember(self, key: str, program: Program) -> None:
+        self.loaded[key] = program
+        if len(self.loaded) > self.max_loaded:
+            self.loaded.popitem(last=False)
+
+    @staticmethod
+    def file_key(path: str) -> str:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
+    # Program saved in checkpoint file with state to restore, it is never
+    # kept loaded, ops were already optimized before the snapshot
+    def load_checkpoint(self, path: str) -> tuple:
+        program, state = snapshot.load(path)
+        if self.engine == 'block':
+            program.block_code = transpiler.transpile(program.ops)
+        return program, state
+
+    # Run program with fresh state and return its exit code instead of exiting,
+    # input is an input provider or the input itself as str or bytes. With
+    # resume the program and its state are restored from checkpoint file
+    # and source is ignored, the input must be the same as in the first run.
+    def run(self, source, input=None, stdout=None, stderr=None,
+            max_depth: int = DEFAULT_MAX_DEPTH, buffer_size: int = DEFAULT_BUFFER_SIZE,
+            max_instructions: int = None, time_limit: float = None,
+            max_call_depth: int = None, max_data_depth: int = None,
+            max_string_size: int = None, profiler: Profiler = None,
+            checkpoint: Checkpoint = None, resume: str = None) -> Result:
+        if input == None or isinstance(input, (str, bytes)):
+            input = MemoryInput(input if input != None else b'')
+        stdout_stream = stdout if stdout != None else io.StringIO()
+        stderr_stream = stderr if stderr != None else io.StringIO()
+        program_stdout = Output(stdout_stream, buffer_size)
+        program_stderr = Output(stderr_stream, buffer_size)
+
+        program = None
+        try:
+            state = None
+            if resume != None:
+                loaded, state = self.load_checkpoint(resume)
+            else:
+                try:
+                    loaded = self.load(source)
+                except (FileNotFoundError, PermissionError):
+                    Error.handle_error(Error.IN_FILE.value)
+            program = loaded.clone(input, max_depth, program_stdout, program_stderr)
+            if state != None:
+                snapshot.restore(program, state)
+            program.max_instructions = max_instructions
+            program.time_limit = time_limit
+            program.max_string_size = max_string_size
+            if max_call_depth != None:
+                program.call_stack.max_depth = max_call_depth
+            if max_data_depth != None:
+                program.data_stack.max_depth = max_data_depth
+            program.profiler = profiler
+            program.checkpoint = checkpoint
+            program.run()
+            exit_code = 0
+        except InterpretExit as error:
+            exit_code = error.code
+            if error.message != None:
+                program_stderr.write("Error: " + error.message + "\n")
+        except SystemExit as exit:
+            exit_code = exit.code
+        finally:
+            program_stdout.flush()
+            program_stderr.flush()
+            if checkpoint != None:
+                checkpoint.wait()
+
+        return Result(exit_code,
+                      stdout_stream.getvalue() if stdout == None else None,
+                      stderr_stream.getvalue() if stderr == None else None,
+                      program.instructions_executed if program != None else 0,
+                      program.frames.pool_stats() if program != None else None)
+
+default_interpreter = Interpreter()
+
+# Run program once with the shared default interpreter
+def run(source, input=None, stdout=None, stderr=None, **options) -> Result:
+    return default_interpreter.run(source, input, stdout, stderr, **options)
@@ -4,6 +4,8 @@
 
 class Argument:
 
+    __slots__ = ('type', 'value', 'position')
+
     type: str
     value: str
     position: int
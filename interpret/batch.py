@@ -0,0 +1,215 @@
+## @file batch.py
+# @brief Parallel runner of many test cases
+# @author Marián Tarageľ
+
+from argparse import RawDescriptionHelpFormatter
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import sys
+import time
+from my_arg_parse import Myargparse
+from error import Error
+from api import Interpreter
+from cache import ProgramCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE
+
+# One program run with its expected results, missing input is empty
+# and missing expected output is not compared
+class Case:
+
+    name: str
+    source: str
+    input: str
+    output: str
+    rc: int
+
+    def __init__(self, name: str, source: str, input: str = None,
+                 output: str = None, rc: int = 0):
+        self.name = name
+        self.source = source
+        self.input = input
+        self.output = output
+        self.rc = rc
+
+# Budgets applied to every case
+class Options:
+
+    max_instructions: int
+    time_limit: float
+    max_call_depth: int
+    max_data_depth: int
+    max_string_size: int
+
+    def __init__(self, max_instructions: int = None, time_limit: float = None,
+                 max_call_depth: int = None, max_data_depth: int = None,
+                 max_string_size: int = None):
+        self.max_instructions = max_instructions
+        self.time_limit = time_limit
+        self.max_call_depth = max_call_depth
+        self.max_data_depth = max_data_depth
+        self.max_string_size = max_string_size
+
+# Cases in test directory, every NAME.src has optional NAME.in,
+# NAME.out and NAME.rc next to it
+def cases_from_directory(directory: str) -> list:
+    cases = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            if not file.endswith('.src'):
+                continue
+            base = os.path.join(root, file[:-4])
+            rc = 0
+            if os.path.exists(base + '.rc'):
+                with open(base + '.rc') as rc_file:
+                    rc = int(rc_file.read().strip())
+            cases.append(Case(os.path.relpath(base, directory), base + '.src',
+                              base + '.in' if os.path.exists(base + '.in') else None,
+                              base + '.out' if os.path.exists(base + '.out') else None,
+                              rc))
+    return cases
+
+# Cases in manifest with one JSON object per line, keys are name, source,
+# input, output and rc, paths are relative to manifest
+def cases_from_manifest(manifest: str) -> list:
+    directory = os.path.dirname(os.path.abspath(manifest))
+    cases = []
+    with open(manifest) as file:
+        for line in file:
+            if line.strip() == '':
+                continue
+            item = json.loads(line)
+            paths = [os.path.join(directory, item[key]) if item.get(key) != None else None
+                     for key in ('source', 'input', 'output')]
+            cases.append(Case(item.get('name', item['source']), *paths, item.get('rc', 0)))
+    return cases
+
+# Interpreter of worker process, it keeps programs loaded across cases
+interpreter = None
+
+def init_worker(cache: ProgramCache) -> None:
+    global interpreter
+    interpreter = Interpreter(cache)
+
+def read_file(path: str) -> bytes:
+    if path == None:
+        return b''
+    with open(path, 'rb') as file:
+        return file.read()
+
+# Unreadable source or input fails the case with the same code as
+# interpret.py, other exceptions are errors of the interpret itself
+def run_case(case: Case, options: Options) -> dict:
+    start = time.perf_counter()
+    try:
+        result = interpreter.run(case.source, read_file(case.input),
+                                 max_instructions=options.max_instructions,
+                                 time_limit=options.time_limit,
+                                 max_call_depth=options.max_call_depth,
+                                 max_data_depth=options.max_data_depth,
+                                 max_string_size=options.max_string_size)
+        exit_code = result.exit_code
+        stdout = result.stdout
+        stderr = result.stderr
+        instructions = result.instructions_executed
+    except OSError:
+        exit_code = Error.IN_FILE.value
+        stdout = ''
+        stderr = ''
+        instructions = 0
+    except Exception as error:
+        exit_code = Error.INTERNAL.value
+        stdout = ''
+        stderr = 'Error: ' + repr(error) + '\n'
+        instructions = 0
+    elapsed = time.perf_counter() - start
+
+    passed = exit_code == case.rc
+    if passed and exit_code == 0 and case.output != None:
+        passed = stdout == read_file(case.output).decode('utf-8')
+    return {'name': case.name, 'source': case.source, 'passed': passed,
+            'exit_code': exit_code, 'expected_exit_code': case.rc,
+            'time': round(elapsed, 6), 'instructions': instructions,
+            'stdout': stdout, 'stderr': stderr}
+
+def run_case_in_worker(arguments: tuple) -> dict:
+    return run_case(*arguments)
+
+# Run cases on a pool of processes, cases sharing a source are sent to
+# workers in the same chunk so the loaded program is reused
+def run_cases(cases: list, jobs: int, options: Options, cache: ProgramCache = None) -> list:
+    ordered = sorted(cases, key=lambda case: case.source)
+    if jobs <= 1:
+        init_worker(cache)
+        results = [run_case(case, options) for case in ordered]
+    else:
+        chunksize = max(1, len(ordered) // (jobs * 4))
+        with ProcessPoolExecutor(jobs, initializer=init_worker, initargs=(cache,)) as executor:
+            results = list(executor.map(run_case_in_worker,
+                                        [(case, options) for case in ordered],
+                                        chunksize=chunksize))
+    results.sort(key=lambda result: result['name'])
+    return results
+
+def main() -> None:
+    parser = Myargparse(formatter_class=RawDescriptionHelpFormatter, description="""
+Skript spustí testy z adresára alebo manifestu paralelne v niekoľkých procesoch
+a vypíše súhrn výsledkov vo formáte JSON.""")
+    parser.add_argument('--dir', metavar='DIR', dest='directory',
+    help="adresár s testami NAME.src, NAME.in, NAME.out a NAME.rc")
+    parser.add_argument('--manifest', metavar='FILE', dest='manifest',
+    help="súbor s jedným testom vo formáte JSON na riadok")
+    parser.add_argument('--jobs', metavar='N', dest='jobs', type=int, default=os.cpu_count(),
+    help="počet paralelne bežiacich procesov")
+    parser.add_argument('--max-instructions', metavar='N', dest='max_instructions', type=int,
+    help="maximálny počet vykonaných inštrukcií jedného testu")
+    parser.add_argument('--time-limit', metavar='SEC', dest='time_limit', type=float,
+    help="maximálny čas behu jedného testu v sekundách")
+    parser.add_argument('--max-call-depth', metavar='N', dest='max_call_depth', type=int,
+    help="maximálna hĺbka zásobníka volaní jedného testu")
+    parser.add_argument('--max-data-depth', metavar='N', dest='max_data_depth', type=int,
+    help="maximálna hĺbka dátového zásobníka jedného testu")
+    parser.add_argument('--max-string-size', metavar='N', dest='max_string_size', type=int,
+    help="maximálny celkový počet znakov reťazcov v rámcoch jedného testu")
+    parser.add_argument('--summary', metavar='FILE', dest='summary',
+    help="súbor pre súhrn výsledkov, predvolene štandardný výstup")
+    parser.add_argument('--cache-dir', metavar='DIR', dest='cache_dir', default=DEFAULT_CACHE_DIR,
+    help="adresár s cache načítaných programov")
+    parser.add_argument('--no-cache', action='store_true',
+    help="načíta programy vždy z XML a neukladá ich do cache")
+    args = parser.parse_args()
+
+    if (args.directory == None) == (args.manifest == None):
+        parser.error('exactly one of --dir and --manifest is required')
+    try:
+        if args.directory != None:
+            cases = cases_from_directory(args.directory)
+        else:
+            cases = cases_from_manifest(args.manifest)
+    except (OSError, ValueError, KeyError):
+        sys.exit(Error.IN_FILE.value)
+
+    cache = ProgramCache(args.cache_dir, DEFAULT_CACHE_SIZE) if not args.no_cache else None
+    options = Options(args.max_instructions, args.time_limit, args.max_call_depth,
+                      args.max_data_depth, args.max_string_size)
+    start = time.perf_counter()
+    results = run_cases(cases, args.jobs, options, cache)
+    passed = sum(result['passed'] for result in results)
+    summary = {'total': len(results), 'passed': passed, 'failed': len(results) - passed,
+               'jobs': args.jobs, 'time': round(time.perf_counter() - start, 6),
+               'cases': results}
+
+    try:
+        if args.summary != None:
+            with open(args.summary, 'w') as file:
+                json.dump(summary, file, indent=2)
+        else:
+            json.dump(summary, sys.stdout, indent=2)
+            print()
+    except OSError:
+        sys.exit(Error.OUT_FILE.value)
+    print(str(passed) + "/" + str(len(results)) + " passed", file=sys.stderr)
+    sys.exit(0 if passed == len(results) else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+## @file cache.py
+# @brief Persistent cache of loaded and linked programs
+# @author Marián Tarageľ
+
+import hashlib
+import marshal
+import os
+from compiler import Op, Operand
+import compiler
+
+FORMAT_VERSION = 2
+DEFAULT_CACHE_SIZE = 64 << 20
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'ippcode23-interpret')
+
+# Programs are stored by hash of the source XML, least recently used
+# entries are evicted when the directory grows over max_size bytes
+class ProgramCache:
+
+    directory: str
+    max_size: int
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    # Content hash of source file, raises the same errors as open()
+    @staticmethod
+    def source_key(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            while chunk := file.read(1 << 20):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.bin')
+
+    # Fill program with cached ops, return False on miss or unusable entry
+    def load(self, key: str, program: object) -> bool:
+        path = self.entry_path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = marshal.load(file)
+            version, ops, labels, global_names, local_names = data
+            if version != FORMAT_VERSION:
+                return False
+            program.ops = [self.restore_op(op) for op in ops]
+            compiler.number(program.ops)
+            program.labels = labels
+            program.global_names = global_names
+            program.local_names = local_names
+            os.utime(path)
+        except (OSError, EOFError, ValueError, TypeError, IndexError):
+            return False
+        return True
+
+    # Store compiled program, cache failures never stop the interpret
+    def store(self, key: str, program: object) -> None:
+        data = (FORMAT_VERSION, [self.dump_op(op) for op in program.ops],
+                program.labels, program.global_names, program.local_names)
+        path = self.entry_path(key)
+        temporary_path = path + '.' + str(os.getpid()) + '.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary_path, 'wb') as file:
+                marshal.dump(data, file)
+            os.replace(temporary_path, path)
+            self.evict()
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    # Remove least recently used entries over the size limit
+    def evict(self) -> None:
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if entry.name.endswith('.bin'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+    # Ops are stored by opcode name, so they are checked again when restored
+    @staticmethod
+    def dump_op(op: Op) -> tuple:
+        return (op.opcode, op.order,
+                tuple((operand.type, operand.value, operand.frame, operand.name,
+                       operand.slot, operand.target) for operand in op.args))
+
+    @staticmethod
+    def restore_op(data: tuple) -> Op:
+        opcode, order, args = data
+        operands = []
+        for type, value, frame, name, slot, target in args:
+            operand = Operand(type, value)
+            operand.frame = frame
+            operand.name = name
+            operand.slot = slot
+            operand.target = target
+            operands.append(operand)
+        return compiler.create_op(opcode, order, operands)
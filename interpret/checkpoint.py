@@ -0,0 +1,164 @@
+## @file checkpoint.py
+# @brief Snapshots of running program state and resuming from them
+# @author Marián Tarageľ
+
+import marshal
+import os
+import sys
+import threading
+import zlib
+from compiler import Op, Operand
+from frames import Frame
+from error import Error
+from program import Program
+from string_buffer import plain
+
+FORMAT_VERSION = 5
+
+# Saves snapshots of running program to path. A snapshot is taken at the
+# next budget check (backward jump or call) after request() or after every
+# instructions, the state is marshalled there and compressed and written
+# by background thread while the program continues
+class Checkpoint:
+
+    path: str
+    every: int
+    source: str
+    requested: bool
+    next_at: int
+    writer: threading.Thread
+    program_data: bytes
+    saved: int
+    error: OSError
+
+    def __init__(self, path: str, every: int = None, source: str = None):
+        self.path = path
+        self.every = every
+        self.source = source
+        self.requested = False
+        self.next_at = every if every != None else sys.maxsize
+        self.writer = None
+        self.program_data = None
+        self.saved = 0
+        self.error = None
+
+    # Ask for snapshot, safe to call from signal handler or other thread
+    def request(self, *args) -> None:
+        self.requested = True
+
+    # Program state after the current control op, which moves to target
+    def save(self, program: object, target: int) -> None:
+        executed = program.instructions_executed + 1
+        self.requested = False
+        if self.every != None:
+            self.next_at = executed + self.every
+        # Output before snapshot must not be lost if process is killed
+        program.flush_outputs()
+        # Ops do not change while program runs, they are dumped only once
+        if self.program_data == None:
+            self.program_data = marshal.dumps(dump_program(program, self.source))
+        data = marshal.dumps((FORMAT_VERSION, self.program_data,
+                              dump_state(program, target, executed)))
+        self.wait()
+        self.writer = threading.Thread(target=self.write, args=(data,))
+        self.writer.start()
+
+    def write(self, data: bytes) -> None:
+        temporary_path = self.path + '.' + str(os.getpid()) + '.tmp'
+        try:
+            with open(temporary_path, 'wb') as file:
+                file.write(zlib.compress(data, 1))
+            os.replace(temporary_path, self.path)
+            self.saved += 1
+        except OSError as error:
+            self.error = error
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    # Wait until the last snapshot is written
+    def wait(self) -> None:
+        if self.writer != None:
+            self.writer.join()
+            self.writer = None
+
+def dump_op(op: Op) -> tuple:
+    return (op.code, op.opcode, op.order, op.index,
+            tuple((operand.type, operand.value, operand.frame, operand.name,
+                   operand.slot, operand.target) for operand in op.args))
+
+def restore_op(data: tuple) -> Op:
+    code, opcode, order, index, args = data
+    operands = []
+    for type, value, frame, name, slot, target in args:
+        operand = Operand(type, value)
+        operand.frame = frame
+        operand.name = name
+        operand.slot = slot
+        operand.target = target
+        operands.append(operand)
+    return Op(code, opcode, order, operands, index)
+
+# Ops are stored as they run, after optimizations, so snapshot does not
+# need the source, its path is kept only for information
+def dump_program(program: object, source: str) -> tuple:
+    return (source, [dump_op(op) for op in program.ops], program.labels,
+            program.global_names, program.local_names)
+
+def dump_state(program: object, position: int, executed: int) -> tuple:
+    frames = program.frames
+    temporary_frame = frames.temporary_frame
+    return (position, executed, program.position - 1, dump_frame(frames.global_frame),
+            [dump_frame(frame) for frame in frames.frame_stack.items],
+            dump_frame(temporary_frame) if temporary_frame != None else None,
+            program.call_stack.items, program.data_stack.items, program.input_lines)
+
+# Values, types and definition order of frame, string buffers are saved
+# as str
+def dump_frame(frame: object) -> tuple:
+    return [plain(value) for value in frame.values], frame.types, frame.order
+
+# Program of snapshot and state to restore into its clone
+def load(path: str) -> tuple:
+    try:
+        with open(path, 'rb') as file:
+            version, program_data, state = marshal.loads(zlib.decompress(file.read()))
+        if version != FORMAT_VERSION:
+            Error.handle_error(Error.IN_FILE.value, "invalid checkpoint " + path)
+        source, ops, labels, global_names, local_names = marshal.loads(program_data)
+        program = Program(None)
+        program.ops = [restore_op(op) for op in ops]
+    except (FileNotFoundError, PermissionError):
+        Error.handle_error(Error.IN_FILE.value)
+    except (zlib.error, EOFError, ValueError, TypeError):
+        Error.handle_error(Error.IN_FILE.value, "invalid checkpoint " + path)
+    program.labels = labels
+    program.global_names = global_names
+    program.local_names = local_names
+    return program, state
+
+# Put state of snapshot into bound program
+def restore(program: object, state: tuple) -> None:
+    (position, executed, last, global_frame, frame_stack, temporary_frame,
+     call_stack, data_stack, input_lines) = state
+    frames = program.frames
+    (frames.global_frame.values[:], frames.global_frame.types[:],
+     frames.global_frame.order[:]) = global_frame
+    frames.frame_stack.items = [restore_frame(frame) for frame in frame_stack]
+    frames.temporary_frame = restore_frame(temporary_frame) if temporary_frame != None else None
+    program.call_stack.items = call_stack
+    program.data_stack.items = data_stack
+    program.position = position
+    program.instructions_executed = executed
+    program.last_instruction = program.ops[last]
+    # Input lines read before snapshot are skipped, input must be the same
+    for _ in range(input_lines):
+        if program.input.readline() == None:
+            break
+    program.input_lines = input_lines
+
+def restore_frame(data: tuple) -> Frame:
+    frame = Frame(0)
+    frame.values, frame.types, frame.order = data
+    return frame
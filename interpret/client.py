@@ -0,0 +1,84 @@
+## @file client.py
+# @brief Client of interpret server with the same arguments as interpret.py
+# @author Marián Tarageľ
+
+import json
+import os
+import socket
+import sys
+from interpret_args import create_parser, check_args
+from error import Error
+import protocol
+
+# Arguments with paths the server opens itself
+PATHS = ('source', 'input', 'input_dir', 'input_manifest', 'output_dir', 'profile',
+         'checkpoint', 'resume', 'cache_dir')
+
+# Arguments for server, relative paths are resolved against working
+# directory of client
+def request_args(args: object) -> dict:
+    request = vars(args).copy()
+    del request['socket']
+    del request['help']
+    for name in PATHS:
+        if request[name] != None and request[name] != 'STDIN':
+            request[name] = os.path.abspath(request[name])
+    return request
+
+# Whole lines of standard input, terminal is read line by line
+def read_input() -> bytes:
+    if sys.stdin.isatty():
+        text = sys.stdin.readline()
+    else:
+        text = ''.join(sys.stdin.readlines(1 << 16))
+    return text.encode('utf-8')
+
+def communicate(connection: socket.socket, args: object) -> int:
+    protocol.send_json(connection, protocol.REQUEST, {'args': request_args(args)})
+    if args.source == 'STDIN' and args.resume == None:
+        protocol.send(connection, protocol.SOURCE, sys.stdin.buffer.read())
+    while True:
+        kind, payload = protocol.receive(connection)
+        match kind:
+            case protocol.STDOUT:
+                sys.stdout.buffer.write(payload)
+                sys.stdout.buffer.flush()
+            case protocol.STDERR:
+                sys.stderr.buffer.write(payload)
+                sys.stderr.buffer.flush()
+            case protocol.READ:
+                protocol.send(connection, protocol.INPUT, read_input())
+            case protocol.EXIT:
+                return json.loads(payload)['exit_code']
+
+# Without server the program is run in this process like by interpret.py
+def run_locally(args: object) -> int:
+    import interpret
+    from input_provider import StdinInput
+    return interpret.execute(args, interpret.create_interpreter(args), sys.stdin.buffer,
+                             StdinInput(), sys.stdout, sys.stderr)
+
+def main() -> None:
+    parser = create_parser()
+    parser.add_argument('--socket', metavar='PATH', dest='socket', default=protocol.DEFAULT_SOCKET,
+    help="cesta k Unix socketu servera, bez bežiaceho servera sa program vykoná priamo")
+    args = parser.parse_args()
+    check_args(parser, args)
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(args.socket)
+    except OSError:
+        connection.close()
+        sys.exit(run_locally(args))
+    try:
+        exit_code = communicate(connection, args)
+    except OSError:
+        print("Error: connection to server " + args.socket + " lost", file=sys.stderr)
+        exit_code = Error.INTERNAL.value
+    finally:
+        connection.close()
+    sys.exit(exit_code)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+## @file compiler.py
+# @brief Lowering of loaded instructions into pre-decoded ops
+# @author Marián Tarageľ
+
+import opcodes
+import interpret_tools as tool
+
+class Operand:
+
+    __slots__ = ('type', 'value', 'frame', 'name', 'slot', 'target')
+
+    def __init__(self, type: str, value):
+        self.type = type
+        self.value = value
+        self.frame = None
+        self.name = None
+        self.slot = None
+        self.target = None
+
+# Index is position of instruction in the loaded program, optimizations
+# move ops, BREAK reports return addresses by it
+class Op:
+
+    __slots__ = ('code', 'opcode', 'order', 'args', 'index')
+
+    def __init__(self, code: int, opcode: str, order: int, args: list, index: int = None):
+        self.code = code
+        self.opcode = opcode
+        self.order = order
+        self.args = args
+        self.index = index
+
+# Pre-decode one argument of instruction
+def compile_argument(argument: object) -> Operand:
+    operand = Operand(argument.type, argument.value)
+    if argument.type == 'var' and '@' in argument.value:
+        operand.frame, operand.name = tool.get_var_frame_and_name(argument.value)
+    return operand
+
+# Lower one loaded instruction into op with integer opcode
+def compile_instruction(instruction: object) -> Op:
+    args = [compile_argument(argument) for argument in instruction.args]
+    return create_op(instruction.opcode, instruction.order, args)
+
+# Op checked against signature of its instruction, instruction with wrong
+# number of operands becomes INVALID op, so that program still fails only
+# when it reaches the instruction and handlers never check operand count
+def create_op(opcode: str, order: int, args: list) -> Op:
+    code = opcodes.CODES[opcode]
+    if code not in opcodes.UNCHECKED_ARITY and len(args) != opcodes.ARITIES[code]:
+        code = opcodes.INVALID
+    return Op(code, opcode, order, args)
+
+# Number sorted ops by their position in the loaded program
+def number(ops: list) -> None:
+    for position, op in enumerate(ops):
+        op.index = position
+
+# Resolve label operands to indices of ops, unknown labels stay None
+def link(ops: list) -> dict:
+    labels = {}
+    for position, op in enumerate(ops):
+        if op.code == opcodes.LABEL:
+            labels[op.args[0].value] = position
+    for op in ops:
+        for operand in op.args:
+            if operand.type == 'label':
+                operand.target = labels.get(operand.value)
+    return labels
+
+# Assign every variable a fixed slot, GF has its own slots and LF shares
+# slots with TF because TF becomes LF, defined variables go first
+def resolve_slots(ops: list) -> tuple[list, list]:
+    slots = {'GF': {}, 'LF': {}, 'TF': {}}
+    slots['TF'] = slots['LF']
+    variables = [op.args[0] for op in ops
+                 if op.code == opcodes.DEFVAR]
+    variables += [operand for op in ops for operand in op.args]
+    for operand in variables:
+        if operand.type == 'var' and operand.frame in slots:
+            frame_slots = slots[operand.frame]
+            operand.slot = frame_slots.setdefault(operand.name, len(frame_slots))
+    return list(slots['GF']), list(slots['LF'])
@@ -3,12 +3,25 @@
 # @author Marián Tarageľ
 
 from enum import Enum
+from output import Output
+
+# Raised on error states, exits with error code unless it is caught
+class InterpretExit(SystemExit):
+
+    message: str
+
+    def __init__(self, code: int, message: str = None):
+        super().__init__(code)
+        self.message = message
 
 class Error(Enum):
     
     ARGS = 10
     IN_FILE = 11
     OUT_FILE = 12
+    SOURCE_HEADER = 21
+    SOURCE_OPCODE = 22
+    SOURCE_SYNTAX = 23
     XML_FORMAT = 31
     XML_STRUCT = 32
     SEMANTIC = 52
@@ -18,8 +31,11 @@ class Error(Enum):
     MISSING_VAL = 56
     OP_VAL = 57
     STRING = 58
+    RESOURCE = 60
+    INTERNAL = 99
 
     @staticmethod
     # Handle error states
-    def handle_error(error_code: int):
-        exit(error_code)
\ No newline at end of file
+    def handle_error(error_code: int, message: str = None):
+        Output.flush_all()
+        raise InterpretExit(error_code, message)
\ No newline at end of file
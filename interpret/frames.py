@@ -3,35 +3,102 @@
 # @author Marián Tarageľ
 
 from error import Error
-from variable import Variable
+from stack import Stack, DEFAULT_MAX_DEPTH
+from string_buffer import StringBuffer
+import sys
+
+# Variables of one frame stored in slots assigned by resolver,
+# type None means undefined variable and '' variable without value,
+# order has slots in order DEFVAR defined them for BREAK
+class Frame:
+
+    __slots__ = ('values', 'types', 'order')
+
+    def __init__(self, size: int):
+        self.values = [None] * size
+        self.types = [None] * size
+        self.order = []
+
+# Frames dropped from TF are kept for the next CREATEFRAME, at most this
+# many, larger frames are cheaper to allocate than to clear. Measured by
+# bench/bench_frames.py: --pool gives hit rate 0.70 with 64 frames, 0.87
+# with 256 and 0.998 with 1024 for calls.xml, whose recursion is about 600
+# calls deep, but whole run is within 1 % from 256 on, so the free list
+# stays small. --slots gives clearing at half of the allocation time up
+# to 128 slots, 0.91 of it at 256 and slower from 512, so pooled frames
+# hold at most 256 * 128 slots.
+POOL_SIZE = 256
+POOL_MAX_SLOTS = 128
 
 class Frames:
 
-    global_frame: dict
-    temporary_frame: dict
-    frame_stack: list
+    global_frame: Frame
+    temporary_frame: Frame
+    frame_stack: Stack
+    global_names: list
+    local_names: list
+    pool: list
+    pool_size: int
+    blank: list
+    allocated: int
+    reused: int
 
-    def __init__(self):
-        self.global_frame = {}
+    def __init__(self, global_names: list, local_names: list,
+                 max_depth: int = DEFAULT_MAX_DEPTH):
+        self.global_names = global_names
+        self.local_names = local_names
+        self.global_frame = Frame(len(global_names))
         self.temporary_frame = None
-        self.frame_stack = []
+        self.frame_stack = Stack("frame stack", max_depth)
+        self.pool = []
+        self.pool_size = POOL_SIZE if len(local_names) <= POOL_MAX_SLOTS else 0
+        self.blank = [None] * len(local_names)
+        self.allocated = 0
+        self.reused = 0
 
-    # New TF
+    # New TF, frames of all calls have slots of all local variables, so
+    # released frame only needs to be cleared
     def create_frame(self) -> None:
-        self.temporary_frame = {}
+        frame = self.temporary_frame
+        if frame != None and self.pool_size > 0:
+            frame.values[:] = self.blank
+            frame.types[:] = self.blank
+            frame.order.clear()
+            self.reused += 1
+        elif self.pool != []:
+            self.temporary_frame = self.pool.pop()
+            self.reused += 1
+        else:
+            self.temporary_frame = Frame(len(self.local_names))
+            self.allocated += 1
+
+    # Keep frame nothing refers to anymore for reuse
+    def release(self, frame: Frame) -> None:
+        if frame != None and len(self.pool) < self.pool_size:
+            frame.values[:] = self.blank
+            frame.types[:] = self.blank
+            frame.order.clear()
+            self.pool.append(frame)
+
+    # Numbers of created and reused local frames
+    def pool_stats(self) -> dict:
+        created = self.allocated + self.reused
+        return {'allocated': self.allocated, 'reused': self.reused,
+                'hit_rate': round(self.reused / created, 4) if created > 0 else 0.0}
 
     # New LF
     def push_frame(self) -> None:
         if self.temporary_frame != None:
-            self.frame_stack.insert(0, self.temporary_frame)
+            self.frame_stack.push(self.temporary_frame)
             self.temporary_frame = None
         else:
             Error.handle_error(Error.NO_FRAME.value)
 
     # Move LF to TF
     def pop_frame(self) -> None:
-        if self.frame_stack != []:
-            top_local_frame = self.frame_stack.pop(0)
+        if len(self.frame_stack) > 0:
+            top_local_frame = self.frame_stack.pop()
+            self.release(self.temporary_frame)
             self.temporary_frame = top_local_frame
         else:
             Error.handle_error(Error.NO_FRAME.value)
@@ -48,84 +115,110 @@ class Frames:
                     Error.handle_error(Error.NO_FRAME.value)
             case 'LF':
                 if len(self.frame_stack) > 0:
-                    return self.frame_stack[0]
+                    return self.frame_stack.top()
                 else:
                     Error.handle_error(Error.NO_FRAME.value)
             case _:
                 Error.handle_error(Error.SEMANTIC.value)
 
     # New variable
-    def def_var(self, var_name: str, frame_name: str) -> None:
-        frame = self.get_frame(frame_name)
-        if var_name not in frame:
-            frame[var_name] = None
+    def def_var(self, var: object) -> None:
+        frame = self.get_frame(var.frame)
+        if frame.types[var.slot] == None:
+            frame.types[var.slot] = ''
+            frame.order.append(var.slot)
         else:
             Error.handle_error(Error.SEMANTIC.value)
 
     # Set variable value
-    def set_var(self, var_name, frame_name: str, value, type: str) -> None:
-        frame = self.get_frame(frame_name)
-        if var_name in frame:
-            new_var = Variable(var_name, value, type)
-            frame[var_name] = new_var
+    def set_var(self, var: object, value, type: str) -> None:
+        frame = self.get_frame(var.frame)
+        if frame.types[var.slot] != None:
+            frame.values[var.slot] = value
+            frame.types[var.slot] = type
         else:
             Error.handle_error(Error.NO_VAR.value)
 
-    # Get variable value
-    def get_var(self, var_name: str, frame_name: str):
-        frame = self.get_frame(frame_name)
-        if var_name in frame:
-            var = frame.get(var_name)
-            if var == None:
-                Error.handle_error(Error.MISSING_VAL.value)
+    # Get variable value and type, string buffer is returned as str
+    def get_var(self, var: object) -> tuple:
+        frame = self.get_frame(var.frame)
+        type = frame.types[var.slot]
+        if type:
+            value = frame.values[var.slot]
+            if value.__class__ is StringBuffer:
+                return value.materialize(), type
+            return value, type
+        elif type == None:
+            Error.handle_error(Error.NO_VAR.value)
         else:
+            Error.handle_error(Error.MISSING_VAL.value)
+
+    # Get variable value and type like get_var, string buffer is returned
+    # as it is for ops which only look at it or change the variable itself
+    def peek_var(self, var: object) -> tuple:
+        frame = self.get_frame(var.frame)
+        type = frame.types[var.slot]
+        if type:
+            return frame.values[var.slot], type
+        elif type == None:
             Error.handle_error(Error.NO_VAR.value)
-        return var
-    
+        else:
+            Error.handle_error(Error.MISSING_VAL.value)
+
     # Get variable type
-    def get_var_type(self, var_name: str, frame_name: str):
-        frame = self.get_frame(frame_name)
-        if var_name in frame:
-            var = frame.get(var_name)
-            if var == None:
-                return ''
-            else:
-                return var.type
+    def get_var_type(self, var: object):
+        frame = self.get_frame(var.frame)
+        type = frame.types[var.slot]
+        if type != None:
+            return type
         else:
             Error.handle_error(Error.NO_VAR.value)
 
+    # Number of characters of strings in all frames and number of visited variables
+    def get_string_size(self) -> tuple:
+        frames = [self.global_frame] + self.frame_stack.items
+        if self.temporary_frame != None:
+            frames.append(self.temporary_frame)
+        size = 0
+        visited = 0
+        for frame in frames:
+            visited += len(frame.types)
+            for value, type in zip(frame.values, frame.types):
+                if type == 'string':
+                    size += len(value)
+        return size, visited
+
     # Print current state of all frames (GF, LF, TF)
-    def print_frames(self) -> None:
-        print("Global frame:")
-        self.print_frame(self.global_frame)
-        print()
+    def print_frames(self, file=sys.stdout) -> None:
+        print("Global frame:", file=file)
+        self.print_frame(self.global_frame, self.global_names, file)
+        print(file=file)
 
-        print("Local frame:")
+        print("Local frame:", file=file)
         if len(self.frame_stack) == 0:
-            print("Undefined")
+            print("Undefined", file=file)
         else:
-            self.print_frame(self.frame_stack[0])
-        print()
+            self.print_frame(self.frame_stack.top(), self.local_names, file)
+        print(file=file)
 
-        print("Temporary frame:")
+        print("Temporary frame:", file=file)
         if self.temporary_frame == None:
-            print("Undefined")
+            print("Undefined", file=file)
         else:
-            self.print_frame(self.temporary_frame)
+            self.print_frame(self.temporary_frame, self.local_names, file)
 
-    # Print one frame state
+    # Print one frame state, variables in order of their definition
     @staticmethod
-    def print_frame(frame: dict) -> None:
-        print("{", end="")
+    def print_frame(frame: Frame, names: list, file=sys.stdout) -> None:
+        print("{", end="", file=file)
         first = True
-        for var_name in frame:
+        for slot in frame.order:
             if not first:
-                print(", ", end="")
-            var = frame.get(var_name)
-            print("'" + var_name + "': ", end="")
-            if var != None:
-                print("'" + str(var.value) + "'", end="")
+                print(", ", end="", file=file)
+            print("'" + names[slot] + "': ", end="", file=file)
+            if frame.types[slot] != '':
+                print("'" + str(frame.values[slot]) + "'", end="", file=file)
             else:
-                print("None", end="")
+                print("None", end="", file=file)
             first = False
-        print("}")
\ No newline at end of file
+        print("}", file=file)
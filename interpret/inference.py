@@ -0,0 +1,168 @@
+## @file inference.py
+# @brief Static inference of global variable types over control flow graph
+# @author Marián Tarageľ
+
+import opcodes
+from compiler import Op
+
+# Only GF variables are tracked, frames of LF and TF change with
+# CREATEFRAME, PUSHFRAME and POPFRAME. State maps slot to type, None
+# is undefined variable, '' variable without value and missing slot
+# unknown type, like types of Frame
+VALUE_TYPES = ('int', 'string', 'bool', 'nil')
+UNKNOWN = opcodes.UNKNOWN
+COPY = opcodes.COPY
+
+# Type of result variable after successful op, instructions have it in
+# their signatures
+RESULT_TYPES = {code: result for code, result in enumerate(opcodes.RESULTS) if result != None}
+RESULT_TYPES.update({
+    opcodes.DEFVAR_MOVE: COPY, opcodes.PUSHS_POPS: COPY,
+    opcodes.ADD_INT: 'int', opcodes.SUB_INT: 'int',
+    opcodes.LT_JUMPIF: 'bool', opcodes.GT_JUMPIF: 'bool', opcodes.EQ_JUMPIF: 'bool'})
+
+# Typed variant of op and types of its operands that make checks redundant
+TYPED_CODES = {
+    opcodes.ADD: opcodes.ADD_TYPED, opcodes.SUB: opcodes.SUB_TYPED,
+    opcodes.MUL: opcodes.MUL_TYPED, opcodes.IDIV: opcodes.IDIV_TYPED,
+    opcodes.LT: opcodes.LT_TYPED, opcodes.GT: opcodes.GT_TYPED, opcodes.EQ: opcodes.EQ_TYPED,
+    opcodes.AND: opcodes.AND_TYPED, opcodes.OR: opcodes.OR_TYPED, opcodes.NOT: opcodes.NOT_TYPED,
+    opcodes.CONCAT: opcodes.CONCAT_TYPED, opcodes.STRLEN: opcodes.STRLEN_TYPED,
+    opcodes.ADD_INT: opcodes.ADD_INT_TYPED, opcodes.SUB_INT: opcodes.SUB_INT_TYPED,
+    opcodes.LT_JUMPIF: opcodes.LT_JUMPIF_TYPED, opcodes.GT_JUMPIF: opcodes.GT_JUMPIF_TYPED,
+    opcodes.EQ_JUMPIF: opcodes.EQ_JUMPIF_TYPED}
+
+JUMPS = (opcodes.JUMPIFEQ, opcodes.JUMPIFNEQ, opcodes.LT_JUMPIF,
+         opcodes.GT_JUMPIF, opcodes.EQ_JUMPIF, opcodes.JUMPIFEQS, opcodes.JUMPIFNEQS)
+BLOCK_ENDS = JUMPS + (opcodes.JUMP, opcodes.CALL, opcodes.RETURN, opcodes.EXIT)
+
+def is_global_var(operand: object) -> bool:
+    return operand.type == 'var' and operand.frame == 'GF' and operand.slot != None
+
+# Type of operand with value, UNKNOWN when it is not proven
+def operand_type(operand: object, state: dict) -> str:
+    if operand.type in VALUE_TYPES:
+        return operand.type
+    if is_global_var(operand) and state.get(operand.slot, UNKNOWN) in VALUE_TYPES:
+        return state[operand.slot]
+    return UNKNOWN
+
+# Decide if op cannot fail on type check with operand types in state
+def is_typed(op: Op, state: dict) -> bool:
+    if op.code not in TYPED_CODES:
+        return False
+    types = [operand_type(operand, state) for operand in op.args[1:3]]
+    if UNKNOWN in types:
+        return False
+    match op.code:
+        case opcodes.ADD | opcodes.SUB | opcodes.MUL | opcodes.IDIV | opcodes.ADD_INT | opcodes.SUB_INT:
+            return types == ['int', 'int']
+        case opcodes.LT | opcodes.GT | opcodes.LT_JUMPIF | opcodes.GT_JUMPIF:
+            return types[0] == types[1] and types[0] != 'nil'
+        case opcodes.EQ | opcodes.EQ_JUMPIF:
+            return types[0] == types[1] or 'nil' in types
+        case opcodes.AND | opcodes.OR:
+            return types == ['bool', 'bool']
+        case opcodes.NOT:
+            return types == ['bool']
+        case opcodes.CONCAT:
+            return types == ['string', 'string']
+        case opcodes.STRLEN:
+            return types == ['string']
+
+# Apply op to state
+def transfer(op: Op, state: dict) -> None:
+    if op.code not in RESULT_TYPES or not is_global_var(op.args[0]):
+        return
+    type = RESULT_TYPES[op.code]
+    if type == COPY:
+        type = operand_type(op.args[1], state)
+    if type == UNKNOWN:
+        state.pop(op.args[0].slot, None)
+    else:
+        state[op.args[0].slot] = type
+
+def jump_target(op: Op):
+    for operand in op.args:
+        if operand.type == 'label':
+            return operand.target
+    return None
+
+# Positions where basic blocks start
+def block_starts(ops: list) -> list:
+    starts = {0}
+    for position, op in enumerate(ops):
+        if op.code == opcodes.LABEL:
+            starts.add(position)
+        elif op.code in BLOCK_ENDS:
+            starts.add(position + 1)
+    return sorted(start for start in starts if start < len(ops))
+
+# Successor blocks, RETURN continues after any CALL
+def block_successors(ops: list, starts: list) -> list:
+    block_at = {start: block for block, start in enumerate(starts)}
+    return_sites = [block_at[position + 1] for position, op in enumerate(ops)
+                    if op.code == opcodes.CALL and position + 1 < len(ops)]
+    successors = []
+    for block, start in enumerate(starts):
+        end = starts[block + 1] if block + 1 < len(starts) else len(ops)
+        last = ops[end - 1]
+        following = [block + 1] if end < len(ops) else []
+        target = jump_target(last)
+        targets = [block_at[target]] if target != None else []
+        match last.code:
+            case opcodes.JUMP | opcodes.CALL:
+                successors.append(targets)
+            case opcodes.RETURN:
+                successors.append(return_sites)
+            case opcodes.EXIT:
+                successors.append([])
+            case code if code in JUMPS:
+                successors.append(targets + following)
+            case _:
+                successors.append(following)
+    return successors
+
+def join(state_1: dict, state_2: dict) -> dict:
+    return {slot: type for slot, type in state_1.items()
+            if slot in state_2 and state_2[slot] == type}
+
+# Infer types at start of every block, unreachable blocks stay None
+def infer(ops: list, starts: list, global_count: int) -> list:
+    successors = block_successors(ops, starts)
+    states = [None] * len(starts)
+    states[0] = {slot: None for slot in range(global_count)}
+    worklist = [0]
+    while worklist != []:
+        block = worklist.pop()
+        end = starts[block + 1] if block + 1 < len(starts) else len(ops)
+        state = dict(states[block])
+        for op in ops[starts[block]:end]:
+            transfer(op, state)
+        for successor in successors[block]:
+            if states[successor] == None:
+                states[successor] = dict(state)
+            else:
+                joined = join(states[successor], state)
+                if len(joined) == len(states[successor]):
+                    continue
+                states[successor] = joined
+            worklist.append(successor)
+    return states
+
+# Replace ops with proven operand types by their typed variants
+def specialize(ops: list, global_count: int) -> None:
+    if ops == []:
+        return
+    starts = block_starts(ops)
+    states = infer(ops, starts, global_count)
+    for block, start in enumerate(starts):
+        if states[block] == None:
+            continue
+        end = starts[block + 1] if block + 1 < len(starts) else len(ops)
+        state = states[block]
+        for position in range(start, end):
+            op = ops[position]
+            if is_typed(op, state):
+                ops[position] = Op(TYPED_CODES[op.code], op.opcode, op.order, op.args, op.index)
+            transfer(op, state)
@@ -0,0 +1,68 @@
+## @file input_provider.py
+# @brief Input sources of READ instruction
+# @author Marián Tarageľ
+
+from functools import partial
+import mmap
+import sys
+
+CHUNK_SIZE = 1 << 20
+
+# Hands out lines of input held in memory, the data is decoded and split
+# into lines a chunk at a time, lines are returned without line ending
+# and None means EOF
+class MemoryInput:
+
+    data: bytes
+    offset: int
+    readline: object
+
+    def __init__(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.data = data
+        self.offset = 0
+        self.readline = partial(next, self.generate_lines(), None)
+
+    def generate_lines(self):
+        while (lines := self.load_chunk()) != None:
+            yield from lines
+
+    # Split next chunk of data ending with a whole line
+    def load_chunk(self) -> list:
+        if self.offset >= len(self.data):
+            return None
+        end = self.data.find(b'\n', self.offset + CHUNK_SIZE)
+        if end == -1:
+            end = len(self.data)
+        text = self.data[self.offset:end].decode('utf-8')
+        self.offset = end + 1
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').removesuffix('\r')
+        if end == len(self.data) and text.endswith('\n'):
+            text = text[:-1]
+        return text.split('\n')
+
+# File input, regular files are memory-mapped and the rest
+# (pipes, devices) is read in large chunks at once
+class FileInput(MemoryInput):
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                chunks = []
+                while chunk := file.read(CHUNK_SIZE):
+                    chunks.append(chunk)
+                data = b''.join(chunks)
+        super().__init__(data)
+
+# Standard input is read line by line so interactive use keeps working
+class StdinInput:
+
+    def readline(self):
+        line = sys.stdin.readline()
+        if line == '':
+            return None
+        return line.rstrip('\n')
@@ -0,0 +1,183 @@
+## @file input_set.py
+# @brief Runs of one loaded program against many inputs
+# @author Marián Tarageľ
+
+from concurrent.futures import ProcessPoolExecutor
+import gc
+import io
+import json
+import multiprocessing
+import os
+import time
+from error import Error, InterpretExit
+from input_provider import FileInput
+from output import Output
+import vector
+
+SUMMARY_FILE = 'summary.json'
+
+# Program and arguments of runs, set before workers are forked
+# so they share the loaded program copy-on-write
+loaded = None
+interpreter = None
+settings = None
+
+# Inputs in directory as pairs of name and path, name is file name
+# without .in suffix
+def inputs_from_directory(directory: str) -> list:
+    inputs = []
+    for file in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file)
+        if os.path.isfile(path):
+            inputs.append((file.removesuffix('.in'), path))
+    return inputs
+
+# Inputs in manifest with one JSON object with input and optional
+# name per line, paths are relative to manifest
+def inputs_from_manifest(manifest: str) -> list:
+    directory = os.path.dirname(os.path.abspath(manifest))
+    inputs = []
+    with open(manifest) as file:
+        for line in file:
+            if line.strip() == '':
+                continue
+            item = json.loads(line)
+            path = os.path.join(directory, item['input'])
+            inputs.append((item.get('name', os.path.basename(path).removesuffix('.in')), path))
+    return inputs
+
+# Run program with one input, NAME.stdout, NAME.stderr and NAME.rc
+# are written to output directory
+def run_input(name: str, path: str) -> dict:
+    args = settings
+    base = os.path.join(args.output_dir, name)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    buffer_size = 0 if args.unbuffered else args.buffer_size
+    start = time.perf_counter()
+    with open(base + '.stdout', 'w', encoding='utf-8') as stdout, \
+         open(base + '.stderr', 'w', encoding='utf-8') as stderr:
+        try:
+            input_file = FileInput(path)
+        except (FileNotFoundError, PermissionError):
+            exit_code = Error.IN_FILE.value
+            instructions = 0
+        else:
+            result = interpreter.run(loaded, input_file, stdout, stderr,
+                                     args.max_depth, buffer_size, args.max_instructions,
+                                     args.time_limit, args.max_call_depth,
+                                     args.max_data_depth, args.max_string_size)
+            exit_code = result.exit_code
+            instructions = result.instructions_executed
+    elapsed = time.perf_counter() - start
+    return write_result(name, path, exit_code, elapsed, instructions)
+
+def run_input_in_worker(arguments: tuple) -> dict:
+    return run_input(*arguments)
+
+def write_result(name: str, path: str, exit_code: int, elapsed: float, instructions: int) -> dict:
+    with open(os.path.join(settings.output_dir, name) + '.rc', 'w') as rc:
+        rc.write(str(exit_code) + '\n')
+    return {'name': name, 'input': path, 'exit_code': exit_code,
+            'time': round(elapsed, 6), 'instructions': instructions}
+
+# Run program with all inputs of batch in lockstep, lanes which cannot
+# stay in it continue as scalar runs, time of input is time until its
+# lane ended
+def run_batch(batch: list) -> list:
+    args = settings
+    names = []
+    inputs = []
+    stdouts = []
+    stderrs = []
+    results = [None] * len(batch)
+    for index, (name, path) in enumerate(batch):
+        try:
+            input_file = FileInput(path)
+        except (FileNotFoundError, PermissionError):
+            write_outputs(name, '', '')
+            results[index] = write_result(name, path, Error.IN_FILE.value, 0.0, 0)
+            continue
+        names.append((index, name, path))
+        inputs.append(input_file)
+        stdouts.append(io.StringIO())
+        stderrs.append(io.StringIO())
+    if inputs != []:
+        lanes = vector.VectorRun(loaded, inputs, [Output(stream) for stream in stdouts],
+                                 [Output(stream) for stream in stderrs], args.max_depth,
+                                 args.max_instructions, args.time_limit,
+                                 args.max_call_depth, args.max_data_depth)
+        exit_codes, instructions = lanes.run()
+        Output.flush_all()
+        for lane, (index, name, path) in enumerate(names):
+            write_outputs(name, stdouts[lane].getvalue(), stderrs[lane].getvalue())
+            results[index] = write_result(name, path, exit_codes[lane],
+                                          lanes.finish_times[lane], instructions[lane])
+    return results
+
+def write_outputs(name: str, stdout: str, stderr: str) -> None:
+    base = os.path.join(settings.output_dir, name)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    with open(base + '.stdout', 'w', encoding='utf-8') as file:
+        file.write(stdout)
+    with open(base + '.stderr', 'w', encoding='utf-8') as file:
+        file.write(stderr)
+
+# Inputs split into as many contiguous batches as there are jobs
+def split_batches(inputs: list, jobs: int) -> list:
+    size = max(1, -(-len(inputs) // max(jobs, 1)))
+    return [inputs[start:start + size] for start in range(0, len(inputs), size)]
+
+# Load program once and run it with every input, summary is written to
+# output directory and the exit code is that of loading or output errors
+def run_inputs(args: object, program_interpreter: object, source, inputs: list, stderr) -> int:
+    global loaded, interpreter, settings
+    if args.engine == 'vector' and not vector.is_available():
+        stderr.write("Error: --engine vector requires NumPy\n")
+        stderr.flush()
+        return Error.ARGS.value
+    start = time.perf_counter()
+    try:
+        loaded = program_interpreter.load(source)
+    except (FileNotFoundError, PermissionError):
+        return Error.IN_FILE.value
+    except InterpretExit as error:
+        if error.message != None:
+            stderr.write("Error: " + error.message + "\n")
+            stderr.flush()
+        return error.code
+    load_time = time.perf_counter() - start
+    interpreter = program_interpreter
+    settings = args
+
+    # Lanes cannot check sizes of strings of other lanes, the limit
+    # is checked by scalar runs only
+    lockstep = args.engine == 'vector' and args.max_string_size == None
+
+    try:
+        os.makedirs(args.output_dir, exist_ok=True)
+        if lockstep and args.jobs <= 1:
+            results = run_batch(inputs)
+        elif args.jobs <= 1:
+            results = [run_input(name, path) for name, path in inputs]
+        else:
+            # Objects loaded so far are never freed, collector in workers
+            # does not touch them and their pages stay shared
+            gc.freeze()
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(args.jobs, mp_context=context) as executor:
+                if lockstep:
+                    batches = executor.map(run_batch, split_batches(inputs, args.jobs))
+                    results = [result for batch in batches for result in batch]
+                else:
+                    results = list(executor.map(run_input_in_worker, inputs))
+            gc.unfreeze()
+        summary = {'source': args.source if args.source != 'STDIN' else None,
+                   'total': len(results), 'jobs': args.jobs,
+                   'load_time': round(load_time, 6),
+                   'time': round(time.perf_counter() - start, 6), 'inputs': results}
+        with open(os.path.join(args.output_dir, SUMMARY_FILE), 'w') as file:
+            json.dump(summary, file, indent=2)
+            file.write('\n')
+    except OSError:
+        return Error.OUT_FILE.value
+    return 0
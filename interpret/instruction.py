@@ -6,6 +6,8 @@ from error import Error
 
 class Instruction:
 
+    __slots__ = ('opcode', 'args', 'order')
+
     opcode: str
     args: list
     order: int
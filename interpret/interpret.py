@@ -2,89 +2,85 @@
 # @brief IPPcode23 interpret
 # @author Marián Tarageľ
 
-from argparse import RawDescriptionHelpFormatter
-from my_arg_parse import Myargparse
+from interpret_args import create_parser, check_args
 from error import Error
-import xml.etree.ElementTree as ET
-from program import Program
+from api import Interpreter
+from input_provider import FileInput, StdinInput
+from cache import ProgramCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE
+from profiler import Profiler
+from checkpoint import Checkpoint
+import input_set
+import signal
 import sys
 
-parser = Myargparse(formatter_class=RawDescriptionHelpFormatter, description="""
-Skript načíta XML reprezentáciu programu a tento program s využitím vstupu
-podľa parametrov príkazového riadku interpretuje a generuje výstup.""", add_help=False)
-parser.add_argument('--source', metavar='FILE', dest='source', default='STDIN',
-help="vstupný súbor s XML reprezentaciou zdrojového kódu")
-parser.add_argument('--input', metavar='FILE', dest='input', default='STDIN',
-help="soubor se vstupmi pre samotnú interpretáciu zadaného zdrojového kódu")
-parser.add_argument('-h', '--help', action='store_true', help='show this help message and exit')
+def create_interpreter(args: object) -> Interpreter:
+    cache = None
+    if not args.no_cache:
+        cache = ProgramCache(args.cache_dir if args.cache_dir != None else DEFAULT_CACHE_DIR,
+                             args.cache_size if args.cache_size != None else DEFAULT_CACHE_SIZE)
+    return Interpreter(cache, args.opt_level, args.engine, args.source_format)
 
-args = parser.parse_args()
-parser.check_args_cobination(args)
-parser.if_defined_print_help(args)
-parser.check_no_arguments(args)
+# Run program as given by parsed arguments and return its exit code,
+# source and input which are not files come from the caller, so that
+# the server can pass those of its client
+def execute(args: object, interpreter: Interpreter, source_stream, input_stream,
+            stdout, stderr) -> int:
+    if args.input_dir != None or args.input_manifest != None:
+        return execute_inputs(args, interpreter, source_stream, stderr)
+    try:
+        if args.input != 'STDIN':
+            input_file = FileInput(args.input)
+        else:
+            input_file = input_stream
+    except (FileNotFoundError, PermissionError):
+        return Error.IN_FILE.value
 
-try:
-    if args.input != 'STDIN':
-        input_file = open(args.input, "r")
-    else:
-        input_file = args.input
-    if args.source != 'STDIN':
-        tree = ET.parse(args.source)
-    else:
-        tree = ET.parse(sys.stdin)
-except (FileNotFoundError, PermissionError):
-    Error.handle_error(Error.IN_FILE.value)
-except ET.ParseError:
-    Error.handle_error(Error.XML_FORMAT.value)
+    source = args.source if args.source != 'STDIN' else source_stream
+    if args.resume != None:
+        source = None
+    buffer_size = 0 if args.unbuffered else args.buffer_size
 
-tree = tree.getroot()
+    profiler = Profiler() if args.profile != None else None
 
-program = Program(input_file)
-program.get_program_from_xml(tree)
-program.prepocessing()
+    checkpoint = None
+    if args.checkpoint != None:
+        checkpoint = Checkpoint(args.checkpoint, args.checkpoint_every,
+                                args.source if args.source != 'STDIN' else None)
+        signal.signal(signal.SIGUSR1, checkpoint.request)
 
-program.position = 0
-while True:
-    ins_element = program.get_instruction()
-    if ins_element == None:
-        break
-    program.position += 1
-    match ins_element.opcode:
-        case 'MOVE': program.interpret_move(ins_element)
-        case 'CREATEFRAME': program.interpret_createframe()
-        case 'PUSHFRAME': program.interpret_pushframe()
-        case 'POPFRAME': program.interpret_popframe()
-        case 'DEFVAR': program.interpret_defvar(ins_element)
-        case 'CALL': program.interpret_call(ins_element.args[0].value)
-        case 'RETURN': program.interpret_return()
-        case 'PUSHS': program.interpret_pushs(ins_element)
-        case 'POPS': program.interpret_pops(ins_element)
-        case 'ADD': program.interpret_add_sub_mul_idiv(ins_element, 'add')
-        case 'SUB': program.interpret_add_sub_mul_idiv(ins_element, 'sub')
-        case 'MUL': program.interpret_add_sub_mul_idiv(ins_element, 'mul')
-        case 'IDIV': program.interpret_add_sub_mul_idiv(ins_element, 'idiv')
-        case 'LT': program.interpret_ltgteq(ins_element, 'lt')
-        case 'GT': program.interpret_ltgteq(ins_element, 'gt')
-        case 'EQ': program.interpret_ltgteq(ins_element, 'eq')
-        case 'AND': program.interpret_andor(ins_element, 'and')
-        case 'OR': program.interpret_andor(ins_element, 'or')
-        case 'NOT': program.interpret_not(ins_element)
-        case 'INT2CHAR': program.interpret_int2char(ins_element)
-        case 'STRI2INT': program.interpret_stri2int(ins_element)
-        case 'READ': program.interpret_read(ins_element)
-        case 'WRITE': program.interpret_write_dprint(ins_element, sys.stdout)
-        case 'CONCAT': program.interpret_concat(ins_element)
-        case 'STRLEN': program.interpret_strlen(ins_element)
-        case 'GETCHAR': program.interpret_getchar(ins_element)
-        case 'SETCHAR': program.interpret_setchar(ins_element)
-        case 'TYPE': program.interpret_type(ins_element)
-        case 'LABEL': continue
-        case 'JUMP': program.interpret_jump(ins_element.args[0].value)
-        case 'JUMPIFEQ': program.interpret_jumpif(ins_element, 'eq')
-        case 'JUMPIFNEQ': program.interpret_jumpif(ins_element, 'neq')
-        case 'EXIT': program.interpret_exit(ins_element)
-        case 'DPRINT': program.interpret_write_dprint(ins_element, sys.stderr)
-        case 'BREAK': program.interpret_break(ins_element)
-        case _: Error.handle_error(Error.XML_STRUCT.value)
-    program.instructions_executed += 1
-    program.last_instruction = ins_element
\ No newline at end of file
+    result = interpreter.run(source, input_file, stdout, stderr,
+                             args.max_depth, buffer_size, args.max_instructions,
+                             args.time_limit, args.max_call_depth, args.max_data_depth,
+                             args.max_string_size, profiler, checkpoint, args.resume)
+    if profiler != None:
+        try:
+            profiler.write(args.profile, args.profile_format)
+        except OSError:
+            return Error.OUT_FILE.value
+    if checkpoint != None and checkpoint.error != None:
+        stderr.write("Warning: checkpoint not written: " + str(checkpoint.error) + "\n")
+        stderr.flush()
+    return result.exit_code
+
+# Run program with every input of --input-dir or --input-manifest
+def execute_inputs(args: object, interpreter: Interpreter, source_stream, stderr) -> int:
+    try:
+        if args.input_dir != None:
+            inputs = input_set.inputs_from_directory(args.input_dir)
+        else:
+            inputs = input_set.inputs_from_manifest(args.input_manifest)
+    except (OSError, ValueError, KeyError):
+        return Error.IN_FILE.value
+    source = args.source if args.source != 'STDIN' else source_stream
+    return input_set.run_inputs(args, interpreter, source, inputs, stderr)
+
+def main() -> None:
+    parser = create_parser()
+    args = parser.parse_args()
+    check_args(parser, args)
+
+    interpreter = create_interpreter(args)
+    sys.exit(execute(args, interpreter, sys.stdin.buffer, StdinInput(), sys.stdout, sys.stderr))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+## @file interpret_args.py
+# @brief Command line arguments of interpret, shared by interpret.py and
+# client.py, so it must not import modules of the interpret itself
+# @author Marián Tarageľ
+
+from argparse import RawDescriptionHelpFormatter
+from my_arg_parse import Myargparse
+from stack import DEFAULT_MAX_DEPTH
+from output import DEFAULT_BUFFER_SIZE
+
+def create_parser() -> Myargparse:
+    parser = Myargparse(formatter_class=RawDescriptionHelpFormatter, description="""
+Skript načíta XML reprezentáciu programu a tento program s využitím vstupu
+podľa parametrov príkazového riadku interpretuje a generuje výstup.""", add_help=False)
+    parser.add_argument('--source', metavar='FILE', dest='source', default='STDIN',
+    help="vstupný súbor s XML reprezentaciou zdrojového kódu")
+    parser.add_argument('--source-format', dest='source_format', choices=['xml', 'ippcode'],
+    default='xml',
+    help="formát zdrojového súboru, xml je výstup parse.php a ippcode priamo zdrojový kód v IPPcode23")
+    parser.add_argument('--input', metavar='FILE', dest='input', default='STDIN',
+    help="soubor se vstupmi pre samotnú interpretáciu zadaného zdrojového kódu")
+    parser.add_argument('--input-dir', metavar='DIR', dest='input_dir',
+    help="vykoná program raz s každým súborom v adresári ako vstupom, vyžaduje --output-dir")
+    parser.add_argument('--input-manifest', metavar='FILE', dest='input_manifest',
+    help="vykoná program s každým vstupom zo súboru s jedným JSON objektom na riadok, vyžaduje --output-dir")
+    parser.add_argument('--output-dir', metavar='DIR', dest='output_dir',
+    help="adresár pre výstup, chybový výstup a návratový kód každého vstupu a súhrn summary.json")
+    parser.add_argument('--jobs', metavar='N', dest='jobs', type=int, default=1,
+    help="počet paralelne bežiacich procesov pri --input-dir a --input-manifest")
+    parser.add_argument('--max-depth', metavar='N', dest='max_depth', type=int,
+    default=DEFAULT_MAX_DEPTH,
+    help="maximálna hĺbka zásobníka rámcov, volaní a dátového zásobníka")
+    parser.add_argument('--max-call-depth', metavar='N', dest='max_call_depth', type=int,
+    help="maximálna hĺbka zásobníka volaní, predvolene hodnota --max-depth")
+    parser.add_argument('--max-data-depth', metavar='N', dest='max_data_depth', type=int,
+    help="maximálna hĺbka dátového zásobníka, predvolene hodnota --max-depth")
+    parser.add_argument('--max-instructions', metavar='N', dest='max_instructions', type=int,
+    help="maximálny počet vykonaných inštrukcií")
+    parser.add_argument('--time-limit', metavar='SEC', dest='time_limit', type=float,
+    help="maximálny čas behu programu v sekundách")
+    parser.add_argument('--max-string-size', metavar='N', dest='max_string_size', type=int,
+    help="maximálny celkový počet znakov reťazcov uložených v rámcoch")
+    parser.add_argument('--buffer-size', metavar='N', dest='buffer_size', type=int,
+    default=DEFAULT_BUFFER_SIZE,
+    help="počet znakov výstupu, po ktorom sa vyprázdni buffer")
+    parser.add_argument('--unbuffered', action='store_true',
+    help="zapisuje výstup okamžite po každej inštrukcii WRITE a DPRINT")
+    parser.add_argument('--cache-dir', metavar='DIR', dest='cache_dir',
+    help="adresár s cache načítaných programov")
+    parser.add_argument('--cache-size', metavar='N', dest='cache_size', type=int,
+    help="maximálna veľkosť cache v bajtoch, najdlhšie nepoužité programy sa mažú")
+    parser.add_argument('--no-cache', action='store_true',
+    help="načíta program vždy z XML a neukladá ho do cache")
+    parser.add_argument('--opt-level', metavar='N', dest='opt_level', type=int, default=0,
+    help="úroveň optimalizácie programu, 0 vypne optimalizácie, 1 vypočíta konštanty, odstráni nedosiahnuteľný kód a spája časté dvojice inštrukcií a 2 navyše vynechá typové kontroly odvodené staticky")
+    parser.add_argument('--engine', dest='engine', choices=['loop', 'block', 'vector'], default='loop',
+    help="spôsob vykonávania, loop interpretuje inštrukcie po jednej, block preloží základné bloky do funkcií jazyka Python a vector vykoná program so vstupmi --input-dir naraz pomocou NumPy")
+    parser.add_argument('--profile', metavar='FILE', dest='profile',
+    help="zapíše do súboru počty a časy vykonania inštrukcií, návestí a volaní")
+    parser.add_argument('--profile-format', dest='profile_format', choices=['json', 'collapsed'],
+    default='json',
+    help="formát profilu, json alebo collapsed pre nástroje na flame graph")
+    parser.add_argument('--checkpoint', metavar='FILE', dest='checkpoint',
+    help="ukladá stav bežiaceho programu do súboru pri signáli SIGUSR1 alebo podľa --checkpoint-every")
+    parser.add_argument('--checkpoint-every', metavar='N', dest='checkpoint_every', type=int,
+    help="uloží stav programu vždy po vykonaní aspoň N inštrukcií")
+    parser.add_argument('--resume', metavar='FILE', dest='resume',
+    help="pokračuje v behu programu zo stavu uloženého v súbore, --source sa nepoužije")
+    parser.add_argument('-h', '--help', action='store_true', help='show this help message and exit')
+    return parser
+
+# Check combinations of parsed arguments, exits on error or --help
+def check_args(parser: Myargparse, args: object) -> None:
+    parser.check_args_cobination(args)
+    parser.if_defined_print_help(args)
+    parser.check_no_arguments(args)
+    check_combinations(parser, args)
+
+# Check arguments which cannot be used together, the server checks
+# requests of clients by it too
+def check_combinations(parser: Myargparse, args: object) -> None:
+    if args.checkpoint_every != None and args.checkpoint == None:
+        parser.error('--checkpoint-every requires --checkpoint')
+    if args.input_dir != None or args.input_manifest != None:
+        if args.input_dir != None and args.input_manifest != None:
+            parser.error('cannot combine --input-dir with --input-manifest')
+        if args.input != 'STDIN' or args.resume != None or args.checkpoint != None or args.profile != None:
+            parser.error('--input-dir and --input-manifest cannot be combined with --input, --resume, --checkpoint or --profile')
+        if args.output_dir == None:
+            parser.error('--input-dir and --input-manifest require --output-dir')
@@ -2,11 +2,13 @@
 # @brief Helpful tools of interpret
 # @author Marián Tarageľ
 
+import re
+
 def convert(type, value):
     match type:
         case 'int':
             try:
-                value = int(value.strip())
+                value = int(value)
             except ValueError:
                 value = None
         case 'bool':
@@ -20,6 +22,26 @@ def convert(type, value):
             value = value.strip()
     return value
 
+# Value of input line read by READ, lines come without line ending, so
+# empty line is false for bool like any other text than true, empty
+# literal stays invalid in convert
+def convert_input(type, value):
+    if type == 'bool' and value == '':
+        return False
+    return convert(type, value)
+
+# Text representation of value printed by WRITE and DPRINT
+def to_output(value, type: str) -> str:
+    match type:
+        case 'string':
+            return value
+        case 'int':
+            return str(value)
+        case 'bool':
+            return 'true' if value else 'false'
+        case _:
+            return ''
+
 # Return variable frame and names
 def get_var_frame_and_name(var: str) -> tuple[str, str]:
     arg = var.split("@")
@@ -27,4 +49,11 @@ def get_var_frame_and_name(var: str) -> tuple[str, str]:
 
 # Replace escape sequnce
 def replace(match):
-    return int(match.group(1)).to_bytes(1, byteorder="big")
\ No newline at end of file
+    return int(match.group(1)).to_bytes(1, byteorder="big")
+
+# Decode all escape sequences of string literal
+def decode_escapes(value: str) -> str:
+    if '\\' not in value:
+        return value
+    bytes = re.sub(b'\\\\(\d{3})', replace, value.encode('utf-8'))
+    return bytes.decode('utf-8')
\ No newline at end of file
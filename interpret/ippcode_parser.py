@@ -0,0 +1,115 @@
+## @file ippcode_parser.py
+# @brief Parser of IPPcode23 source code, it checks the same lexical and
+# syntactic rules as parse.php and builds instructions without XML
+# @author Marián Tarageľ
+
+import re
+from error import Error
+from instruction import Instruction
+import xml_tree
+import opcodes
+
+HEADER = '.IPPCODE23'
+
+# Whitespace of PCRE in parse.php, it is ASCII only
+WHITESPACE = re.compile('[ \t\n\r\f\v]+')
+COMMENT = re.compile('#.*')
+TRIMMED = ' \t\n\r\0\x0b'
+
+TYPE_REGEX = re.compile(r'^(int|string|bool)$')
+VAR_REGEX = re.compile(r'^(GF|LF|TF)@([a-zA-Z]|(_|-|\$|&|%|\*|!|\?))([a-zA-Z0-9]|(_|-|\$|&|%|\*|!|\?))*$')
+LABEL_REGEX = re.compile(r'^([a-zA-Z]|(_|-|\$|&|%|\*|!|\?))([a-zA-Z0-9]|(_|-|\$|&|%|\*|!|\?))*$')
+NIL_REGEX = re.compile(r'^nil@nil$')
+LIT_BOOL_REGEX = re.compile(r'^bool@(true|false)$')
+LIT_STRING_REGEX = re.compile(r'^string@([^#\s\\]*(\\[0-9][0-9][0-9])*)*$', re.ASCII)
+LIT_INT_REGEXES = [re.compile(r'^int@(-|\+)?\d+$', re.ASCII),
+                   re.compile(r'^int@0[xX][\da-fA-F]+$', re.ASCII),
+                   re.compile(r'^int@0[oO][0-7]+$')]
+
+# Kinds of arguments of instructions, the same as in parse.php
+SYNTAX = opcodes.KINDS
+
+def is_symb(token: str) -> bool:
+    return (VAR_REGEX.match(token) != None or NIL_REGEX.match(token) != None or
+            LIT_BOOL_REGEX.match(token) != None or LIT_STRING_REGEX.match(token) != None or
+            any(regex.match(token) != None for regex in LIT_INT_REGEXES))
+
+def is_kind(token: str, kind: str) -> bool:
+    match kind:
+        case 'var': return VAR_REGEX.match(token) != None
+        case 'label': return LABEL_REGEX.match(token) != None
+        case 'type': return TYPE_REGEX.match(token) != None
+        case 'symb': return is_symb(token)
+
+# Type and text of argument as parse.php writes them to XML
+def get_type_and_value(token: str) -> tuple:
+    if VAR_REGEX.match(token) != None:
+        return 'var', token
+    elif TYPE_REGEX.match(token) != None:
+        return 'type', token
+    elif LABEL_REGEX.match(token) != None:
+        return 'label', token
+    type, value = token.split('@', 1)
+    return type, value
+
+# Lines of source without line ends, source is path or binary stream
+def read_lines(source):
+    if isinstance(source, str):
+        with open(source, 'rb') as file:
+            yield from read_lines(file)
+        return
+    for line in source:
+        try:
+            yield line.decode('utf-8').rstrip('\n')
+        except UnicodeDecodeError:
+            Error.handle_error(Error.SOURCE_SYNTAX.value)
+
+# First line which is not empty or comment must be the header
+def parse_header(lines) -> None:
+    for line in lines:
+        header = COMMENT.sub('', WHITESPACE.sub('', line))
+        if len(header) > 0:
+            if header.upper() == HEADER:
+                return
+            Error.handle_error(Error.SOURCE_HEADER.value)
+    Error.handle_error(Error.SOURCE_HEADER.value)
+
+# One line of source code transformed to tokens, opcode is upper case
+def scan(line: str) -> list:
+    line = COMMENT.sub('', line).strip(TRIMMED)
+    if len(line) == 0:
+        return []
+    tokens = WHITESPACE.sub(' ', line).split(' ')
+    tokens[0] = tokens[0].upper()
+    return tokens
+
+def check_syntax(tokens: list) -> None:
+    kinds = SYNTAX.get(tokens[0])
+    if kinds == None:
+        Error.handle_error(Error.SOURCE_OPCODE.value)
+    if len(tokens) != len(kinds) + 1:
+        Error.handle_error(Error.SOURCE_SYNTAX.value)
+    for token, kind in zip(tokens[1:], kinds):
+        if not is_kind(token, kind):
+            Error.handle_error(Error.SOURCE_SYNTAX.value)
+
+# Parse source and yield instructions in order of their lines
+def parse_program(source):
+    lines = read_lines(source)
+    parse_header(lines)
+    order = 1
+    for line in lines:
+        tokens = scan(line)
+        if tokens == []:
+            continue
+        check_syntax(tokens)
+
+        instruction = Instruction(tokens[0], order)
+        arguments = [None, None, None]
+        for position, token in enumerate(tokens[1:]):
+            argument = xml_tree.convert_argument(*get_type_and_value(token))
+            argument.position = position
+            arguments[position] = argument
+        instruction.add_args(*arguments)
+        order += 1
+        yield instruction
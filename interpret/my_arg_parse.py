@@ -10,7 +10,8 @@ class Myargparse(argparse.ArgumentParser):
 
     @staticmethod
     def is_input_defined(args: object) -> bool:
-        if args.source != 'STDIN' or args.input != 'STDIN':
+        if (args.source != 'STDIN' or args.input != 'STDIN' or args.resume != None or
+                args.input_dir != None or args.input_manifest != None):
             return True
         else:
             return False
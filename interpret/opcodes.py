@@ -0,0 +1,106 @@
+## @file opcodes.py
+# @brief Integer opcodes and signatures of IPPcode23 instructions
+# @author Marián Tarageľ
+
+# Type of variable written by instruction, COPY is type of the copied
+# symbol and UNKNOWN type known only at runtime
+UNKNOWN = '?'
+COPY = '!'
+
+# Operand kinds and result type of every instruction in order of opcodes,
+# None is result of instruction which writes no variable
+SIGNATURES = [
+    ('MOVE', ('var', 'symb'), COPY),
+    ('CREATEFRAME', (), None),
+    ('PUSHFRAME', (), None),
+    ('POPFRAME', (), None),
+    ('DEFVAR', ('var',), ''),
+    ('CALL', ('label',), None),
+    ('RETURN', (), None),
+    ('PUSHS', ('symb',), None),
+    ('POPS', ('var',), UNKNOWN),
+    ('ADD', ('var', 'symb', 'symb'), 'int'),
+    ('SUB', ('var', 'symb', 'symb'), 'int'),
+    ('MUL', ('var', 'symb', 'symb'), 'int'),
+    ('IDIV', ('var', 'symb', 'symb'), 'int'),
+    ('LT', ('var', 'symb', 'symb'), 'bool'),
+    ('GT', ('var', 'symb', 'symb'), 'bool'),
+    ('EQ', ('var', 'symb', 'symb'), 'bool'),
+    ('AND', ('var', 'symb', 'symb'), 'bool'),
+    ('OR', ('var', 'symb', 'symb'), 'bool'),
+    ('NOT', ('var', 'symb'), 'bool'),
+    ('INT2CHAR', ('var', 'symb'), 'string'),
+    ('STRI2INT', ('var', 'symb', 'symb'), 'int'),
+    ('READ', ('var', 'type'), UNKNOWN),
+    ('WRITE', ('symb',), None),
+    ('CONCAT', ('var', 'symb', 'symb'), 'string'),
+    ('STRLEN', ('var', 'symb'), 'int'),
+    ('GETCHAR', ('var', 'symb', 'symb'), 'string'),
+    ('SETCHAR', ('var', 'symb', 'symb'), 'string'),
+    ('TYPE', ('var', 'symb'), 'string'),
+    ('LABEL', ('label',), None),
+    ('JUMP', ('label',), None),
+    ('JUMPIFEQ', ('label', 'symb', 'symb'), None),
+    ('JUMPIFNEQ', ('label', 'symb', 'symb'), None),
+    ('EXIT', ('symb',), None),
+    ('DPRINT', ('symb',), None),
+    ('BREAK', (), None),
+    ('CLEARS', (), None),
+    ('ADDS', (), None),
+    ('SUBS', (), None),
+    ('MULS', (), None),
+    ('IDIVS', (), None),
+    ('LTS', (), None),
+    ('GTS', (), None),
+    ('EQS', (), None),
+    ('ANDS', (), None),
+    ('ORS', (), None),
+    ('NOTS', (), None),
+    ('INT2CHARS', (), None),
+    ('STRI2INTS', (), None),
+    ('JUMPIFEQS', ('label',), None),
+    ('JUMPIFNEQS', ('label',), None)]
+
+NAMES = [name for name, kinds, result in SIGNATURES]
+KINDS = {name: kinds for name, kinds, result in SIGNATURES}
+ARITIES = [len(kinds) for name, kinds, result in SIGNATURES]
+RESULTS = [result for name, kinds, result in SIGNATURES]
+
+(MOVE, CREATEFRAME, PUSHFRAME, POPFRAME, DEFVAR,
+ CALL, RETURN, PUSHS, POPS, ADD, SUB, MUL,
+ IDIV, LT, GT, EQ, AND, OR, NOT, INT2CHAR,
+ STRI2INT, READ, WRITE, CONCAT, STRLEN,
+ GETCHAR, SETCHAR, TYPE, LABEL, JUMP, JUMPIFEQ,
+ JUMPIFNEQ, EXIT, DPRINT, BREAK,
+ CLEARS, ADDS, SUBS, MULS, IDIVS, LTS, GTS, EQS,
+ ANDS, ORS, NOTS, INT2CHARS, STRI2INTS, JUMPIFEQS, JUMPIFNEQS) = range(len(NAMES))
+
+CODES = {name: code for code, name in enumerate(NAMES)}
+
+# Operand count of these is not checked, their handlers only use the
+# first operand if any and ignore the others
+UNCHECKED_ARITY = {CREATEFRAME, PUSHFRAME, POPFRAME, CALL, RETURN, LABEL, JUMP}
+
+# Internal ops created by optimizer, they never come from XML
+INTERNAL_NAMES = ['LT_JUMPIF', 'GT_JUMPIF', 'EQ_JUMPIF', 'DEFVAR_MOVE',
+                  'PUSHS_POPS', 'ADD_INT', 'SUB_INT']
+
+(LT_JUMPIF, GT_JUMPIF, EQ_JUMPIF, DEFVAR_MOVE,
+ PUSHS_POPS, ADD_INT, SUB_INT) = range(len(NAMES), len(NAMES) + len(INTERNAL_NAMES))
+
+# Variants of ops with operand types proven by inference, they skip type checks
+TYPED_NAMES = ['ADD_TYPED', 'SUB_TYPED', 'MUL_TYPED', 'IDIV_TYPED', 'LT_TYPED',
+               'GT_TYPED', 'EQ_TYPED', 'AND_TYPED', 'OR_TYPED', 'NOT_TYPED',
+               'CONCAT_TYPED', 'STRLEN_TYPED', 'ADD_INT_TYPED', 'SUB_INT_TYPED',
+               'LT_JUMPIF_TYPED', 'GT_JUMPIF_TYPED', 'EQ_JUMPIF_TYPED']
+
+(ADD_TYPED, SUB_TYPED, MUL_TYPED, IDIV_TYPED, LT_TYPED,
+ GT_TYPED, EQ_TYPED, AND_TYPED, OR_TYPED, NOT_TYPED,
+ CONCAT_TYPED, STRLEN_TYPED, ADD_INT_TYPED, SUB_INT_TYPED,
+ LT_JUMPIF_TYPED, GT_JUMPIF_TYPED, EQ_JUMPIF_TYPED) = range(
+    len(NAMES) + len(INTERNAL_NAMES), len(NAMES) + len(INTERNAL_NAMES) + len(TYPED_NAMES))
+
+# Instruction with wrong number of operands, it fails only when executed
+INVALID = len(NAMES) + len(INTERNAL_NAMES) + len(TYPED_NAMES)
+
+CODE_COUNT = INVALID + 1
@@ -0,0 +1,225 @@
+## @file optimizer.py
+# @brief Optimization passes over compiled ops
+# @author Marián Tarageľ
+
+import opcodes
+import compiler
+import inference
+from compiler import Op, Operand
+
+# Fused op keeps order of its first instruction and opcode name of the
+# last one, so BREAK reports the same last instruction
+def fuse(code: int, first: Op, last: Op, args: list) -> Op:
+    return Op(code, last.opcode, first.order, args, first.index)
+
+def is_same_var(operand_1: Operand, operand_2: Operand) -> bool:
+    return (operand_1.type == 'var' and operand_2.type == 'var' and
+            operand_1.frame == operand_2.frame and operand_1.name == operand_2.name)
+
+# LT/GT/EQ into temporary followed by JUMPIFEQ/JUMPIFNEQ comparing it
+# with bool constant, args are var, symb, symb, label and the result
+# value on which the jump is taken
+def fuse_compare_jump(op: Op, next_op: Op) -> Op:
+    codes = {opcodes.LT: opcodes.LT_JUMPIF, opcodes.GT: opcodes.GT_JUMPIF,
+             opcodes.EQ: opcodes.EQ_JUMPIF}
+    if op.code not in codes or next_op.code not in (opcodes.JUMPIFEQ, opcodes.JUMPIFNEQ):
+        return None
+    label, symb_1, symb_2 = next_op.args
+    if is_same_var(op.args[0], symb_1) and symb_2.type == 'bool':
+        constant = symb_2
+    elif is_same_var(op.args[0], symb_2) and symb_1.type == 'bool':
+        constant = symb_1
+    else:
+        return None
+    jump_on = constant.value if next_op.code == opcodes.JUMPIFEQ else not constant.value
+    return fuse(codes[op.code], op, next_op, op.args + [label, Operand('bool', jump_on)])
+
+# DEFVAR directly followed by MOVE to the same variable
+def fuse_defvar_move(op: Op, next_op: Op) -> Op:
+    if (op.code != opcodes.DEFVAR or next_op.code != opcodes.MOVE or
+        not is_same_var(op.args[0], next_op.args[0])):
+        return None
+    return fuse(opcodes.DEFVAR_MOVE, op, next_op, next_op.args)
+
+# PUSHS directly followed by POPS, args are target var and pushed symb
+def fuse_pushs_pops(op: Op, next_op: Op) -> Op:
+    if (op.code != opcodes.PUSHS or next_op.code != opcodes.POPS or
+        next_op.args[0].type != 'var'):
+        return None
+    return fuse(opcodes.PUSHS_POPS, op, next_op, [next_op.args[0], op.args[0]])
+
+# ADD/SUB of variable and int constant, args are var, var and constant
+def specialize_add_sub(op: Op) -> Op:
+    if op.code not in (opcodes.ADD, opcodes.SUB):
+        return None
+    var, symb_1, symb_2 = op.args
+    if symb_1.type == 'var' and symb_2.type == 'int':
+        args = [var, symb_1, symb_2]
+    elif op.code == opcodes.ADD and symb_1.type == 'int' and symb_2.type == 'var':
+        args = [var, symb_2, symb_1]
+    else:
+        return None
+    code = opcodes.ADD_INT if op.code == opcodes.ADD else opcodes.SUB_INT
+    return Op(code, op.opcode, op.order, args, op.index)
+
+# Ops folded into MOVE of computed value
+FOLDABLE = {
+    opcodes.MOVE, opcodes.ADD, opcodes.SUB, opcodes.MUL, opcodes.IDIV,
+    opcodes.LT, opcodes.GT, opcodes.EQ, opcodes.AND, opcodes.OR,
+    opcodes.NOT, opcodes.INT2CHAR, opcodes.STRI2INT, opcodes.CONCAT,
+    opcodes.STRLEN, opcodes.GETCHAR, opcodes.SETCHAR, opcodes.TYPE}
+
+CONSTANT_TYPES = {'int': int, 'string': str, 'bool': bool}
+
+# Value and type of operand known at load time, None if it is not known
+def constant_of(operand: Operand, known: dict):
+    if operand.type == 'var':
+        return known.get((operand.frame, operand.name))
+    if operand.type == 'nil' and operand.value == 'nil':
+        return operand.value, operand.type
+    if operand.type in CONSTANT_TYPES and type(operand.value) == CONSTANT_TYPES[operand.type]:
+        return operand.value, operand.type
+    return None
+
+# Result of op computed the same way as its handler, None if the op
+# would fail at runtime, so the failing op stays in program
+def evaluate(code: int, operands: list):
+    values = [value for value, type in operands]
+    types = [type for value, type in operands]
+    match code:
+        case opcodes.MOVE:
+            return operands[0]
+        case opcodes.ADD | opcodes.SUB | opcodes.MUL | opcodes.IDIV:
+            if types != ['int', 'int'] or (code == opcodes.IDIV and values[1] == 0):
+                return None
+            match code:
+                case opcodes.ADD: return values[0] + values[1], 'int'
+                case opcodes.SUB: return values[0] - values[1], 'int'
+                case opcodes.MUL: return values[0] * values[1], 'int'
+                case opcodes.IDIV: return values[0] // values[1], 'int'
+        case opcodes.LT | opcodes.GT | opcodes.EQ:
+            if types[0] == 'nil' or types[1] == 'nil':
+                if code != opcodes.EQ:
+                    return None
+            elif types[0] != types[1]:
+                return None
+            match code:
+                case opcodes.LT: return values[0] < values[1], 'bool'
+                case opcodes.GT: return values[0] > values[1], 'bool'
+                case opcodes.EQ: return values[0] == values[1], 'bool'
+        case opcodes.AND | opcodes.OR:
+            if types != ['bool', 'bool']:
+                return None
+            if code == opcodes.AND:
+                return values[0] and values[1], 'bool'
+            return values[0] or values[1], 'bool'
+        case opcodes.NOT:
+            return (not values[0], 'bool') if types == ['bool'] else None
+        case opcodes.INT2CHAR:
+            if types != ['int'] or not 0 <= values[0] <= 0x10FFFF:
+                return None
+            return chr(values[0]), 'string'
+        case opcodes.STRI2INT | opcodes.GETCHAR:
+            if types != ['string', 'int'] or not 0 <= values[1] < len(values[0]):
+                return None
+            if code == opcodes.STRI2INT:
+                return ord(values[0][values[1]]), 'int'
+            return values[0][values[1]], 'string'
+        case opcodes.CONCAT:
+            return (values[0] + values[1], 'string') if types == ['string', 'string'] else None
+        case opcodes.STRLEN:
+            return (len(values[0]), 'int') if types == ['string'] else None
+        case opcodes.SETCHAR:
+            string, index, char = values
+            if (types != ['string', 'int', 'string'] or not 0 <= index < len(string) or
+                char == ''):
+                return None
+            return string[:index] + char[0] + string[index + 1:], 'string'
+        case opcodes.TYPE:
+            return types[0], 'string'
+    return None
+
+# Fold ops with operands known at load time into MOVE, values of variables
+# are known only until the end of basic block, LF and TF also until frame
+# instructions, fold keeps number and positions of ops. CONCAT is not
+# replaced, its handler checks --max-string-size of the run, which the
+# cached program does not know, only its result is known to next ops
+def fold_constants(ops: list) -> list:
+    folded = []
+    known = {}
+    for op in ops:
+        match op.code:
+            case opcodes.LABEL | opcodes.CALL:
+                known = {}
+            case opcodes.CREATEFRAME:
+                known = {key: value for key, value in known.items() if key[0] != 'TF'}
+            case opcodes.PUSHFRAME | opcodes.POPFRAME:
+                known = {key: value for key, value in known.items() if key[0] == 'GF'}
+
+        result = None
+        if (op.code in FOLDABLE and op.args[0].type == 'var' and op.args[0].frame in ('GF', 'LF', 'TF')):
+            sources = op.args if op.code == opcodes.SETCHAR else op.args[1:]
+            operands = [constant_of(operand, known) for operand in sources]
+            if None not in operands:
+                result = evaluate(op.code, operands)
+        if result != None and op.code != opcodes.CONCAT:
+            value, type = result
+            op = Op(opcodes.MOVE, op.opcode, op.order, [op.args[0], Operand(type, value)], op.index)
+
+        if op.code in inference.RESULT_TYPES and op.args[0].type == 'var':
+            key = (op.args[0].frame, op.args[0].name)
+            if result != None:
+                known[key] = result
+            else:
+                known.pop(key, None)
+        folded.append(op)
+    return folded
+
+# Drop ops that no path from the first op reaches, CALL continues after
+# return and jumps use label map of program, kept ops keep their index,
+# so BREAK reports return addresses of the loaded program
+def remove_unreachable(ops: list, labels: dict) -> list:
+    reachable = [False] * len(ops)
+    worklist = [0]
+    while worklist != []:
+        position = worklist.pop()
+        while position < len(ops) and not reachable[position]:
+            reachable[position] = True
+            op = ops[position]
+            for operand in op.args:
+                if operand.type == 'label' and operand.value in labels:
+                    worklist.append(labels[operand.value])
+            if op.code in (opcodes.JUMP, opcodes.RETURN, opcodes.EXIT):
+                break
+            position += 1
+    return [op for op, is_reachable in zip(ops, reachable) if is_reachable]
+
+# Replace instruction sequences by fused ops, a LABEL is an op too, so
+# no sequence spans a jump target and jumps stay valid after relinking
+def peephole(ops: list) -> list:
+    optimized = []
+    position = 0
+    while position < len(ops):
+        op = ops[position]
+        if position + 1 < len(ops):
+            next_op = ops[position + 1]
+            fused = (fuse_compare_jump(op, next_op) or fuse_defvar_move(op, next_op) or
+                     fuse_pushs_pops(op, next_op))
+            if fused != None:
+                optimized.append(fused)
+                position += 2
+                continue
+        optimized.append(specialize_add_sub(op) or op)
+        position += 1
+    return optimized
+
+# Optimize compiled program in place, level 0 leaves it as it is, level 1
+# folds constants, drops unreachable code and fuses instructions and level 2 also uses types proven by inference
+def optimize(program: object, level: int) -> None:
+    if level >= 1:
+        program.ops = fold_constants(program.ops)
+        program.ops = remove_unreachable(program.ops, program.labels)
+        program.ops = peephole(program.ops)
+    program.labels = compiler.link(program.ops)
+    if level >= 2:
+        inference.specialize(program.ops, len(program.global_names))
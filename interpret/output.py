@@ -0,0 +1,52 @@
+## @file output.py
+# @brief Buffered output channel for WRITE and DPRINT
+# @author Marián Tarageľ
+
+import weakref
+
+DEFAULT_BUFFER_SIZE = 65536
+
+# Collects written text and passes it encoded to underlying stream
+# once the threshold is reached, threshold 0 makes it unbuffered
+class Output:
+
+    stream: object
+    parts: list
+    size: int
+    threshold: int
+
+    opened = weakref.WeakSet()
+
+    def __init__(self, stream, threshold: int = DEFAULT_BUFFER_SIZE):
+        self.stream = stream
+        self.parts = []
+        self.size = 0
+        self.threshold = threshold
+        Output.opened.add(self)
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.threshold:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.parts == []:
+            return
+        text = ''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        buffer = getattr(self.stream, 'buffer', None)
+        if buffer != None:
+            self.stream.flush()
+            buffer.write(text.encode('utf-8'))
+            buffer.flush()
+        else:
+            self.stream.write(text)
+            self.stream.flush()
+
+    # Flush every output still in use, called on error paths
+    @staticmethod
+    def flush_all() -> None:
+        for output in list(Output.opened):
+            output.flush()
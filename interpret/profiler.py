@@ -0,0 +1,114 @@
+## @file profiler.py
+# @brief Execution profile of interpreted program
+# @author Marián Tarageľ
+
+import json
+import opcodes
+
+# Name of code outside of any called label
+MAIN = '<main>'
+
+# Counts and cumulative wall times in nanoseconds collected by
+# instrumented run loop of Program, a block is named by label it starts
+# with, code before first label is block of MAIN
+class Profiler:
+
+    opcodes: dict
+    orders: dict
+    blocks: dict
+    calls: dict
+    stacks: dict
+    call_stack: list
+    active: dict
+    stack_key: str
+    total_time: int
+    frames: dict
+
+    def __init__(self):
+        self.opcodes = {}
+        self.orders = {}
+        self.blocks = {MAIN: [1, 0]}
+        self.calls = {}
+        self.stacks = {}
+        self.call_stack = []
+        self.active = {}
+        self.stack_key = MAIN
+        self.total_time = 0
+        self.frames = None
+
+    # One executed op, LABEL is counted only as entry of its block
+    def record(self, op: object, elapsed: int, block: str) -> None:
+        self.total_time += elapsed
+        self.blocks[block][1] += elapsed
+        self.stacks[self.stack_key] = self.stacks.get(self.stack_key, 0) + elapsed
+        if op.code == opcodes.LABEL:
+            return
+        stats = self.opcodes.get(op.opcode)
+        if stats == None:
+            stats = self.opcodes[op.opcode] = [0, 0]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats = self.orders.get(op.order)
+        if stats == None:
+            stats = self.orders[op.order] = [op.opcode, 0, 0]
+        stats[1] += 1
+        stats[2] += elapsed
+
+    def enter_block(self, block: str) -> None:
+        if block not in self.blocks:
+            self.blocks[block] = [0, 0]
+        self.blocks[block][0] += 1
+
+    # CALL of target made from block, inclusive time is sum of times of
+    # ops executed until return, recursive calls count only the outermost
+    def enter_call(self, target: str, block: str) -> None:
+        stats = self.calls.get(target)
+        if stats == None:
+            stats = self.calls[target] = [0, 0]
+        stats[0] += 1
+        self.active[target] = self.active.get(target, 0) + 1
+        self.call_stack.append((target, block, self.total_time, self.stack_key))
+        self.stack_key = self.stack_key + ';' + target
+
+    # RETURN from the last call, returns block of caller, calls made
+    # before resume from checkpoint are not known
+    def leave_call(self) -> str:
+        if self.call_stack == []:
+            return MAIN
+        target, block, start, self.stack_key = self.call_stack.pop()
+        self.active[target] -= 1
+        if self.active[target] == 0:
+            self.calls[target][1] += self.total_time - start
+        return block
+
+    # Close calls which did not return because program ended inside them
+    def finish(self) -> None:
+        while self.call_stack != []:
+            self.leave_call()
+
+    def to_json(self) -> dict:
+        return {
+            'total_time_ns': self.total_time,
+            'opcodes': {name: {'count': count, 'time_ns': time}
+                        for name, (count, time) in self.opcodes.items()},
+            'orders': [{'order': order, 'opcode': opcode, 'count': count, 'time_ns': time}
+                       for order, (opcode, count, time) in sorted(self.orders.items())],
+            'blocks': {block: {'count': count, 'time_ns': time}
+                       for block, (count, time) in self.blocks.items()},
+            'calls': {target: {'count': count, 'inclusive_time_ns': time}
+                      for target, (count, time) in self.calls.items()},
+            'frames': self.frames}
+
+    # Collapsed stacks of called labels with self time in nanoseconds,
+    # format of flamegraph.pl and speedscope
+    def to_collapsed(self) -> str:
+        return ''.join(stack + ' ' + str(time) + '\n'
+                       for stack, time in sorted(self.stacks.items()))
+
+    def write(self, path: str, format: str = 'json') -> None:
+        with open(path, 'w') as file:
+            if format == 'collapsed':
+                file.write(self.to_collapsed())
+            else:
+                json.dump(self.to_json(), file, indent=2)
+                file.write('\n')
@@ -2,77 +2,139 @@
 # @brief Program representation
 # @author Marián Tarageľ
 
-from error import Error
+from error import Error, InterpretExit
 from frames import Frames
-import re
+from stack import Stack, DEFAULT_MAX_DEPTH
+from output import Output
+from profiler import Profiler, MAIN
+from string_buffer import StringBuffer, MIN_LENGTH
+from optimizer import is_same_var
+from functools import partial
+import xml.etree.ElementTree as ET
 import xml_tree
+import ippcode_parser
 import interpret_tools as tool
+import compiler
+import transpiler
+import opcodes
 import sys
+import time
 
 class Program:
 
-    instructions: list
+    ops: list
+    dispatch: list
     position: int
     labels: dict
-    frames = Frames()
+    global_names: list
+    local_names: list
+    frames: Frames
     input
-    call_stack: list
-    data_stack: list
+    call_stack: Stack
+    data_stack: Stack
+    max_depth: int
+    stdout: Output
+    stderr: Output
     instructions_executed: int
     last_instruction: object
-
-    def __init__(self, input):
-        self.instructions = []
+    max_instructions: int
+    time_limit: float
+    deadline: float
+    max_string_size: int
+    next_string_check: int
+    profiler: Profiler
+    block_code: tuple
+    checkpoint: object
+    input_lines: int
+
+    def __init__(self, input, max_depth: int = DEFAULT_MAX_DEPTH,
+                 stdout: Output = None, stderr: Output = None):
+        self.ops = []
+        self.dispatch = []
         self.position = 0
         self.labels = {}
+        self.global_names = []
+        self.local_names = []
         self.input = input
-        self.call_stack = []
-        self.data_stack = []
+        self.max_depth = max_depth
+        self.call_stack = Stack("call stack", max_depth)
+        self.data_stack = Stack("data stack", max_depth)
+        self.stdout = stdout if stdout != None else Output(sys.stdout)
+        self.stderr = stderr if stderr != None else Output(sys.stderr)
         self.instructions_executed = 0
         self.last_instruction = None
+        self.max_instructions = None
+        self.time_limit = None
+        self.deadline = None
+        self.max_string_size = None
+        self.next_string_check = 0
+        self.profiler = None
+        self.block_code = None
+        self.checkpoint = None
+        self.input_lines = 0
 
     def add_instruction_to_program(self, instruction: object) -> None:
-        self.instructions.append(instruction)
+        self.ops.append(compiler.compile_instruction(instruction))
 
     def sort_instructions(self) -> None:
-        self.instructions.sort(key=lambda instruction: instruction.order)
-
-    def get_instruction(self):
-        if self.position < len(self.instructions):
-            return self.instructions[self.position]
-        else:
-            return None
-        
-    def get_program_from_xml(self, tree: object) -> None:
-        xml_tree.check_program_element(tree)
-        for child in tree:
-            instruction = xml_tree.check_element_instruction(child)
-
-            arg1 = None
-            arg2 = None
-            arg3 = None
-            for subchild in child:
-                argument = xml_tree.check_element_arg(subchild)
-                if argument.position == 0:
-                    if arg1 != None:
-                        Error.handle_error(Error.XML_STRUCT.value)
-                    arg1 = argument
-                elif argument.position == 1:
-                    if arg2 != None:
-                        Error.handle_error(Error.XML_STRUCT.value)
-                    arg2 = argument
-                else:
-                    if arg3 != None:
-                        Error.handle_error(Error.XML_STRUCT.value)
-                    arg3 = argument
+        self.ops.sort(key=lambda instruction: instruction.order)
 
-            instruction.add_args(arg1, arg2, arg3)
+    # Load program from XML file or stream, the first structure error is
+    # reported only after the whole XML is parsed, so malformed XML still
+    # takes precedence as with a complete tree
+    def get_program_from_xml(self, source) -> None:
+        try:
+            elements = xml_tree.iterparse_program(source)
+            error = self.catch_error(xml_tree.check_program_element, next(elements))
+            for child in elements:
+                if error == None:
+                    error = self.catch_error(self.get_instruction_from_xml, child)
+        except ET.ParseError:
+            Error.handle_error(Error.XML_FORMAT.value)
+        if error != None:
+            raise error
+
+    def get_program_from_ippcode(self, source) -> None:
+        for instruction in ippcode_parser.parse_program(source):
             self.add_instruction_to_program(instruction)
 
+    # Run check of element and return its error instead of exiting
+    @staticmethod
+    def catch_error(check, element: object):
+        try:
+            check(element)
+        except InterpretExit as error:
+            return error
+        return None
+
+    def get_instruction_from_xml(self, child: object) -> None:
+        instruction = xml_tree.check_element_instruction(child)
+
+        arg1 = None
+        arg2 = None
+        arg3 = None
+        for subchild in child:
+            argument = xml_tree.check_element_arg(subchild)
+            if argument.position == 0:
+                if arg1 != None:
+                    Error.handle_error(Error.XML_STRUCT.value)
+                arg1 = argument
+            elif argument.position == 1:
+                if arg2 != None:
+                    Error.handle_error(Error.XML_STRUCT.value)
+                arg2 = argument
+            else:
+                if arg3 != None:
+                    Error.handle_error(Error.XML_STRUCT.value)
+                arg3 = argument
+
+        instruction.add_args(arg1, arg2, arg3)
+        self.add_instruction_to_program(instruction)
+
     def prepocessing(self) -> None:
         self.sort_instructions()
         prev_order = -1
-        for instruction in self.instructions:
+        for instruction in self.ops:
             if prev_order == instruction.order:
                 Error.handle_error(Error.XML_STRUCT.value)
             self.if_label_add(instruction)
@@ -86,111 +148,327 @@ class Program:
                 self.labels[label_name] = self.position
             else:
                 Error.handle_error(Error.SEMANTIC.value)
-    
+
+    # Number and link sorted ops and assign variable slots
+    def compile(self) -> None:
+        compiler.number(self.ops)
+        self.labels = compiler.link(self.ops)
+        self.global_names, self.local_names = compiler.resolve_slots(self.ops)
+
+    # New program sharing compiled ops of this one, with fresh state
+    def clone(self, input, max_depth: int = DEFAULT_MAX_DEPTH,
+              stdout: Output = None, stderr: Output = None):
+        program = Program(input, max_depth, stdout, stderr)
+        program.ops = self.ops
+        program.labels = self.labels
+        program.global_names = self.global_names
+        program.local_names = self.local_names
+        program.block_code = self.block_code
+        program.bind()
+        return program
+
+    # Create frames and handlers for compiled ops
+    def bind(self) -> None:
+        self.frames = Frames(self.global_names, self.local_names, self.max_depth)
+        self.dispatch = self.build_dispatch_table()
+
+    def build_dispatch_table(self) -> list:
+        table = [None] * opcodes.CODE_COUNT
+        table[opcodes.MOVE] = self.interpret_move
+        table[opcodes.CREATEFRAME] = self.interpret_createframe
+        table[opcodes.PUSHFRAME] = self.interpret_pushframe
+        table[opcodes.POPFRAME] = self.interpret_popframe
+        table[opcodes.DEFVAR] = self.interpret_defvar
+        table[opcodes.CALL] = self.interpret_call
+        table[opcodes.RETURN] = self.interpret_return
+        table[opcodes.PUSHS] = self.interpret_pushs
+        table[opcodes.POPS] = self.interpret_pops
+        table[opcodes.ADD] = partial(self.interpret_add_sub_mul_idiv, mode='add')
+        table[opcodes.SUB] = partial(self.interpret_add_sub_mul_idiv, mode='sub')
+        table[opcodes.MUL] = partial(self.interpret_add_sub_mul_idiv, mode='mul')
+        table[opcodes.IDIV] = partial(self.interpret_add_sub_mul_idiv, mode='idiv')
+        table[opcodes.LT] = partial(self.interpret_ltgteq, mode='lt')
+        table[opcodes.GT] = partial(self.interpret_ltgteq, mode='gt')
+        table[opcodes.EQ] = partial(self.interpret_ltgteq, mode='eq')
+        table[opcodes.AND] = partial(self.interpret_andor, mode='and')
+        table[opcodes.OR] = partial(self.interpret_andor, mode='or')
+        table[opcodes.NOT] = self.interpret_not
+        table[opcodes.INT2CHAR] = self.interpret_int2char
+        table[opcodes.STRI2INT] = self.interpret_stri2int
+        table[opcodes.READ] = self.interpret_read
+        table[opcodes.WRITE] = partial(self.interpret_write_dprint, stream=self.stdout)
+        table[opcodes.CONCAT] = self.interpret_concat
+        table[opcodes.STRLEN] = self.interpret_strlen
+        table[opcodes.GETCHAR] = self.interpret_getchar
+        table[opcodes.SETCHAR] = self.interpret_setchar
+        table[opcodes.TYPE] = self.interpret_type
+        table[opcodes.LABEL] = self.interpret_label
+        table[opcodes.JUMP] = self.interpret_jump
+        table[opcodes.JUMPIFEQ] = partial(self.interpret_jumpif, mode='eq')
+        table[opcodes.JUMPIFNEQ] = partial(self.interpret_jumpif, mode='neq')
+        table[opcodes.EXIT] = self.interpret_exit
+        table[opcodes.DPRINT] = partial(self.interpret_write_dprint, stream=self.stderr)
+        table[opcodes.BREAK] = self.interpret_break
+        table[opcodes.CLEARS] = self.interpret_clears
+        table[opcodes.ADDS] = partial(self.interpret_arithmetic_stack, mode='add')
+        table[opcodes.SUBS] = partial(self.interpret_arithmetic_stack, mode='sub')
+        table[opcodes.MULS] = partial(self.interpret_arithmetic_stack, mode='mul')
+        table[opcodes.IDIVS] = partial(self.interpret_arithmetic_stack, mode='idiv')
+        table[opcodes.LTS] = partial(self.interpret_ltgteq_stack, mode='lt')
+        table[opcodes.GTS] = partial(self.interpret_ltgteq_stack, mode='gt')
+        table[opcodes.EQS] = partial(self.interpret_ltgteq_stack, mode='eq')
+        table[opcodes.ANDS] = partial(self.interpret_andor_stack, mode='and')
+        table[opcodes.ORS] = partial(self.interpret_andor_stack, mode='or')
+        table[opcodes.NOTS] = self.interpret_not_stack
+        table[opcodes.INT2CHARS] = self.interpret_int2char_stack
+        table[opcodes.STRI2INTS] = self.interpret_stri2int_stack
+        table[opcodes.JUMPIFEQS] = partial(self.interpret_jumpif_stack, mode='eq')
+        table[opcodes.JUMPIFNEQS] = partial(self.interpret_jumpif_stack, mode='neq')
+        table[opcodes.LT_JUMPIF] = partial(self.interpret_ltgteq_jumpif, mode='lt')
+        table[opcodes.GT_JUMPIF] = partial(self.interpret_ltgteq_jumpif, mode='gt')
+        table[opcodes.EQ_JUMPIF] = partial(self.interpret_ltgteq_jumpif, mode='eq')
+        table[opcodes.DEFVAR_MOVE] = self.interpret_defvar_move
+        table[opcodes.PUSHS_POPS] = self.interpret_pushs_pops
+        table[opcodes.ADD_INT] = partial(self.interpret_add_sub_int, mode='add')
+        table[opcodes.SUB_INT] = partial(self.interpret_add_sub_int, mode='sub')
+        table[opcodes.ADD_TYPED] = partial(self.interpret_arithmetic_typed, mode='add')
+        table[opcodes.SUB_TYPED] = partial(self.interpret_arithmetic_typed, mode='sub')
+        table[opcodes.MUL_TYPED] = partial(self.interpret_arithmetic_typed, mode='mul')
+        table[opcodes.IDIV_TYPED] = partial(self.interpret_arithmetic_typed, mode='idiv')
+        table[opcodes.ADD_INT_TYPED] = partial(self.interpret_arithmetic_typed, mode='add')
+        table[opcodes.SUB_INT_TYPED] = partial(self.interpret_arithmetic_typed, mode='sub')
+        table[opcodes.LT_TYPED] = partial(self.interpret_ltgteq_typed, mode='lt')
+        table[opcodes.GT_TYPED] = partial(self.interpret_ltgteq_typed, mode='gt')
+        table[opcodes.EQ_TYPED] = partial(self.interpret_ltgteq_typed, mode='eq')
+        table[opcodes.AND_TYPED] = partial(self.interpret_andor_typed, mode='and')
+        table[opcodes.OR_TYPED] = partial(self.interpret_andor_typed, mode='or')
+        table[opcodes.NOT_TYPED] = self.interpret_not_typed
+        table[opcodes.CONCAT_TYPED] = self.interpret_concat_typed
+        table[opcodes.STRLEN_TYPED] = self.interpret_strlen_typed
+        table[opcodes.LT_JUMPIF_TYPED] = partial(self.interpret_ltgteq_jumpif_typed, mode='lt')
+        table[opcodes.GT_JUMPIF_TYPED] = partial(self.interpret_ltgteq_jumpif_typed, mode='gt')
+        table[opcodes.EQ_JUMPIF_TYPED] = partial(self.interpret_ltgteq_jumpif_typed, mode='eq')
+        table[opcodes.INVALID] = self.interpret_invalid
+        return table
+
+    # Execute compiled ops from position, the first one unless program was
+    # restored from checkpoint, outputs are flushed at the end of program
+    # as well as on EXIT and errors which exit through here
+    def run(self) -> None:
+        ops = self.ops
+        dispatch = self.dispatch
+        ops_count = len(ops)
+        # Deadline set before is shared with runs the program continues
+        if self.time_limit != None and self.deadline == None:
+            self.deadline = time.monotonic() + self.time_limit
+        if self.profiler != None:
+            self.run_profiled()
+            return
+        if self.block_code != None:
+            self.run_blocks()
+            return
+        try:
+            while self.position < ops_count:
+                op = ops[self.position]
+                self.position += 1
+                dispatch[op.code](op)
+                if op.code != opcodes.LABEL:
+                    self.instructions_executed += 1
+                    self.last_instruction = op
+        finally:
+            self.flush_outputs()
+
+    # Run functions of transpiled blocks, each returns index of the next one
+    def run_blocks(self) -> None:
+        blocks = transpiler.bind(self, self.block_code)
+        blocks_count = len(blocks)
+        block = self.block_code[1][self.position]
+        try:
+            while block < blocks_count:
+                block = blocks[block]()
+        finally:
+            self.flush_outputs()
+
+    # Same loop as run with timing of every op, kept separate so that
+    # runs without profiler pay nothing for it
+    def run_profiled(self) -> None:
+        ops = self.ops
+        dispatch = self.dispatch
+        ops_count = len(ops)
+        profiler = self.profiler
+        clock = time.perf_counter_ns
+        block = MAIN
+        try:
+            while self.position < ops_count:
+                op = ops[self.position]
+                self.position += 1
+                if op.code == opcodes.LABEL:
+                    block = op.args[0].value
+                    profiler.enter_block(block)
+                depth = len(self.call_stack)
+                start = clock()
+                try:
+                    dispatch[op.code](op)
+                finally:
+                    profiler.record(op, clock() - start, block)
+                if op.code != opcodes.LABEL:
+                    self.instructions_executed += 1
+                    self.last_instruction = op
+                if len(self.call_stack) > depth:
+                    profiler.enter_call(op.args[0].value, block)
+                elif len(self.call_stack) < depth:
+                    block = profiler.leave_call()
+        finally:
+            profiler.finish()
+            profiler.frames = self.frames.pool_stats()
+            self.flush_outputs()
+
+    def flush_outputs(self) -> None:
+        self.stdout.flush()
+        self.stderr.flush()
+
     def get_val_and_type(self, instruction_arg: object) -> tuple:
         value = instruction_arg.value
         type = instruction_arg.type
         if type == 'var':
-            frame, var_name = tool.get_var_frame_and_name(instruction_arg.value)
-            var = self.frames.get_var(var_name, frame)
-            value = var.value
-            type = var.type
-        elif type == 'string':
-            bytes = re.sub(b'\\\\(\d{3})', tool.replace, value.encode('utf-8'))
-            value = bytes.decode('utf-8')
+            value, type = self.frames.get_var(instruction_arg)
         return value, type
 
+    # Same as get_val_and_type, but string buffer of variable is kept
+    def peek_val_and_type(self, instruction_arg: object) -> tuple:
+        if instruction_arg.type == 'var':
+            return self.frames.peek_var(instruction_arg)
+        return instruction_arg.value, instruction_arg.type
+
     def interpret_defvar(self, instruction: object) -> None:
-        if len(instruction.args) != 1:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
-        self.frames.def_var(var_name, frame)
+        var = instruction.args[0]
+        self.frames.def_var(var)
 
     def interpret_move(self, instruction: object) -> None:
-        if len(instruction.args) != 2:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
+        var = instruction.args[0]
         value, type = self.get_val_and_type(instruction.args[1])
-        self.frames.set_var(var_name, frame, value, type)
+        self.frames.set_var(var, value, type)
 
-    def interpret_write_dprint(self, instruction: object, stream) -> None:
-        if len(instruction.args) != 1:
-            Error.handle_error(Error.XML_STRUCT.value)
+    def interpret_write_dprint(self, instruction: object, stream: Output) -> None:
         value, type = self.get_val_and_type(instruction.args[0])
-        value = str(value)
-        
-        if type == 'nil':
-            value = ''
-        elif type == 'bool':
-            value = value.lower()
-
-        print(value, end='', file=stream)
+        stream.write(tool.to_output(value, type))
 
     def interpret_concat(self, instruction: object) -> None:
-        if len(instruction.args) != 3:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
-        value_1, type_1 = self.get_val_and_type(instruction.args[1])
+        var = instruction.args[0]
+        value_1, type_1 = self.peek_val_and_type(instruction.args[1])
         value_2, type_2 = self.get_val_and_type(instruction.args[2])
         
         if type_1 != 'string' or type_2 != 'string':
             Error.handle_error(Error.OP_TYPES.value)
-        value = value_1 + value_2
-        self.frames.set_var(var_name, frame, value, 'string')
-
-    def interpret_jump(self, label_name: str) -> None:
-        if self.is_label_defined(label_name):
-            self.position = self.labels.get(label_name)
-
-    def is_label_defined(self, label_name: str):
-        if label_name in self.labels:
+        self.concat_to(var, instruction.args[1], value_1, value_2)
+
+    # CONCAT to the variable of the first operand appends to its buffer,
+    # long strings get one, blocks of block engine read GF slots directly
+    # and keep plain str
+    def concat_to(self, var: object, symb_1: object, value_1, value_2: str) -> None:
+        size = len(value_1) + len(value_2)
+        if self.max_string_size != None and size > self.max_string_size:
+            self.string_limit_exceeded()
+        if value_1.__class__ is StringBuffer:
+            if is_same_var(var, symb_1):
+                value_1.append(value_2)
+                return
+            value_1 = value_1.materialize()
+        elif size >= MIN_LENGTH and self.block_code == None and is_same_var(var, symb_1):
+            buffer = StringBuffer(value_1)
+            buffer.append(value_2)
+            self.frames.set_var(var, buffer, 'string')
+            return
+        self.frames.set_var(var, value_1 + value_2, 'string')
+
+    def interpret_label(self, instruction: object) -> None:
+        pass
+
+    def interpret_jump(self, instruction: object) -> None:
+        self.jump_to(instruction.args[0])
+
+    def jump_to(self, label: object) -> None:
+        if self.is_label_defined(label):
+            if label.target < self.position:
+                self.check_budget(label.target)
+            self.position = label.target
+
+    # Budgets are checked only on backward jumps and calls, because code
+    # without them ends after at most len(ops) instructions, checkpoints
+    # are taken here too with state after jump to target
+    def check_budget(self, target: int) -> None:
+        if self.max_instructions != None and self.instructions_executed >= self.max_instructions:
+            Error.handle_error(Error.RESOURCE.value,
+                               "instruction limit " + str(self.max_instructions) + " exceeded")
+        if self.deadline != None and time.monotonic() > self.deadline:
+            Error.handle_error(Error.RESOURCE.value,
+                               "time limit " + str(self.time_limit) + " s exceeded")
+        if self.max_string_size != None and self.instructions_executed >= self.next_string_check:
+            self.check_string_size()
+        if self.checkpoint != None and (self.checkpoint.requested or
+                                        self.instructions_executed >= self.checkpoint.next_at):
+            self.checkpoint.save(self, target)
+
+    # Strings in frames are counted by walking all frames, so the next walk
+    # waits for at least as many instructions as the walk visited variables
+    def check_string_size(self) -> None:
+        size, visited = self.frames.get_string_size()
+        if size > self.max_string_size:
+            self.string_limit_exceeded()
+        self.next_string_check = self.instructions_executed + visited
+
+    def string_limit_exceeded(self) -> None:
+        Error.handle_error(Error.RESOURCE.value,
+                           "string size limit " + str(self.max_string_size) + " exceeded")
+
+    def is_label_defined(self, label: object):
+        if label.target != None:
             return True
         else:
             Error.handle_error(Error.SEMANTIC.value)
 
     def interpret_jumpif(self, instruction: object, mode: str) -> None:
-        if len(instruction.args) != 3:
-            Error.handle_error(Error.XML_STRUCT.value)
-        label_name = instruction.args[0].value
+        label = instruction.args[0]
         value_1, type_1 = self.get_val_and_type(instruction.args[1])
         value_2, type_2 = self.get_val_and_type(instruction.args[2])
         
-        if self.is_label_defined(label_name):
+        if self.is_label_defined(label):
             if type_1 == type_2 or type_1 == 'nil' or type_2 == 'nil':
                 match mode:
                     case 'eq':
                         if value_1 == value_2:
-                            self.interpret_jump(label_name)
+                            self.jump_to(label)
                     case 'neq':
                         if value_1 != value_2:
-                            self.interpret_jump(label_name)
+                            self.jump_to(label)
             else:
                 Error.handle_error(Error.OP_TYPES.value)
 
-    def interpret_call(self, label_name: str) -> None:
-        self.call_stack.insert(0, self.position)
-        self.interpret_jump(label_name)
+    def interpret_call(self, instruction: object) -> None:
+        self.call_stack.push(self.position)
+        label = instruction.args[0]
+        if self.is_label_defined(label):
+            self.check_budget(label.target)
+            self.position = label.target
         
-    def interpret_return(self) -> None:
-        if self.call_stack != []:
-            return_position = self.call_stack.pop(0)
+    def interpret_return(self, instruction: object) -> None:
+        if len(self.call_stack) > 0:
+            return_position = self.call_stack.pop()
             self.position = return_position
         else:
             Error.handle_error(Error.MISSING_VAL.value)
 
-    def interpret_createframe(self) -> None:
+    def interpret_createframe(self, instruction: object) -> None:
         self.frames.create_frame()
 
-    def interpret_pushframe(self) -> None:
+    def interpret_pushframe(self, instruction: object) -> None:
         self.frames.push_frame()
 
-    def interpret_popframe(self) -> None:
+    def interpret_popframe(self, instruction: object) -> None:
         self.frames.pop_frame()
 
     def interpret_add_sub_mul_idiv(self, instruction: object, mode) -> None:
-        if len(instruction.args) != 3:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
+        var = instruction.args[0]
         value_1, type_1 = self.get_val_and_type(instruction.args[1])
         value_2, type_2 = self.get_val_and_type(instruction.args[2])
         
@@ -207,38 +485,29 @@ class Program:
                 else:
                     value = value_1 // value_2
         
-        self.frames.set_var(var_name, frame, value, type_1)
+        self.frames.set_var(var, value, type_1)
 
     def interpret_exit(self, instruction: object) -> None:
-        if len(instruction.args) != 1:
-            Error.handle_error(Error.XML_STRUCT.value)
         value, type = self.get_val_and_type(instruction.args[0])
 
         if type != 'int':
             Error.handle_error(Error.OP_TYPES.value)
 
         if value >= 0 and value <= 49:
-            exit(value)
+            sys.exit(value)
         else:
             Error.handle_error(Error.OP_VAL.value)
 
     def interpret_type(self, instruction: object) -> None:
-        if len(instruction.args) != 2:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame_to, var_name_to = tool.get_var_frame_and_name(instruction.args[0].value)
         type = instruction.args[1].type
-        value = instruction.args[1].value
 
         if type == 'var':
-            frame_from, var_name_from = tool.get_var_frame_and_name(value)
-            type = self.frames.get_var_type(var_name_from, frame_from)
+            type = self.frames.get_var_type(instruction.args[1])
 
-        self.frames.set_var(var_name_to, frame_to, type, 'string')
+        self.frames.set_var(instruction.args[0], type, 'string')
 
     def interpret_read(self, instruction: object) -> None:
-        if len(instruction.args) != 2:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
+        var = instruction.args[0]
         symb_type = instruction.args[1].value
         if symb_type == 'var':
             value, type = self.get_val_and_type(instruction.args[1])
@@ -248,25 +517,21 @@ class Program:
         if type != 'int' and type != 'string' and type != 'bool':
             Error.handle_error(Error.XML_STRUCT.value)
 
-        if self.input == 'STDIN':
-            value = input()
-        else:
-            value = self.input.readline()
-        
-        value = tool.convert(type, value)
+        value = self.input.readline()
+        if value != None:
+            self.input_lines += 1
+            value = tool.convert_input(type, value)
 
-        if value == None or value == '':
-            self.frames.set_var(var_name, frame, 'nil', 'nil')
+        if value == None:
+            self.frames.set_var(var, 'nil', 'nil')
         else:
             if type == 'string':
                 value = value.strip()
-            self.frames.set_var(var_name, frame, value, type)
+            self.frames.set_var(var, value, type)
             
 
     def interpret_andor(self, instruction: object, mode: str) -> None:
-        if len(instruction.args) != 3:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
+        var = instruction.args[0]
         value_1, type_1 = self.get_val_and_type(instruction.args[1])
         value_2, type_2 = self.get_val_and_type(instruction.args[2])
         
@@ -277,12 +542,10 @@ class Program:
             case 'and': value = value_1 and value_2
             case 'or': value = value_1 or value_2
 
-        self.frames.set_var(var_name, frame, value, 'bool')
+        self.frames.set_var(var, value, 'bool')
     
     def interpret_not(self, instruction: object) -> None:
-        if len(instruction.args) != 2:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
+        var = instruction.args[0]
         
         value, type = self.get_val_and_type(instruction.args[1])
         
@@ -290,12 +553,10 @@ class Program:
             Error.handle_error(Error.OP_TYPES.value)
 
         value = not value
-        self.frames.set_var(var_name, frame, value, 'bool')
+        self.frames.set_var(var, value, 'bool')
 
     def interpret_ltgteq(self, instruction: object, mode: str) -> None:
-        if len(instruction.args) != 3:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
+        var = instruction.args[0]
         value_1, type_1 = self.get_val_and_type(instruction.args[1])
         value_2, type_2 = self.get_val_and_type(instruction.args[2])
         
@@ -310,13 +571,11 @@ class Program:
             case 'gt': value = value_1 > value_2
             case 'eq': value = value_1 == value_2
         
-        self.frames.set_var(var_name, frame, value, 'bool')
+        self.frames.set_var(var, value, 'bool')
 
     def interpret_setchar(self, instruction: object) -> None:
-        if len(instruction.args) != 3:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
-        string, string_type = self.get_val_and_type(instruction.args[0])
+        var = instruction.args[0]
+        string, string_type = self.peek_val_and_type(instruction.args[0])
         index, index_type = self.get_val_and_type(instruction.args[1])
         char, char_type = self.get_val_and_type(instruction.args[2])
 
@@ -325,26 +584,31 @@ class Program:
         if len(string) <= index or index < 0 or char == '':
             Error.handle_error(Error.STRING.value)
 
+        # Long strings are changed in place
+        if string.__class__ is StringBuffer:
+            string.set_char(index, char[0])
+            return
+        if len(string) >= MIN_LENGTH and self.block_code == None:
+            buffer = StringBuffer(string)
+            buffer.set_char(index, char[0])
+            self.frames.set_var(var, buffer, 'string')
+            return
         string = string[:index] + char[0] + string[index + 1:]
-        self.frames.set_var(var_name, frame, string, 'string')
+        self.frames.set_var(var, string, 'string')
 
     def interpret_strlen(self, instruction: object) -> None:
-        if len(instruction.args) != 2:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
-        string, type = self.get_val_and_type(instruction.args[1])
+        var = instruction.args[0]
+        string, type = self.peek_val_and_type(instruction.args[1])
         
         if type != 'string':
             Error.handle_error(Error.OP_TYPES.value)
 
         strlen = len(string)
-        self.frames.set_var(var_name, frame, strlen, 'int')
+        self.frames.set_var(var, strlen, 'int')
 
     def interpret_stri2int(self, instruction: object) -> None:
-        if len(instruction.args) != 3:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
-        string, string_type = self.get_val_and_type(instruction.args[1])
+        var = instruction.args[0]
+        string, string_type = self.peek_val_and_type(instruction.args[1])
         index, index_type = self.get_val_and_type(instruction.args[2])
 
         if string_type != 'string' or index_type != 'int':
@@ -353,32 +617,26 @@ class Program:
             Error.handle_error(Error.STRING.value)
 
         ord_val = ord(string[index])
-        self.frames.set_var(var_name, frame, ord_val, 'int')
+        self.frames.set_var(var, ord_val, 'int')
 
     def interpret_pushs(self, instruction: object) -> None:
-        if len(instruction.args) != 1:
-            Error.handle_error(Error.XML_STRUCT.value)
         value, type = self.get_val_and_type(instruction.args[0])
-        self.data_stack.insert(0, (value, type))
+        self.data_stack.push((value, type))
 
     def interpret_pops(self, instruction: object) -> None:
-        if len(instruction.args) != 1:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
-        if self.data_stack != []:
-            top_stack_item = self.data_stack.pop(0)
+        var = instruction.args[0]
+        if len(self.data_stack) > 0:
+            top_stack_item = self.data_stack.pop()
             value = top_stack_item[0]
             type = top_stack_item[1]
         else:
             Error.handle_error(Error.MISSING_VAL.value)
 
-        self.frames.set_var(var_name, frame, value, type)
+        self.frames.set_var(var, value, type)
 
     def interpret_getchar(self, instruction: object) -> None:
-        if len(instruction.args) != 3:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
-        string, string_type = self.get_val_and_type(instruction.args[1])
+        var = instruction.args[0]
+        string, string_type = self.peek_val_and_type(instruction.args[1])
         index, index_type = self.get_val_and_type(instruction.args[2])
 
         if string_type != 'string' or index_type != 'int':
@@ -387,12 +645,10 @@ class Program:
             Error.handle_error(Error.STRING.value)
 
         char = string[index]
-        self.frames.set_var(var_name, frame, char, 'string')
+        self.frames.set_var(var, char, 'string')
 
     def interpret_int2char(self, instruction: object) -> None:
-        if len(instruction.args) != 2:
-            Error.handle_error(Error.XML_STRUCT.value)
-        frame, var_name = tool.get_var_frame_and_name(instruction.args[0].value)
+        var = instruction.args[0]
         number, type = self.get_val_and_type(instruction.args[1])
 
         if type != 'int':
@@ -400,25 +656,271 @@ class Program:
 
         try:
             char = chr(number)
-        except ValueError:
+        except (ValueError, OverflowError):
             Error.handle_error(Error.STRING.value)
-        self.frames.set_var(var_name, frame, char, 'string')
+        self.frames.set_var(var, char, 'string')
 
     def interpret_break(self, instruction: object) -> None:
-        if len(instruction.args) != 0:
-            Error.handle_error(Error.XML_STRUCT.value)
-        print("Last instruction: ", end="")
+        print("Last instruction: ", end="", file=self.stdout)
         if self.last_instruction != None:
-            print(self.last_instruction.opcode)
+            print(self.last_instruction.opcode, file=self.stdout)
         else:
-            print("None")
-        print("Code postition: " + str(instruction.order), file=sys.stderr)
-        print("Instructions executed: " + str(self.instructions_executed), file=sys.stderr)
-        print()
-        self.frames.print_frames()
-        print()
-        print("Data stack:")
-        print(self.data_stack)
-        print()
-        print("Call stack:")
-        print(self.call_stack)
+            print("None", file=self.stdout)
+        print("Code postition: " + str(instruction.order), file=self.stderr)
+        print("Instructions executed: " + str(self.instructions_executed), file=self.stderr)
+        print(file=self.stdout)
+        self.frames.print_frames(self.stdout)
+        print(file=self.stdout)
+        print("Data stack:", file=self.stdout)
+        print(self.data_stack, file=self.stdout)
+        print(file=self.stdout)
+        print("Call stack:", file=self.stdout)
+        print(self.return_addresses(), file=self.stdout)
+        self.flush_outputs()
+
+    # Return addresses from top of call stack as positions in the loaded
+    # program, every address follows its CALL, which optimizations keep
+    def return_addresses(self) -> list:
+        return [self.ops[position - 1].index + 1 for position in reversed(self.call_stack.items)]
+
+    # Instruction with wrong number of operands
+    def interpret_invalid(self, instruction: object) -> None:
+        Error.handle_error(Error.XML_STRUCT.value)
+
+    # Stack extension, operands are taken from top of data stack, the last
+    # one on top, and result is pushed there, frames are not touched
+
+    def pop_operands(self, count: int) -> list:
+        items = self.data_stack.items
+        if len(items) < count:
+            Error.handle_error(Error.MISSING_VAL.value)
+        operands = items[-count:]
+        del items[-count:]
+        return operands
+
+    def interpret_clears(self, instruction: object) -> None:
+        self.data_stack.items.clear()
+
+    def interpret_arithmetic_stack(self, instruction: object, mode: str) -> None:
+        (value_1, type_1), (value_2, type_2) = self.pop_operands(2)
+
+        if type_1 != 'int' or type_2 != 'int':
+            Error.handle_error(Error.OP_TYPES.value)
+
+        match mode:
+            case 'add': value = value_1 + value_2
+            case 'sub': value = value_1 - value_2
+            case 'mul': value = value_1 * value_2
+            case 'idiv':
+                if value_2 == 0:
+                    Error.handle_error(Error.OP_VAL.value)
+                value = value_1 // value_2
+
+        self.data_stack.items.append((value, 'int'))
+
+    def interpret_ltgteq_stack(self, instruction: object, mode: str) -> None:
+        (value_1, type_1), (value_2, type_2) = self.pop_operands(2)
+
+        if type_1 == 'nil' or type_2 == 'nil':
+            if mode != 'eq':
+                Error.handle_error(Error.OP_TYPES.value)
+        elif type_1 != type_2:
+            Error.handle_error(Error.OP_TYPES.value)
+
+        match mode:
+            case 'lt': value = value_1 < value_2
+            case 'gt': value = value_1 > value_2
+            case 'eq': value = value_1 == value_2
+
+        self.data_stack.items.append((value, 'bool'))
+
+    def interpret_andor_stack(self, instruction: object, mode: str) -> None:
+        (value_1, type_1), (value_2, type_2) = self.pop_operands(2)
+
+        if type_1 != 'bool' or type_2 != 'bool':
+            Error.handle_error(Error.OP_TYPES.value)
+
+        match mode:
+            case 'and': value = value_1 and value_2
+            case 'or': value = value_1 or value_2
+
+        self.data_stack.items.append((value, 'bool'))
+
+    def interpret_not_stack(self, instruction: object) -> None:
+        (value, type), = self.pop_operands(1)
+
+        if type != 'bool':
+            Error.handle_error(Error.OP_TYPES.value)
+
+        self.data_stack.items.append((not value, 'bool'))
+
+    def interpret_int2char_stack(self, instruction: object) -> None:
+        (number, type), = self.pop_operands(1)
+
+        if type != 'int':
+            Error.handle_error(Error.OP_TYPES.value)
+
+        try:
+            char = chr(number)
+        except (ValueError, OverflowError):
+            Error.handle_error(Error.STRING.value)
+        self.data_stack.items.append((char, 'string'))
+
+    def interpret_stri2int_stack(self, instruction: object) -> None:
+        (string, string_type), (index, index_type) = self.pop_operands(2)
+
+        if string_type != 'string' or index_type != 'int':
+            Error.handle_error(Error.OP_TYPES.value)
+        if len(string) <= index or index < 0 or string == '':
+            Error.handle_error(Error.STRING.value)
+
+        self.data_stack.items.append((ord(string[index]), 'int'))
+
+    def interpret_jumpif_stack(self, instruction: object, mode: str) -> None:
+        (value_1, type_1), (value_2, type_2) = self.pop_operands(2)
+        label = instruction.args[0]
+
+        if self.is_label_defined(label):
+            if type_1 == type_2 or type_1 == 'nil' or type_2 == 'nil':
+                match mode:
+                    case 'eq':
+                        if value_1 == value_2:
+                            self.jump_to(label)
+                    case 'neq':
+                        if value_1 != value_2:
+                            self.jump_to(label)
+            else:
+                Error.handle_error(Error.OP_TYPES.value)
+
+    # Fused ops of optimizer, they count as both instructions they replace
+
+    def interpret_ltgteq_jumpif(self, instruction: object, mode: str) -> None:
+        var, symb_1, symb_2, label, jump_on = instruction.args
+        value_1, type_1 = self.get_val_and_type(symb_1)
+        value_2, type_2 = self.get_val_and_type(symb_2)
+
+        if type_1 == 'nil' or type_2 == 'nil':
+            if mode != 'eq':
+                Error.handle_error(Error.OP_TYPES.value)
+        elif type_1 != type_2:
+            Error.handle_error(Error.OP_TYPES.value)
+
+        match mode:
+            case 'lt': value = value_1 < value_2
+            case 'gt': value = value_1 > value_2
+            case 'eq': value = value_1 == value_2
+
+        self.frames.set_var(var, value, 'bool')
+        self.instructions_executed += 1
+        if self.is_label_defined(label) and value == jump_on.value:
+            self.jump_to(label)
+
+    def interpret_defvar_move(self, instruction: object) -> None:
+        var = instruction.args[0]
+        self.frames.def_var(var)
+        self.instructions_executed += 1
+        value, type = self.get_val_and_type(instruction.args[1])
+        self.frames.set_var(var, value, type)
+
+    def interpret_pushs_pops(self, instruction: object) -> None:
+        value, type = self.get_val_and_type(instruction.args[1])
+        # Value does not stay on data stack, but full stack still fails
+        if len(self.data_stack) >= self.data_stack.max_depth:
+            self.data_stack.push((value, type))
+        self.instructions_executed += 1
+        self.frames.set_var(instruction.args[0], value, type)
+
+    def interpret_add_sub_int(self, instruction: object, mode: str) -> None:
+        var, symb, constant = instruction.args
+        value, type = self.get_val_and_type(symb)
+
+        if type != 'int':
+            Error.handle_error(Error.OP_TYPES.value)
+
+        match mode:
+            case 'add': value = value + constant.value
+            case 'sub': value = value - constant.value
+
+        self.frames.set_var(var, value, 'int')
+
+    # Typed ops have operand types proven by inference, operands are
+    # constants or defined GF variables with value, so checks are skipped
+
+    def get_typed_value(self, operand: object):
+        if operand.type == 'var':
+            value = self.frames.global_frame.values[operand.slot]
+            if value.__class__ is StringBuffer:
+                return value.materialize()
+            return value
+        return operand.value
+
+    def peek_typed_value(self, operand: object):
+        if operand.type == 'var':
+            return self.frames.global_frame.values[operand.slot]
+        return operand.value
+
+    def interpret_arithmetic_typed(self, instruction: object, mode: str) -> None:
+        var, symb_1, symb_2 = instruction.args
+        value_1 = self.get_typed_value(symb_1)
+        value_2 = self.get_typed_value(symb_2)
+
+        match mode:
+            case 'add': value = value_1 + value_2
+            case 'sub': value = value_1 - value_2
+            case 'mul': value = value_1 * value_2
+            case 'idiv':
+                if value_2 == 0:
+                    Error.handle_error(Error.OP_VAL.value)
+                value = value_1 // value_2
+
+        self.frames.set_var(var, value, 'int')
+
+    def interpret_ltgteq_typed(self, instruction: object, mode: str) -> None:
+        var, symb_1, symb_2 = instruction.args
+        value_1 = self.get_typed_value(symb_1)
+        value_2 = self.get_typed_value(symb_2)
+
+        match mode:
+            case 'lt': value = value_1 < value_2
+            case 'gt': value = value_1 > value_2
+            case 'eq': value = value_1 == value_2
+
+        self.frames.set_var(var, value, 'bool')
+
+    def interpret_andor_typed(self, instruction: object, mode: str) -> None:
+        var, symb_1, symb_2 = instruction.args
+        value_1 = self.get_typed_value(symb_1)
+        value_2 = self.get_typed_value(symb_2)
+
+        match mode:
+            case 'and': value = value_1 and value_2
+            case 'or': value = value_1 or value_2
+
+        self.frames.set_var(var, value, 'bool')
+
+    def interpret_not_typed(self, instruction: object) -> None:
+        var, symb = instruction.args
+        self.frames.set_var(var, not self.get_typed_value(symb), 'bool')
+
+    def interpret_concat_typed(self, instruction: object) -> None:
+        var, symb_1, symb_2 = instruction.args
+        self.concat_to(var, symb_1, self.peek_typed_value(symb_1), self.get_typed_value(symb_2))
+
+    def interpret_strlen_typed(self, instruction: object) -> None:
+        var, symb = instruction.args
+        self.frames.set_var(var, len(self.peek_typed_value(symb)), 'int')
+
+    def interpret_ltgteq_jumpif_typed(self, instruction: object, mode: str) -> None:
+        var, symb_1, symb_2, label, jump_on = instruction.args
+        value_1 = self.get_typed_value(symb_1)
+        value_2 = self.get_typed_value(symb_2)
+
+        match mode:
+            case 'lt': value = value_1 < value_2
+            case 'gt': value = value_1 > value_2
+            case 'eq': value = value_1 == value_2
+
+        self.frames.set_var(var, value, 'bool')
+        self.instructions_executed += 1
+        if self.is_label_defined(label) and value == jump_on.value:
+            self.jump_to(label)
@@ -0,0 +1,49 @@
+## @file protocol.py
+# @brief Messages between server.py and client.py over Unix socket
+# @author Marián Tarageľ
+
+import json
+import os
+import struct
+
+# Every message is one byte of kind, four bytes of payload length and
+# the payload. Client sends REQUEST with arguments of interpret.py as JSON
+# object followed by SOURCE when source is read from its standard input.
+# Server answers READ with INPUT holding whole lines of client's standard
+# input, empty INPUT is end of input, and sends STDOUT and STDERR text
+# while program runs and EXIT with exit code as the last message.
+REQUEST = b'R'
+SOURCE = b'S'
+READ = b'N'
+INPUT = b'I'
+STDOUT = b'O'
+STDERR = b'E'
+EXIT = b'X'
+
+HEADER = struct.Struct('>cI')
+
+DEFAULT_SOCKET = os.environ.get(
+    'IPPCODE23_SOCKET',
+    os.path.join(os.environ.get('XDG_RUNTIME_DIR', '/tmp'),
+                 'ippcode23-interpret-' + str(os.getuid()) + '.sock'))
+
+def send(connection: object, kind: bytes, payload: bytes = b'') -> None:
+    connection.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+def receive_exactly(connection: object, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(min(size, 1 << 20))
+        if chunk == b'':
+            raise ConnectionError('connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+# Next message as tuple of kind and payload
+def receive(connection: object) -> tuple:
+    kind, size = HEADER.unpack(receive_exactly(connection, HEADER.size))
+    return kind, receive_exactly(connection, size)
+
+def send_json(connection: object, kind: bytes, data: dict) -> None:
+    send(connection, kind, json.dumps(data).encode('utf-8'))
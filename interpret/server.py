@@ -0,0 +1,240 @@
+## @file server.py
+# @brief Interpret server on Unix socket with pre-forked workers
+# @author Marián Tarageľ
+
+from argparse import RawDescriptionHelpFormatter
+import io
+import json
+import os
+import re
+import signal
+import socket
+import sys
+from my_arg_parse import Myargparse
+from error import Error, InterpretExit
+from interpret_args import create_parser, check_combinations
+from api import Interpreter
+import interpret
+import protocol
+
+KEY_REGEX = re.compile(r'^[0-9a-f]{64}$')
+
+# Output stream of program sending written text to client
+class SocketStream:
+
+    connection: socket.socket
+    kind: bytes
+
+    def __init__(self, connection: socket.socket, kind: bytes):
+        self.connection = connection
+        self.kind = kind
+
+    def write(self, text: str) -> None:
+        protocol.send(self.connection, self.kind, text.encode('utf-8'))
+
+    def flush(self) -> None:
+        pass
+
+# Standard input of client, lines are asked for only when READ needs
+# them and client sends as many whole lines as it has at hand
+class SocketInput:
+
+    connection: socket.socket
+    lines: list
+    eof: bool
+
+    def __init__(self, connection: socket.socket):
+        self.connection = connection
+        self.lines = []
+        self.eof = False
+
+    def readline(self):
+        if self.lines == []:
+            if self.eof:
+                return None
+            protocol.send(self.connection, protocol.READ)
+            kind, payload = protocol.receive(self.connection)
+            text = payload.decode('utf-8')
+            if kind != protocol.INPUT or text == '':
+                self.eof = True
+                return None
+            lines = text.split('\n')
+            if text.endswith('\n'):
+                lines.pop()
+            self.lines = lines[::-1]
+        return self.lines.pop()
+
+# Interpreters of worker by options which change loaded programs
+interpreters = {}
+
+def get_interpreter(args: object) -> Interpreter:
+    key = (args.cache_dir, args.cache_size, args.no_cache, args.opt_level,
+           args.engine, args.source_format)
+    if key not in interpreters:
+        interpreters[key] = interpret.create_interpreter(args)
+    return interpreters[key]
+
+def request_error(message: str) -> None:
+    Error.handle_error(Error.ARGS.value, message)
+
+# Value of argument checked against its parser action, flags take bool,
+# the others None when their default is None or value of action type
+def check_value(action: object, value):
+    if action.nargs == 0:
+        if type(value) != bool:
+            request_error("argument " + action.dest + " must be bool")
+        return value
+    if value == None:
+        if action.default != None:
+            request_error("argument " + action.dest + " must not be null")
+        return value
+    expected = action.type if action.type != None else str
+    accepted = (int, float) if expected == float else (expected,)
+    if type(value) not in accepted:
+        request_error("argument " + action.dest + " must be " + expected.__name__)
+    value = expected(value)
+    if action.choices != None and value not in action.choices:
+        request_error("argument " + action.dest + " must be one of " +
+                      ", ".join(action.choices))
+    return value
+
+# Arguments of request over defaults of interpret.py, every argument must
+# be one of interpret.py and they are checked as its command line is,
+# errors raise InterpretExit with Error.ARGS
+def parse_request(payload: bytes) -> tuple:
+    try:
+        request = json.loads(payload)
+    except ValueError:
+        request_error("invalid request")
+    if type(request) != dict or type(request.get('args', {})) != dict:
+        request_error("invalid request")
+    parser = create_parser()
+    parser.error = request_error
+    actions = {action.dest: action for action in parser._actions if action.dest != 'help'}
+    args = parser.parse_args([])
+    for name, value in request.get('args', {}).items():
+        if name not in actions:
+            request_error("unknown argument " + name)
+        setattr(args, name, check_value(actions[name], value))
+    check_combinations(parser, args)
+    source_key = request.get('source_key')
+    if source_key != None and (type(source_key) != str or KEY_REGEX.match(source_key) == None):
+        request_error("invalid source_key")
+    return args, source_key
+
+def run_request(connection: socket.socket, payload: bytes) -> int:
+    stdout = SocketStream(connection, protocol.STDOUT)
+    stderr = SocketStream(connection, protocol.STDERR)
+    try:
+        args, source_key = parse_request(payload)
+    except InterpretExit as error:
+        stderr.write("Error: " + error.message + "\n")
+        return error.code
+    interpreter = get_interpreter(args)
+    source = None
+    if source_key != None:
+        source = interpreter.load_key(source_key)
+        if source == None:
+            stderr.write("Error: program " + source_key + " is not loaded\n")
+            return Error.IN_FILE.value
+        # Loaded program is passed like a source read from the client
+        args.source = 'STDIN'
+    elif args.source == 'STDIN' and args.resume == None:
+        kind, data = protocol.receive(connection)
+        source = io.BytesIO(data)
+    return interpret.execute(args, interpreter, source, SocketInput(connection), stdout, stderr)
+
+# Serve one connection, errors of connection only end it
+def handle(connection: socket.socket) -> None:
+    try:
+        kind, payload = protocol.receive(connection)
+        if kind != protocol.REQUEST:
+            return
+        try:
+            exit_code = run_request(connection, payload)
+        except ConnectionError:
+            raise
+        except SystemExit as exit:
+            exit_code = exit.code
+        except Exception as error:
+            protocol.send(connection, protocol.STDERR, ("Error: " + repr(error) + "\n").encode('utf-8'))
+            exit_code = Error.INTERNAL.value
+        protocol.send_json(connection, protocol.EXIT, {'exit_code': exit_code})
+    except OSError:
+        pass
+    finally:
+        connection.close()
+
+# Worker accepts connections on socket inherited from server
+def worker(listener: socket.socket) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    while True:
+        connection, address = listener.accept()
+        handle(connection)
+
+def start_worker(listener: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            worker(listener)
+        finally:
+            os._exit(0)
+    return pid
+
+def stop(workers: set, path: str) -> None:
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    sys.exit(0)
+
+# Modules of interpret are imported before fork, so workers share them
+# and pay nothing for start, workers which die are replaced
+def serve(path: str, workers_count: int) -> None:
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if os.path.exists(path):
+        try:
+            listener.connect(path)
+            raise OSError("server is already running on " + path)
+        except ConnectionRefusedError:
+            os.remove(path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    os.chmod(path, 0o600)
+    listener.listen(128)
+
+    workers = set()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop(workers, path))
+    signal.signal(signal.SIGINT, lambda signum, frame: stop(workers, path))
+    for _ in range(workers_count):
+        workers.add(start_worker(listener))
+    while True:
+        pid, status = os.wait()
+        workers.discard(pid)
+        workers.add(start_worker(listener))
+
+def main() -> None:
+    parser = Myargparse(formatter_class=RawDescriptionHelpFormatter, description="""
+Skript spustí server interpretu, ktorý prijíma požiadavky klienta client.py
+na Unix sockete a vykonáva ich v pripravených procesoch.""")
+    parser.add_argument('--socket', metavar='PATH', dest='socket', default=protocol.DEFAULT_SOCKET,
+    help="cesta k Unix socketu servera")
+    parser.add_argument('--workers', metavar='N', dest='workers', type=int, default=os.cpu_count(),
+    help="počet procesov vykonávajúcich požiadavky")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error('--workers must be positive')
+    try:
+        serve(args.socket, args.workers)
+    except OSError as error:
+        print("Error: " + str(error), file=sys.stderr)
+        sys.exit(Error.INTERNAL.value)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+## @file stack.py
+# @brief Stack with constant time operations and limited depth
+# @author Marián Tarageľ
+
+from error import Error
+
+DEFAULT_MAX_DEPTH = 1000000
+
+class Stack:
+
+    items: list
+    max_depth: int
+    name: str
+
+    def __init__(self, name: str, max_depth: int = DEFAULT_MAX_DEPTH):
+        self.items = []
+        self.max_depth = max_depth
+        self.name = name
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    # Stack is printed from top to bottom
+    def __repr__(self) -> str:
+        return repr(self.items[::-1])
+
+    def push(self, item) -> None:
+        if len(self.items) >= self.max_depth:
+            Error.handle_error(Error.RESOURCE.value,
+                               self.name + " exceeded maximum depth " + str(self.max_depth))
+        self.items.append(item)
+
+    # Remove top item, stack must not be empty
+    def pop(self):
+        return self.items.pop()
+
+    # Return top item, stack must not be empty
+    def top(self):
+        return self.items[-1]
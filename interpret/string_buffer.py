@@ -0,0 +1,55 @@
+## @file string_buffer.py
+# @brief Mutable representation of long string values
+# @author Marián Tarageľ
+
+from array import array
+import sys
+
+# Strings shorter than this stay str, copying them is cheaper than buffer,
+# bench/bench_strings.py --thresholds measures both for each length, with
+# buffers 3 % slower at 256 characters, even at 1024 and faster above
+MIN_LENGTH = 1024
+
+CODEC = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+# String value of variable held as array of code points, so that CONCAT
+# to the same variable appends and SETCHAR changes it in place, str is
+# made from it only when the value leaves the variable and kept until
+# the next change. Buffer belongs to one variable slot only, reads which
+# copy the value get the str.
+class StringBuffer:
+
+    __slots__ = ('chars', 'text')
+
+    def __init__(self, text: str):
+        self.chars = array('I')
+        self.chars.frombytes(text.encode(CODEC, 'surrogatepass'))
+        self.text = text
+
+    def __len__(self) -> int:
+        return len(self.chars)
+
+    def __getitem__(self, index: int) -> str:
+        return chr(self.chars[index])
+
+    def __str__(self) -> str:
+        return self.materialize()
+
+    def append(self, text: str) -> None:
+        self.chars.frombytes(text.encode(CODEC, 'surrogatepass'))
+        self.text = None
+
+    def set_char(self, index: int, char: str) -> None:
+        self.chars[index] = ord(char)
+        self.text = None
+
+    def materialize(self) -> str:
+        if self.text == None:
+            self.text = self.chars.tobytes().decode(CODEC, 'surrogatepass')
+        return self.text
+
+# Value as stored outside of frames, buffers become str
+def plain(value):
+    if value.__class__ is StringBuffer:
+        return value.materialize()
+    return value
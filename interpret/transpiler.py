@@ -0,0 +1,302 @@
+## @file transpiler.py
+# @brief Engine running basic blocks of ops transpiled into Python functions
+# @author Marián Tarageľ
+
+from error import Error
+import interpret_tools as tool
+import opcodes
+import sys
+
+# Every block becomes function returning index of the next block, ops
+# with operand accesses and type checks inlined are listed here, other
+# ops call their handler from dispatch table of Program. Typed ops skip
+# type checks like their handlers.
+INLINED = {
+    opcodes.MOVE: (opcodes.MOVE, True), opcodes.ADD: (opcodes.ADD, True),
+    opcodes.SUB: (opcodes.SUB, True), opcodes.MUL: (opcodes.MUL, True),
+    opcodes.IDIV: (opcodes.IDIV, True), opcodes.LT: (opcodes.LT, True),
+    opcodes.GT: (opcodes.GT, True), opcodes.EQ: (opcodes.EQ, True),
+    opcodes.AND: (opcodes.AND, True), opcodes.OR: (opcodes.OR, True),
+    opcodes.NOT: (opcodes.NOT, True), opcodes.CONCAT: (opcodes.CONCAT, True),
+    opcodes.STRLEN: (opcodes.STRLEN, True), opcodes.PUSHS: (opcodes.PUSHS, True),
+    opcodes.WRITE: (opcodes.WRITE, True),
+    opcodes.ADD_INT: (opcodes.ADD, True), opcodes.SUB_INT: (opcodes.SUB, True),
+    opcodes.ADD_TYPED: (opcodes.ADD, False), opcodes.SUB_TYPED: (opcodes.SUB, False),
+    opcodes.MUL_TYPED: (opcodes.MUL, False), opcodes.IDIV_TYPED: (opcodes.IDIV, False),
+    opcodes.ADD_INT_TYPED: (opcodes.ADD, False), opcodes.SUB_INT_TYPED: (opcodes.SUB, False),
+    opcodes.LT_TYPED: (opcodes.LT, False), opcodes.GT_TYPED: (opcodes.GT, False),
+    opcodes.EQ_TYPED: (opcodes.EQ, False), opcodes.AND_TYPED: (opcodes.AND, False),
+    opcodes.OR_TYPED: (opcodes.OR, False), opcodes.NOT_TYPED: (opcodes.NOT, False),
+    opcodes.CONCAT_TYPED: (opcodes.CONCAT, False), opcodes.STRLEN_TYPED: (opcodes.STRLEN, False)}
+
+# Ops which change position, they end block and run their handler
+CONTROL = {opcodes.JUMP, opcodes.JUMPIFEQ, opcodes.JUMPIFNEQ, opcodes.CALL, opcodes.RETURN,
+           opcodes.JUMPIFEQS, opcodes.JUMPIFNEQS,
+           opcodes.LT_JUMPIF, opcodes.GT_JUMPIF, opcodes.EQ_JUMPIF,
+           opcodes.LT_JUMPIF_TYPED, opcodes.GT_JUMPIF_TYPED, opcodes.EQ_JUMPIF_TYPED}
+
+# Fused ops count as two instructions, their handlers add one of them
+FUSED = {opcodes.LT_JUMPIF, opcodes.GT_JUMPIF, opcodes.EQ_JUMPIF, opcodes.DEFVAR_MOVE,
+         opcodes.PUSHS_POPS, opcodes.LT_JUMPIF_TYPED, opcodes.GT_JUMPIF_TYPED,
+         opcodes.EQ_JUMPIF_TYPED}
+
+CONSTANT_TYPES = {'int': int, 'string': str, 'bool': bool}
+
+# Python literal of constant operand, None if operand is not a constant
+def literal(operand: object):
+    if operand.type == 'nil' and operand.value == 'nil':
+        return repr(operand.value)
+    if operand.type in CONSTANT_TYPES and type(operand.value) == CONSTANT_TYPES[operand.type]:
+        return repr(operand.value)
+    return None
+
+def is_global_var(operand: object) -> bool:
+    return operand.type == 'var' and operand.frame == 'GF' and operand.slot != None
+
+# Generated source of one block
+class BlockWriter:
+
+    lines: list
+    position: int
+
+    def __init__(self):
+        self.lines = []
+        self.position = 0
+
+    def emit(self, line: str) -> None:
+        self.lines.append('        ' + line)
+
+    def arg(self, index: int) -> str:
+        return 'OPS[' + str(self.position) + '].args[' + str(index) + ']'
+
+    # Read operand into locals NAMEv and NAMEt, returns value expression,
+    # type expression and type known at load time
+    def read(self, index: int, operand: object, name: str) -> tuple:
+        constant = literal(operand)
+        if constant != None:
+            return constant, repr(operand.type), operand.type
+        if is_global_var(operand):
+            slot = str(operand.slot)
+            self.emit(name + 't = gt[' + slot + ']')
+            self.emit('if not ' + name + 't: F.get_var(' + self.arg(index) + ')')
+            self.emit(name + 'v = gv[' + slot + ']')
+        else:
+            self.emit(name + 'v, ' + name + 't = F.get_var(' + self.arg(index) + ')')
+        return name + 'v', name + 't', None
+
+    def write(self, operand: object, value: str, type: str) -> None:
+        if is_global_var(operand):
+            slot = str(operand.slot)
+            self.emit('if gt[' + slot + '] is None: F.set_var(' + self.arg(0) + ', None, None)')
+            self.emit('gv[' + slot + '] = ' + value)
+            self.emit('gt[' + slot + '] = ' + type)
+        else:
+            self.emit('F.set_var(' + self.arg(0) + ', ' + value + ', ' + type + ')')
+
+    # Condition failing when any operand has other than required type,
+    # returns None if the check always fails, '' if it never does
+    @staticmethod
+    def type_check(operands: list, required: list):
+        conditions = []
+        for (value, type, static), wanted in zip(operands, required):
+            if static != None:
+                if static != wanted:
+                    return None
+            else:
+                conditions.append(type + " != '" + wanted + "'")
+        return ' or '.join(conditions)
+
+    def emit_check(self, condition: str) -> None:
+        if condition != '':
+            self.emit('if ' + condition + ': E(' + str(Error.OP_TYPES.value) + ')')
+
+    # Inline op, returns False if it has to run through its handler
+    def inline(self, op: object) -> bool:
+        code, checked = INLINED[op.code]
+        args = op.args
+        match code:
+            case opcodes.MOVE:
+                operands = self.read_operands(args[1:], ['a'])
+                if operands == None:
+                    return False
+                value, type, static = operands[0]
+                self.write(args[0], value, type)
+            case opcodes.PUSHS:
+                operands = self.read_operands(args, ['a'], 0)
+                if operands == None:
+                    return False
+                value, type, static = operands[0]
+                self.emit('DS.push((' + value + ', ' + type + '))')
+            case opcodes.WRITE:
+                constant = literal(args[0])
+                if constant != None:
+                    self.emit('SO.write(' + repr(tool.to_output(args[0].value, args[0].type)) + ')')
+                elif args[0].type == 'var':
+                    value, type, static = self.read(0, args[0], 'a')
+                    self.emit('SO.write(TO(' + value + ', ' + type + '))')
+                else:
+                    return False
+            case opcodes.NOT | opcodes.STRLEN:
+                wanted = 'bool' if code == opcodes.NOT else 'string'
+                operands = self.read_operands(args[1:], ['a'])
+                if operands == None:
+                    return False
+                condition = self.type_check(operands, [wanted]) if checked else ''
+                if condition == None:
+                    return False
+                self.emit_check(condition)
+                value = operands[0][0]
+                self.write(args[0], 'not ' + value if code == opcodes.NOT else 'len(' + value + ')',
+                           "'bool'" if code == opcodes.NOT else "'int'")
+            case _:
+                return self.inline_binary(op, code, checked)
+        return True
+
+    # Read symb operands starting at argument first, None if any of them
+    # is neither variable nor valid constant
+    def read_operands(self, operands: list, names: list, first: int = 1):
+        if any(operand.type != 'var' and literal(operand) == None for operand in operands):
+            return None
+        return [self.read(first + index, operand, name)
+                for index, (operand, name) in enumerate(zip(operands, names))]
+
+    def inline_binary(self, op: object, code: int, checked: bool) -> bool:
+        operands = self.read_operands(op.args[1:], ['a', 'b'])
+        if operands == None:
+            return False
+        (value_1, type_1, static_1), (value_2, type_2, static_2) = operands
+        match code:
+            case opcodes.ADD | opcodes.SUB | opcodes.MUL | opcodes.IDIV:
+                result_type = "'int'"
+                condition = self.type_check(operands, ['int', 'int']) if checked else ''
+            case opcodes.AND | opcodes.OR:
+                result_type = "'bool'"
+                condition = self.type_check(operands, ['bool', 'bool']) if checked else ''
+            case opcodes.CONCAT:
+                result_type = "'string'"
+                condition = self.type_check(operands, ['string', 'string']) if checked else ''
+            case opcodes.LT | opcodes.GT | opcodes.EQ:
+                result_type = "'bool'"
+                condition = ''
+                if checked and static_1 != None and static_2 != None:
+                    if static_1 == 'nil' or static_2 == 'nil':
+                        if code != opcodes.EQ:
+                            return False
+                    elif static_1 != static_2:
+                        return False
+                elif checked:
+                    self.emit('if ' + type_1 + " == 'nil' or " + type_2 + " == 'nil':")
+                    if code != opcodes.EQ:
+                        self.emit('    E(' + str(Error.OP_TYPES.value) + ')')
+                    else:
+                        self.emit('    pass')
+                    self.emit('elif ' + type_1 + ' != ' + type_2 + ': E(' +
+                              str(Error.OP_TYPES.value) + ')')
+        if condition == None:
+            return False
+        self.emit_check(condition)
+
+        match code:
+            case opcodes.ADD: value = value_1 + ' + ' + value_2
+            case opcodes.SUB: value = value_1 + ' - ' + value_2
+            case opcodes.MUL: value = value_1 + ' * ' + value_2
+            case opcodes.IDIV:
+                self.emit('if ' + value_2 + ' == 0: E(' + str(Error.OP_VAL.value) + ')')
+                value = value_1 + ' // ' + value_2
+            case opcodes.LT: value = value_1 + ' < ' + value_2
+            case opcodes.GT: value = value_1 + ' > ' + value_2
+            case opcodes.EQ: value = value_1 + ' == ' + value_2
+            case opcodes.AND: value = value_1 + ' and ' + value_2
+            case opcodes.OR: value = value_1 + ' or ' + value_2
+            case opcodes.CONCAT: value = value_1 + ' + ' + value_2
+        self.emit('r = ' + value)
+        if code == opcodes.CONCAT:
+            self.emit('if len(r) > MS: p.string_limit_exceeded()')
+        self.write(op.args[0], 'r', result_type)
+        return True
+
+# Positions where blocks start, jump targets are LABELs and return
+# addresses follow CALLs, so both always start a block
+def block_starts(ops: list) -> list:
+    starts = {0}
+    for position, op in enumerate(ops):
+        if op.code == opcodes.LABEL:
+            starts.add(position)
+        elif op.code in CONTROL:
+            starts.add(position + 1)
+    return sorted(start for start in starts if start < len(ops))
+
+# Source of function of one block. Count of executed instructions is kept
+# in local until the block ends, it is stored to program before handlers
+# which read it and on error, i is number of finished instructions or -1
+# when program already holds it
+def block_source(ops: list, number: int, start: int, end: int) -> str:
+    writer = BlockWriter()
+    executed = 0
+    last = None
+    for position in range(start, end):
+        op = ops[position]
+        writer.position = position
+        if op.code == opcodes.LABEL:
+            continue
+        writer.emit('i = ' + str(executed))
+        if op.code in CONTROL or op.code in FUSED or op.code == opcodes.BREAK:
+            writer.emit('p.instructions_executed = base + ' + str(executed))
+            if op.code == opcodes.BREAK and last != None:
+                writer.emit('p.last_instruction = OPS[' + str(last) + ']')
+            writer.emit('i = -1')
+        if op.code in CONTROL:
+            writer.emit('p.position = ' + str(position + 1))
+            writer.emit('D[' + str(op.code) + '](OPS[' + str(position) + '])')
+            writer.emit('p.instructions_executed += 1')
+            writer.emit('p.last_instruction = OPS[' + str(position) + ']')
+            writer.emit('return BLOCK_AT[p.position]')
+            last = None
+            break
+        mark = len(writer.lines)
+        if op.code not in INLINED or not writer.inline(op):
+            del writer.lines[mark:]
+            writer.emit('D[' + str(op.code) + '](OPS[' + str(position) + '])')
+        executed += 2 if op.code in FUSED else 1
+        last = position
+    else:
+        writer.emit('i = ' + str(executed))
+        if last != None:
+            writer.emit('p.instructions_executed = base + ' + str(executed))
+            writer.emit('p.last_instruction = OPS[' + str(last) + ']')
+        writer.emit('return ' + str(number + 1))
+
+    return ('def block_' + str(number) + '():\n'
+            '    base = p.instructions_executed\n'
+            '    i = 0\n'
+            '    try:\n' +
+            '\n'.join(writer.lines) + '\n'
+            '    except BaseException:\n'
+            '        if i >= 0: p.instructions_executed = base + i\n'
+            '        raise\n')
+
+# Compile blocks of ops once, the code is shared by all runs of program
+def transpile(ops: list) -> tuple:
+    starts = block_starts(ops)
+    sources = []
+    for number, start in enumerate(starts):
+        end = starts[number + 1] if number + 1 < len(starts) else len(ops)
+        sources.append(block_source(ops, number, start, end))
+    sources.append('BLOCKS = [' + ', '.join('block_' + str(number)
+                                           for number in range(len(starts))) + ']\n')
+    block_at = [None] * (len(ops) + 1)
+    for number, start in enumerate(starts):
+        block_at[start] = number
+    block_at[len(ops)] = len(starts)
+    return compile('\n'.join(sources), '<blocks>', 'exec'), block_at
+
+# Functions of blocks bound to one run of program
+def bind(program: object, code: tuple) -> list:
+    code, block_at = code
+    namespace = {'p': program, 'F': program.frames, 'gv': program.frames.global_frame.values,
+                 'gt': program.frames.global_frame.types, 'D': program.dispatch,
+                 'OPS': program.ops, 'DS': program.data_stack, 'SO': program.stdout,
+                 'TO': tool.to_output, 'E': Error.handle_error, 'BLOCK_AT': block_at,
+                 'MS': program.max_string_size if program.max_string_size != None else sys.maxsize}
+    exec(code, namespace)
+    return namespace['BLOCKS']
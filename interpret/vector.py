@@ -0,0 +1,712 @@
+## @file vector.py
+# @brief Lockstep execution of one program over many inputs with NumPy
+# @author Marián Tarageľ
+
+from error import Error, InterpretExit
+from frames import Frame
+import interpret_tools as tool
+import opcodes
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Values of int arrays stay below this bound, so that ADD and SUB of
+# two of them cannot overflow int64, larger values use object arrays
+SAFE_INT = 1 << 62
+SAFE_FACTOR = 1 << 31
+
+# Groups smaller than this run faster as separate scalar programs
+MIN_LANES = 4
+
+# Raised by handlers before they change anything, when any lane of group
+# could behave otherwise than the others or fail, the group then leaves
+# lockstep and its lanes continue as scalar programs from the current op
+class Eject(Exception):
+    pass
+
+# Frame of group, every variable has the same type in all lanes and its
+# values are array with item per lane, nil and variables without value
+# have no array
+class VectorFrame:
+
+    __slots__ = ('values', 'types', 'order')
+
+    def __init__(self, size: int):
+        self.values = [None] * size
+        self.types = [None] * size
+        self.order = []
+
+    def take(self, mask):
+        frame = VectorFrame(0)
+        frame.values = [values[mask] if values is not None else None for values in self.values]
+        frame.types = list(self.types)
+        frame.order = list(self.order)
+        return frame
+
+# Lanes which execute the same op at the same time, elapsed is time the
+# lanes spent in lockstep before the group was split from its parent
+class Group:
+
+    lanes: object
+    position: int
+    executed: int
+    last: object
+    elapsed: float
+    deadline: float
+    global_frame: VectorFrame
+    frame_stack: list
+    temporary_frame: VectorFrame
+    call_stack: list
+    data_stack: list
+
+    def __init__(self, lanes, global_size: int):
+        self.lanes = lanes
+        self.position = 0
+        self.executed = 0
+        self.last = None
+        self.elapsed = 0.0
+        self.deadline = None
+        self.global_frame = VectorFrame(global_size)
+        self.frame_stack = []
+        self.temporary_frame = None
+        self.call_stack = []
+        self.data_stack = []
+
+    # Group of lanes selected by mask
+    def take(self, mask):
+        group = Group(self.lanes[mask], 0)
+        group.position = self.position
+        group.executed = self.executed
+        group.last = self.last
+        group.elapsed = self.elapsed
+        group.global_frame = self.global_frame.take(mask)
+        group.frame_stack = [frame.take(mask) for frame in self.frame_stack]
+        if self.temporary_frame != None:
+            group.temporary_frame = self.temporary_frame.take(mask)
+        group.call_stack = list(self.call_stack)
+        group.data_stack = [(values[mask] if values is not None else None, type)
+                            for values, type in self.data_stack]
+        return group
+
+def is_available() -> bool:
+    return numpy != None
+
+# Array of Python ints, int64 when all of them are small enough
+def int_array(values: list):
+    if all(-SAFE_INT < value < SAFE_INT for value in values):
+        return numpy.array(values, dtype=numpy.int64)
+    return numpy.array(values, dtype=object)
+
+# Keep int64 result in bounds, otherwise compute it again with Python ints
+def checked_int(result, compute, values_1, values_2):
+    if result.dtype == object or len(result) == 0:
+        return result
+    if numpy.abs(result).max() < SAFE_INT:
+        return result
+    return compute(values_1.astype(object), values_2.astype(object))
+
+# Lanes of one program executed in lockstep. Per-lane outputs, exit codes
+# and instruction counts are the same as of separate scalar runs, because
+# every situation in which lanes could differ from scalar run ejects
+# them to the scalar interpret first.
+class VectorRun:
+
+    program: object
+    inputs: list
+    stdouts: list
+    stderrs: list
+    max_depth: int
+    max_call_depth: int
+    max_data_depth: int
+    max_instructions: int
+    time_limit: float
+    exit_codes: list
+    instructions: list
+    finish_times: list
+    start: float
+
+    def __init__(self, program: object, inputs: list, stdouts: list, stderrs: list,
+                 max_depth: int, max_instructions: int = None, time_limit: float = None,
+                 max_call_depth: int = None, max_data_depth: int = None):
+        self.program = program
+        self.inputs = inputs
+        self.stdouts = stdouts
+        self.stderrs = stderrs
+        self.max_depth = max_depth
+        self.max_call_depth = max_call_depth if max_call_depth != None else max_depth
+        self.max_data_depth = max_data_depth if max_data_depth != None else max_depth
+        self.max_instructions = max_instructions
+        self.time_limit = time_limit
+        self.exit_codes = [None] * len(inputs)
+        self.instructions = [0] * len(inputs)
+        self.finish_times = [0.0] * len(inputs)
+        self.handlers = self.build_handlers()
+
+    def build_handlers(self) -> dict:
+        handlers = {
+            opcodes.LABEL: lambda group, op: None,
+            opcodes.MOVE: self.op_move, opcodes.DEFVAR: self.op_defvar,
+            opcodes.CREATEFRAME: self.op_createframe, opcodes.PUSHFRAME: self.op_pushframe,
+            opcodes.POPFRAME: self.op_popframe, opcodes.CALL: self.op_call,
+            opcodes.RETURN: self.op_return, opcodes.PUSHS: self.op_pushs,
+            opcodes.POPS: self.op_pops, opcodes.JUMP: self.op_jump,
+            opcodes.JUMPIFEQ: self.op_jumpif, opcodes.JUMPIFNEQ: self.op_jumpif,
+            opcodes.READ: self.op_read, opcodes.WRITE: self.op_write,
+            opcodes.DPRINT: self.op_write, opcodes.EXIT: self.op_exit,
+            opcodes.CONCAT: self.op_binary, opcodes.STRLEN: self.op_strlen,
+            opcodes.TYPE: self.op_type,
+            opcodes.NOT: self.op_not, opcodes.DEFVAR_MOVE: self.op_defvar_move,
+            opcodes.PUSHS_POPS: self.op_pushs_pops, opcodes.ADD_INT: self.op_binary,
+            opcodes.SUB_INT: self.op_binary, opcodes.LT_JUMPIF: self.op_compare_jumpif,
+            opcodes.GT_JUMPIF: self.op_compare_jumpif, opcodes.EQ_JUMPIF: self.op_compare_jumpif,
+            opcodes.NOT_TYPED: self.op_not, opcodes.STRLEN_TYPED: self.op_strlen,
+            opcodes.ADD_INT_TYPED: self.op_binary, opcodes.SUB_INT_TYPED: self.op_binary,
+            opcodes.LT_JUMPIF_TYPED: self.op_compare_jumpif,
+            opcodes.GT_JUMPIF_TYPED: self.op_compare_jumpif,
+            opcodes.EQ_JUMPIF_TYPED: self.op_compare_jumpif,
+            opcodes.CLEARS: self.op_clears, opcodes.NOTS: self.op_not_stack,
+            opcodes.JUMPIFEQS: self.op_jumpif_stack, opcodes.JUMPIFNEQS: self.op_jumpif_stack}
+        for code in self.STACK_CODES:
+            handlers[code] = self.op_binary_stack
+        for code in (opcodes.ADD, opcodes.SUB, opcodes.MUL, opcodes.IDIV, opcodes.LT,
+                     opcodes.GT, opcodes.EQ, opcodes.AND, opcodes.OR,
+                     opcodes.ADD_TYPED, opcodes.SUB_TYPED, opcodes.MUL_TYPED,
+                     opcodes.IDIV_TYPED, opcodes.LT_TYPED, opcodes.GT_TYPED, opcodes.EQ_TYPED,
+                     opcodes.AND_TYPED, opcodes.OR_TYPED, opcodes.CONCAT_TYPED):
+            handlers[code] = self.op_binary
+        return handlers
+
+    # Run all lanes to the end, returns exit codes and instruction counts
+    def run(self) -> tuple:
+        self.start = time.perf_counter()
+        lanes = numpy.arange(len(self.inputs))
+        groups = [Group(lanes, len(self.program.global_names))]
+        while groups != []:
+            groups.extend(self.run_group(groups.pop()))
+        return self.exit_codes, self.instructions
+
+    # Execute group until it ends, leaves lockstep or splits, returns
+    # groups which continue. Time limit is counted for every lane from
+    # the time its lanes spent running, not waiting for other groups.
+    def run_group(self, group: Group) -> list:
+        ops = self.program.ops
+        ops_count = len(ops)
+        handlers = self.handlers
+        if len(group.lanes) < MIN_LANES:
+            self.eject(group, group.elapsed)
+            return []
+        resumed = time.monotonic()
+        if self.time_limit != None:
+            group.deadline = resumed + self.time_limit - group.elapsed
+        while group.position < ops_count:
+            op = ops[group.position]
+            handler = handlers.get(op.code)
+            if handler == None:
+                self.eject(group, group.elapsed + time.monotonic() - resumed)
+                return []
+            group.position += 1
+            try:
+                groups = handler(group, op)
+            except Eject:
+                group.position -= 1
+                self.eject(group, group.elapsed + time.monotonic() - resumed)
+                return []
+            if op.code != opcodes.LABEL:
+                for continuing in groups if groups != None else (group,):
+                    continuing.executed += 1
+                    continuing.last = op
+            if groups != None:
+                elapsed = group.elapsed + time.monotonic() - resumed
+                for continuing in groups:
+                    continuing.elapsed = elapsed
+                return groups
+        self.finish(group, 0, group.executed)
+        return []
+
+    def finish(self, group: Group, exit_code: int, executed: int) -> None:
+        now = time.perf_counter() - self.start
+        for lane in group.lanes.tolist():
+            self.exit_codes[lane] = exit_code
+            self.instructions[lane] = executed
+            self.finish_times[lane] = now
+
+    # Frame of variable operand, None when it does not exist
+    @staticmethod
+    def get_frame(group: Group, frame: str) -> VectorFrame:
+        match frame:
+            case 'GF':
+                return group.global_frame
+            case 'LF':
+                return group.frame_stack[-1] if group.frame_stack != [] else None
+            case 'TF':
+                return group.temporary_frame
+        return None
+
+    # Values and type of symbol operand
+    def read(self, group: Group, operand: object) -> tuple:
+        count = len(group.lanes)
+        match operand.type:
+            case 'var':
+                frame = self.get_frame(group, operand.frame)
+                if frame == None or operand.slot == None or not frame.types[operand.slot]:
+                    raise Eject()
+                return frame.values[operand.slot], frame.types[operand.slot]
+            case 'int':
+                if type(operand.value) != int:
+                    raise Eject()
+                return int_array([operand.value]).repeat(count), 'int'
+            case 'bool':
+                if type(operand.value) != bool:
+                    raise Eject()
+                return numpy.full(count, operand.value, dtype=bool), 'bool'
+            case 'string':
+                if type(operand.value) != str:
+                    raise Eject()
+                values = numpy.empty(count, dtype=object)
+                values.fill(operand.value)
+                return values, 'string'
+            case 'nil':
+                if operand.value != 'nil':
+                    raise Eject()
+                return None, 'nil'
+        raise Eject()
+
+    # Frame and slot of defined variable written by op
+    def target(self, group: Group, operand: object) -> tuple:
+        if operand.type != 'var':
+            raise Eject()
+        frame = self.get_frame(group, operand.frame)
+        if frame == None or operand.slot == None or frame.types[operand.slot] == None:
+            raise Eject()
+        return frame, operand.slot
+
+    # Operand count of CALL and JUMP is not checked when program is loaded
+    @staticmethod
+    def check_arity(op: object, arity: int) -> None:
+        if len(op.args) != arity:
+            raise Eject()
+
+    # Budget checked by scalar run on backward jumps and calls, lanes
+    # which would exceed it leave lockstep and fail there
+    def check_budget(self, group: Group, counted: int = 0) -> None:
+        if (self.max_instructions != None and
+                group.executed + counted >= self.max_instructions):
+            raise Eject()
+        if group.deadline != None and time.monotonic() > group.deadline:
+            raise Eject()
+
+    # Fused ops count their first instruction before they jump
+    def jump_target(self, group: Group, label: object, jumps: bool = True,
+                    counted: int = 0) -> int:
+        if label.target == None:
+            raise Eject()
+        if jumps and label.target < group.position:
+            self.check_budget(group, counted)
+        return label.target
+
+    # Continue lanes of mask at target and the others after the op
+    def branch(self, group: Group, mask, target: int) -> list:
+        if mask.all():
+            group.position = target
+            return None
+        if not mask.any():
+            return None
+        jumping = group.take(mask)
+        jumping.position = target
+        return [jumping, group.take(~mask)]
+
+    def op_move(self, group: Group, op: object) -> None:
+        values, type = self.read(group, op.args[1])
+        frame, slot = self.target(group, op.args[0])
+        frame.values[slot] = values
+        frame.types[slot] = type
+
+    def op_defvar(self, group: Group, op: object) -> None:
+        var = op.args[0]
+        frame = self.get_frame(group, var.frame)
+        if var.type != 'var' or frame == None or var.slot == None or frame.types[var.slot] != None:
+            raise Eject()
+        frame.types[var.slot] = ''
+        frame.order.append(var.slot)
+
+    def op_createframe(self, group: Group, op: object) -> None:
+        group.temporary_frame = VectorFrame(len(self.program.local_names))
+
+    def op_pushframe(self, group: Group, op: object) -> None:
+        if group.temporary_frame == None or len(group.frame_stack) >= self.max_depth:
+            raise Eject()
+        group.frame_stack.append(group.temporary_frame)
+        group.temporary_frame = None
+
+    def op_popframe(self, group: Group, op: object) -> None:
+        if group.frame_stack == []:
+            raise Eject()
+        group.temporary_frame = group.frame_stack.pop()
+
+    def op_call(self, group: Group, op: object) -> None:
+        self.check_arity(op, 1)
+        if len(group.call_stack) >= self.max_call_depth:
+            raise Eject()
+        target = self.jump_target(group, op.args[0], False)
+        self.check_budget(group)
+        group.call_stack.append(group.position)
+        group.position = target
+
+    def op_return(self, group: Group, op: object) -> None:
+        if group.call_stack == []:
+            raise Eject()
+        group.position = group.call_stack.pop()
+
+    def op_pushs(self, group: Group, op: object) -> None:
+        values, type = self.read(group, op.args[0])
+        if len(group.data_stack) >= self.max_data_depth:
+            raise Eject()
+        group.data_stack.append((values, type))
+
+    def op_pops(self, group: Group, op: object) -> None:
+        if group.data_stack == []:
+            raise Eject()
+        frame, slot = self.target(group, op.args[0])
+        frame.values[slot], frame.types[slot] = group.data_stack.pop()
+
+    def op_jump(self, group: Group, op: object) -> None:
+        self.check_arity(op, 1)
+        group.position = self.jump_target(group, op.args[0])
+
+    # Equality of two symbols, nil is compared with its value 'nil'
+    # like in scalar run
+    @staticmethod
+    def equal(values_1, type_1: str, values_2, type_2: str, count: int):
+        if type_1 == 'nil' and type_2 == 'nil':
+            return numpy.ones(count, dtype=bool)
+        if type_1 == 'nil' or type_2 == 'nil':
+            values, type = (values_2, type_2) if type_1 == 'nil' else (values_1, type_1)
+            if type != 'string':
+                return numpy.zeros(count, dtype=bool)
+            return (values == 'nil').astype(bool)
+        return (values_1 == values_2).astype(bool)
+
+    def op_jumpif(self, group: Group, op: object) -> list:
+        values_1, type_1 = self.read(group, op.args[1])
+        values_2, type_2 = self.read(group, op.args[2])
+        if type_1 != type_2 and type_1 != 'nil' and type_2 != 'nil':
+            raise Eject()
+        mask = self.equal(values_1, type_1, values_2, type_2, len(group.lanes))
+        if op.code == opcodes.JUMPIFNEQ:
+            mask = ~mask
+        target = self.jump_target(group, op.args[0], mask.any())
+        return self.branch(group, mask, target)
+
+    # Result of binary op on values of the same type, raises Eject when
+    # it fails in any lane
+    def compute(self, code: int, values_1, type_1: str, values_2, type_2: str, count: int):
+        match code:
+            case opcodes.ADD | opcodes.SUB | opcodes.MUL | opcodes.IDIV:
+                if type_1 != 'int' or type_2 != 'int':
+                    raise Eject()
+                match code:
+                    case opcodes.ADD:
+                        return checked_int(values_1 + values_2, lambda a, b: a + b,
+                                           values_1, values_2), 'int'
+                    case opcodes.SUB:
+                        return checked_int(values_1 - values_2, lambda a, b: a - b,
+                                           values_1, values_2), 'int'
+                    case opcodes.MUL:
+                        if (values_1.dtype != object and values_2.dtype != object and
+                                numpy.abs(values_1).max() < SAFE_FACTOR and
+                                numpy.abs(values_2).max() < SAFE_FACTOR):
+                            return values_1 * values_2, 'int'
+                        return values_1.astype(object) * values_2.astype(object), 'int'
+                    case opcodes.IDIV:
+                        if (values_2 == 0).any():
+                            raise Eject()
+                        return checked_int(values_1 // values_2, lambda a, b: a // b,
+                                           values_1, values_2), 'int'
+            case opcodes.LT | opcodes.GT:
+                if type_1 != type_2 or type_1 == 'nil':
+                    raise Eject()
+                if code == opcodes.LT:
+                    return (values_1 < values_2).astype(bool), 'bool'
+                return (values_1 > values_2).astype(bool), 'bool'
+            case opcodes.EQ:
+                if type_1 != type_2 and type_1 != 'nil' and type_2 != 'nil':
+                    raise Eject()
+                return self.equal(values_1, type_1, values_2, type_2, count), 'bool'
+            case opcodes.AND | opcodes.OR:
+                if type_1 != 'bool' or type_2 != 'bool':
+                    raise Eject()
+                if code == opcodes.AND:
+                    return values_1 & values_2, 'bool'
+                return values_1 | values_2, 'bool'
+            case opcodes.CONCAT:
+                if type_1 != 'string' or type_2 != 'string':
+                    raise Eject()
+                return values_1 + values_2, 'string'
+        raise Eject()
+
+    # Typed ops are computed like their base ops, checks never fail for them
+    BASE_CODES = {
+        opcodes.ADD_TYPED: opcodes.ADD, opcodes.SUB_TYPED: opcodes.SUB,
+        opcodes.MUL_TYPED: opcodes.MUL, opcodes.IDIV_TYPED: opcodes.IDIV,
+        opcodes.LT_TYPED: opcodes.LT, opcodes.GT_TYPED: opcodes.GT, opcodes.EQ_TYPED: opcodes.EQ,
+        opcodes.AND_TYPED: opcodes.AND, opcodes.OR_TYPED: opcodes.OR,
+        opcodes.CONCAT_TYPED: opcodes.CONCAT, opcodes.ADD_INT: opcodes.ADD,
+        opcodes.SUB_INT: opcodes.SUB, opcodes.ADD_INT_TYPED: opcodes.ADD,
+        opcodes.SUB_INT_TYPED: opcodes.SUB, opcodes.LT_JUMPIF: opcodes.LT,
+        opcodes.GT_JUMPIF: opcodes.GT, opcodes.EQ_JUMPIF: opcodes.EQ,
+        opcodes.LT_JUMPIF_TYPED: opcodes.LT, opcodes.GT_JUMPIF_TYPED: opcodes.GT,
+        opcodes.EQ_JUMPIF_TYPED: opcodes.EQ}
+
+    def op_binary(self, group: Group, op: object) -> None:
+        values_1, type_1 = self.read(group, op.args[1])
+        values_2, type_2 = self.read(group, op.args[2])
+        frame, slot = self.target(group, op.args[0])
+        code = self.BASE_CODES.get(op.code, op.code)
+        frame.values[slot], frame.types[slot] = self.compute(
+            code, values_1, type_1, values_2, type_2, len(group.lanes))
+
+    def op_not(self, group: Group, op: object) -> None:
+        values, type = self.read(group, op.args[1])
+        if type != 'bool':
+            raise Eject()
+        frame, slot = self.target(group, op.args[0])
+        frame.values[slot], frame.types[slot] = ~values, 'bool'
+
+    def op_strlen(self, group: Group, op: object) -> None:
+        values, type = self.read(group, op.args[1])
+        if type != 'string':
+            raise Eject()
+        frame, slot = self.target(group, op.args[0])
+        lengths = numpy.fromiter(map(len, values), dtype=numpy.int64, count=len(values))
+        frame.values[slot], frame.types[slot] = lengths, 'int'
+
+    # Type is the same in all lanes, variable without value has empty type
+    def op_type(self, group: Group, op: object) -> None:
+        symb = op.args[1]
+        type = symb.type
+        if type == 'var':
+            frame = self.get_frame(group, symb.frame)
+            if frame == None or symb.slot == None or frame.types[symb.slot] == None:
+                raise Eject()
+            type = frame.types[symb.slot]
+        frame, slot = self.target(group, op.args[0])
+        values = numpy.empty(len(group.lanes), dtype=object)
+        values.fill(type)
+        frame.values[slot], frame.types[slot] = values, 'string'
+
+    # Compare, store result and jump when it equals the constant
+    def op_compare_jumpif(self, group: Group, op: object) -> list:
+        var, symb_1, symb_2, label, jump_on = op.args
+        values_1, type_1 = self.read(group, symb_1)
+        values_2, type_2 = self.read(group, symb_2)
+        frame, slot = self.target(group, var)
+        code = self.BASE_CODES[op.code]
+        values, type = self.compute(code, values_1, type_1, values_2, type_2, len(group.lanes))
+        mask = values == jump_on.value
+        target = self.jump_target(group, label, mask.any(), 1)
+        frame.values[slot], frame.types[slot] = values, type
+        group.executed += 1
+        return self.branch(group, mask, target)
+
+    def op_defvar_move(self, group: Group, op: object) -> None:
+        var, symb = op.args
+        frame = self.get_frame(group, var.frame)
+        if frame == None or var.slot == None or frame.types[var.slot] != None:
+            raise Eject()
+        if symb.type == 'var' and symb.frame == var.frame and symb.slot == var.slot:
+            raise Eject()
+        values, type = self.read(group, symb)
+        frame.types[var.slot] = ''
+        frame.order.append(var.slot)
+        group.executed += 1
+        frame.values[var.slot], frame.types[var.slot] = values, type
+
+    def op_pushs_pops(self, group: Group, op: object) -> None:
+        values, type = self.read(group, op.args[1])
+        if len(group.data_stack) >= self.max_data_depth:
+            raise Eject()
+        frame, slot = self.target(group, op.args[0])
+        group.executed += 1
+        frame.values[slot], frame.types[slot] = values, type
+
+    # Stack extension ops take operands from data stack of group, they are
+    # removed only after the result is known
+
+    STACK_CODES = {
+        opcodes.ADDS: opcodes.ADD, opcodes.SUBS: opcodes.SUB, opcodes.MULS: opcodes.MUL,
+        opcodes.IDIVS: opcodes.IDIV, opcodes.LTS: opcodes.LT, opcodes.GTS: opcodes.GT,
+        opcodes.EQS: opcodes.EQ, opcodes.ANDS: opcodes.AND, opcodes.ORS: opcodes.OR}
+
+    def stack_operands(self, group: Group, count: int) -> list:
+        if len(group.data_stack) < count:
+            raise Eject()
+        return group.data_stack[-count:]
+
+    def op_clears(self, group: Group, op: object) -> None:
+        group.data_stack.clear()
+
+    def op_binary_stack(self, group: Group, op: object) -> None:
+        (values_1, type_1), (values_2, type_2) = self.stack_operands(group, 2)
+        result = self.compute(self.STACK_CODES[op.code], values_1, type_1, values_2, type_2,
+                              len(group.lanes))
+        del group.data_stack[-2:]
+        group.data_stack.append(result)
+
+    def op_not_stack(self, group: Group, op: object) -> None:
+        (values, type), = self.stack_operands(group, 1)
+        if type != 'bool':
+            raise Eject()
+        group.data_stack[-1] = (~values, 'bool')
+
+    def op_jumpif_stack(self, group: Group, op: object) -> list:
+        (values_1, type_1), (values_2, type_2) = self.stack_operands(group, 2)
+        if type_1 != type_2 and type_1 != 'nil' and type_2 != 'nil':
+            raise Eject()
+        mask = self.equal(values_1, type_1, values_2, type_2, len(group.lanes))
+        if op.code == opcodes.JUMPIFNEQS:
+            mask = ~mask
+        target = self.jump_target(group, op.args[0], mask.any())
+        del group.data_stack[-2:]
+        return self.branch(group, mask, target)
+
+    # Text of values as written by WRITE
+    @staticmethod
+    def to_output(values, type: str, count: int) -> list:
+        match type:
+            case 'string':
+                return values.tolist()
+            case 'int':
+                return [str(value) for value in values.tolist()]
+            case 'bool':
+                return ['true' if value else 'false' for value in values.tolist()]
+        return [''] * count
+
+    def op_write(self, group: Group, op: object) -> None:
+        values, type = self.read(group, op.args[0])
+        streams = self.stdouts if op.code == opcodes.WRITE else self.stderrs
+        texts = self.to_output(values, type, len(group.lanes))
+        for lane, text in zip(group.lanes.tolist(), texts):
+            streams[lane].write(text)
+
+    # Lines are read in every lane, lanes which read nil form a new group
+    def op_read(self, group: Group, op: object) -> list:
+        type = op.args[1].value
+        if type != 'int' and type != 'string' and type != 'bool':
+            raise Eject()
+        frame, slot = self.target(group, op.args[0])
+        values = []
+        for lane in group.lanes.tolist():
+            value = self.inputs[lane].readline()
+            if value != None:
+                value = tool.convert_input(type, value)
+                if type == 'string' and value != None:
+                    value = value.strip()
+            values.append(value)
+        is_nil = numpy.fromiter((value == None for value in values), dtype=bool,
+                                count=len(values))
+        if is_nil.all():
+            frame.values[slot], frame.types[slot] = None, 'nil'
+            return None
+        if is_nil.any():
+            values = [value for value in values if value != None]
+            nil_group = group.take(is_nil)
+            group = group.take(~is_nil)
+            frame, slot = self.target(nil_group, op.args[0])
+            frame.values[slot], frame.types[slot] = None, 'nil'
+            frame, slot = self.target(group, op.args[0])
+            self.store_read(frame, slot, values, type)
+            return [nil_group, group]
+        self.store_read(frame, slot, values, type)
+        return None
+
+    @staticmethod
+    def store_read(frame: VectorFrame, slot: int, values: list, type: str) -> None:
+        match type:
+            case 'int':
+                frame.values[slot] = int_array(values)
+            case 'bool':
+                frame.values[slot] = numpy.array(values, dtype=bool)
+            case 'string':
+                strings = numpy.empty(len(values), dtype=object)
+                strings[:] = values
+                frame.values[slot] = strings
+        frame.types[slot] = type
+
+    # EXIT ends lanes without counting the op, like sys.exit in scalar run
+    def op_exit(self, group: Group, op: object) -> list:
+        values, type = self.read(group, op.args[0])
+        if type != 'int' or not ((values >= 0) & (values <= 49)).all():
+            raise Eject()
+        now = time.perf_counter() - self.start
+        for lane, value in zip(group.lanes.tolist(), values.tolist()):
+            self.exit_codes[lane] = value
+            self.instructions[lane] = group.executed
+            self.finish_times[lane] = now
+        return []
+
+    # Continue lanes of group as scalar programs from state of group, elapsed
+    # is time the lanes already ran. Every lane gets the rest of its time
+    # limit from the time it starts, not waiting for lanes before it, lanes
+    # without time left end with the time limit error without running
+    def eject(self, group: Group, elapsed: float) -> None:
+        remaining = self.time_limit - elapsed if self.time_limit != None else None
+        for index, lane in enumerate(group.lanes.tolist()):
+            program = self.program.clone(self.inputs[lane], self.max_depth,
+                                         self.stdouts[lane], self.stderrs[lane])
+            program.call_stack.max_depth = self.max_call_depth
+            program.data_stack.max_depth = self.max_data_depth
+            program.max_instructions = self.max_instructions
+            program.time_limit = self.time_limit
+            frames = program.frames
+            frames.global_frame = scalar_frame(group.global_frame, index)
+            frames.frame_stack.items = [scalar_frame(frame, index) for frame in group.frame_stack]
+            if group.temporary_frame != None:
+                frames.temporary_frame = scalar_frame(group.temporary_frame, index)
+            program.call_stack.items = list(group.call_stack)
+            program.data_stack.items = [scalar_value(values, type, index)
+                                        for values, type in group.data_stack]
+            program.position = group.position
+            program.instructions_executed = group.executed
+            program.last_instruction = group.last
+            try:
+                if remaining != None:
+                    if remaining <= 0:
+                        Error.handle_error(Error.RESOURCE.value,
+                                           "time limit " + str(self.time_limit) + " s exceeded")
+                    program.deadline = time.monotonic() + remaining
+                program.run()
+                exit_code = 0
+            except InterpretExit as error:
+                exit_code = error.code
+                if error.message != None:
+                    self.stderrs[lane].write("Error: " + error.message + "\n")
+            except SystemExit as exit:
+                exit_code = exit.code
+            self.exit_codes[lane] = exit_code
+            self.instructions[lane] = program.instructions_executed
+            self.finish_times[lane] = time.perf_counter() - self.start
+
+# Value and type of lane in scalar representation
+def scalar_value(values, type: str, index: int) -> tuple:
+    match type:
+        case 'int':
+            return int(values[index]), type
+        case 'bool':
+            return bool(values[index]), type
+        case 'string':
+            return values[index], type
+        case 'nil':
+            return 'nil', type
+    return None, type
+
+def scalar_frame(frame: VectorFrame, index: int) -> Frame:
+    scalar = Frame(0)
+    scalar.values = []
+    scalar.types = list(frame.types)
+    scalar.order = list(frame.order)
+    for values, type in zip(frame.values, frame.types):
+        scalar.values.append(scalar_value(values, type, index)[0])
+    return scalar
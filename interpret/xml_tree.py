@@ -4,10 +4,30 @@
 
 from error import Error
 import re
+import xml.etree.ElementTree as ET
 from instruction import Instruction
 from argument import Argument
+import opcodes
 import interpret_tools as tool
 
+# Parse XML incrementally, yield root element as soon as it starts and
+# then every child of root once it is complete, consumed children are
+# removed from the tree so memory stays bounded
+def iterparse_program(source):
+    depth = 0
+    root = None
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if depth == 1:
+                root = element
+                yield root
+        else:
+            depth -= 1
+            if depth == 1:
+                yield element
+                root.remove(element)
+
 def check_program_element(program: object) -> None:
     if (program.tag != 'program' or
         program.attrib.get('language') != 'IPPcode23'):
@@ -24,12 +44,7 @@ def check_element_instruction(ins: object):
         Error.handle_error(Error.XML_STRUCT.value)
     
     opcode = opcode.upper()
-    if opcode not in ['MOVE', 'CREATEFRAME', 'PUSHFRAME', 'POPFRAME', 'DEFVAR',
-                      'CALL', 'RETURN', 'PUSHS', 'POPS', 'ADD', 'SUB', 'MUL',
-                      'IDIV', 'LT', 'GT', 'EQ', 'AND', 'OR', 'NOT', 'INT2CHAR',
-                      'STRI2INT', 'READ', 'WRITE', 'CONCAT', 'STRLEN',
-                      'GETCHAR', 'SETCHAR', 'TYPE', 'LABEL', 'JUMP', 'JUMPIFEQ',
-                      'JUMPIFNEQ', 'EXIT', 'DPRINT', 'BREAK']:
+    if opcode not in opcodes.CODES:
         Error.handle_error(Error.XML_STRUCT.value)
 
     instruction = Instruction(opcode, int(order))
@@ -47,13 +62,18 @@ def check_element_arg(arg: object):
     if value == None:
         value = ''
 
+    argument = convert_argument(type, value)
+    argument.add_argument_position(arg.tag)
+    return argument
+
+# Argument with value converted from its text representation, shared
+# with parser of IPPcode23 source so both front ends load the same values
+def convert_argument(type: str, value: str):
     if type == 'string':
-        value = value.strip()
+        value = tool.decode_escapes(value.strip())
 
     value = tool.convert(type, value)
     if value == None:
         Error.handle_error(Error.XML_STRUCT.value)
 
-    argument = Argument(type, value)
-    argument.add_argument_position(arg.tag)
-    return argument
\ No newline at end of file
+    return Argument(type, value)
\ No newline at end of file
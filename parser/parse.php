@@ -442,6 +442,9 @@ while ($line = fgets(STDIN)) {
             $parser->check_opcode_var_symb_symb($token_array),
         "READ" => $parser->check_opcode_var_type($token_array),
         "JUMPIFEQ", "JUMPIFNEQ" => $parser->check_opcode_label_symb_symb($token_array),
+        "CLEARS", "ADDS", "SUBS", "MULS", "IDIVS", "LTS", "GTS", "EQS", "ANDS", "ORS", "NOTS",
+        "INT2CHARS", "STRI2INTS" => $parser->check_opcode($token_array),
+        "JUMPIFEQS", "JUMPIFNEQS" => $parser->check_opcode_label($token_array),
         default => $parser->error_handler(22)
     };
     
@@ -0,0 +1,47 @@
+## @file support.py
+# @brief Running IPPcode23 programs of tests with different settings
+# @author Marián Tarageľ
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'interpret'))
+
+import api
+from input_provider import MemoryInput
+from output import Output
+from stack import DEFAULT_MAX_DEPTH
+import vector
+
+# Load program from IPPcode23 source as interpreter with given settings does
+def load(source: str, opt_level: int = 0, engine: str = 'loop'):
+    interpreter = api.Interpreter(None, opt_level, engine, 'ippcode')
+    return interpreter.load(source.encode('utf-8'))
+
+# Stdout, stderr and exit code of one run of program
+def run(source: str, input: str = '', opt_level: int = 0, engine: str = 'loop',
+        **options) -> tuple:
+    interpreter = api.Interpreter(None, opt_level, engine, 'ippcode')
+    result = interpreter.run(source.encode('utf-8'), input, **options)
+    return result.stdout, result.stderr, result.exit_code
+
+# Stdout, stderr and exit code of runs with every input, vector engine
+# runs all of them in lockstep as --input-dir does
+def run_inputs(source: str, inputs: list, opt_level: int = 0, engine: str = 'loop',
+               max_instructions: int = None, time_limit: float = None) -> list:
+    if engine != 'vector':
+        return [run(source, input, opt_level, engine, max_instructions=max_instructions,
+                    time_limit=time_limit) for input in inputs]
+    program = load(source, opt_level, engine)
+    stdouts = [io.StringIO() for input in inputs]
+    stderrs = [io.StringIO() for input in inputs]
+    lanes = vector.VectorRun(program, [MemoryInput(input) for input in inputs],
+                             [Output(stream) for stream in stdouts],
+                             [Output(stream) for stream in stderrs], DEFAULT_MAX_DEPTH,
+                             max_instructions, time_limit)
+    exit_codes, _ = lanes.run()
+    Output.flush_all()
+    return [(stdout.getvalue(), stderr.getvalue(), exit_code)
+            for stdout, stderr, exit_code in zip(stdouts, stderrs, exit_codes)]
@@ -0,0 +1,44 @@
+## @file test_batch.py
+# @brief Exit codes of test cases run by batch runner
+# @author Marián Tarageľ
+
+import json
+import os
+import tempfile
+import unittest
+import support
+import batch
+
+PROGRAM = '''<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+  <instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@a</arg1></instruction>
+  <instruction order="2" opcode="READ"><arg1 type="var">GF@a</arg1><arg2 type="type">int</arg2></instruction>
+  <instruction order="3" opcode="WRITE"><arg1 type="var">GF@a</arg1></instruction>
+</program>
+'''
+
+class BatchTest(unittest.TestCase):
+
+    # Missing source or input is reported as input file error of
+    # interpret.py, not as internal error
+    def test_missing_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'read.src'), 'w') as file:
+                file.write(PROGRAM)
+            with open(os.path.join(directory, 'read.in'), 'w') as file:
+                file.write('5\n')
+            items = [{'name': 'present', 'source': 'read.src', 'input': 'read.in'},
+                     {'name': 'missing_input', 'source': 'read.src', 'input': 'missing.in',
+                      'rc': 11},
+                     {'name': 'missing_source', 'source': 'missing.src', 'rc': 11}]
+            manifest = os.path.join(directory, 'manifest.jsonl')
+            with open(manifest, 'w') as file:
+                file.writelines(json.dumps(item) + '\n' for item in items)
+            results = batch.run_cases(batch.cases_from_manifest(manifest), 1, batch.Options())
+        codes = {result['name']: result['exit_code'] for result in results}
+        self.assertEqual(codes, {'present': 0, 'missing_input': 11, 'missing_source': 11})
+        self.assertTrue(all(result['passed'] for result in results))
+        self.assertEqual([result['stderr'] for result in results], [''] * 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+## @file test_break.py
+# @brief Frames printed by BREAK
+# @author Marián Tarageľ
+
+import unittest
+import support
+
+# Variables are defined in other order than they are written in code,
+# LF gets y after x and w from the frame pushed by PUSHFRAME
+PROGRAM = '''.IPPcode23
+JUMP second
+LABEL first
+DEFVAR GF@a
+MOVE GF@a int@1
+CREATEFRAME
+JUMP local
+LABEL second
+DEFVAR GF@b
+JUMP first
+LABEL temporary
+DEFVAR TF@y
+PUSHFRAME
+CREATEFRAME
+DEFVAR TF@z
+BREAK
+EXIT int@0
+LABEL local
+DEFVAR TF@x
+DEFVAR TF@w
+JUMP temporary
+'''
+
+FRAMES = '''Global frame:
+{'b': None, 'a': '1'}
+
+Local frame:
+{'x': None, 'w': None, 'y': None}
+
+Temporary frame:
+{'z': None}
+'''
+
+class BreakTest(unittest.TestCase):
+
+    # Variables of every frame are listed in order DEFVAR defined them
+    def test_definition_order(self):
+        for engine in ('loop', 'block', 'vector'):
+            for level in (0, 1, 2):
+                with self.subTest(engine=engine, level=level):
+                    stdout, _, exit_code = support.run(PROGRAM, '', level, engine)
+                    self.assertIn(FRAMES, stdout)
+                    self.assertEqual(exit_code, 0)
+
+    # Reused frame does not keep variables of the previous one
+    def test_reused_frame(self):
+        source = '''.IPPcode23
+CREATEFRAME
+DEFVAR TF@a
+DEFVAR TF@b
+CREATEFRAME
+DEFVAR TF@b
+BREAK
+'''
+        stdout, _, _ = support.run(source)
+        self.assertIn("Temporary frame:\n{'b': None}\n", stdout)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+## @file test_engines.py
+# @brief Conformance of block engine with loop engine
+# @author Marián Tarageľ
+
+import unittest
+import support
+
+FUNCTIONS = '''.IPPcode23
+DEFVAR GF@n
+DEFVAR GF@r
+READ GF@n int
+MOVE GF@r int@1
+CALL fact
+WRITE GF@r
+WRITE string@\\010
+CREATEFRAME
+DEFVAR TF@s
+MOVE TF@s string@ab
+PUSHFRAME
+CALL twice
+POPFRAME
+WRITE TF@s
+EXIT int@0
+LABEL fact
+JUMPIFEQ fact_end GF@n int@0
+MUL GF@r GF@r GF@n
+SUB GF@n GF@n int@1
+CALL fact
+LABEL fact_end
+RETURN
+LABEL twice
+CONCAT LF@s LF@s LF@s
+RETURN
+'''
+
+MIDDLE_OF_BLOCK = '''.IPPcode23
+DEFVAR GF@i
+DEFVAR GF@s
+DEFVAR GF@c
+MOVE GF@i int@0
+MOVE GF@s string@
+JUMPIFEQ inside GF@i int@0
+WRITE string@skipped
+LABEL inside
+CONCAT GF@s GF@s string@x
+ADD GF@i GF@i int@1
+LT GF@c GF@i int@3
+WRITE GF@i
+JUMPIFNEQ inside GF@i int@4
+WRITE GF@s
+'''
+
+DEBUG = '''.IPPcode23
+DEFVAR GF@a
+MOVE GF@a int@7
+DPRINT GF@a
+PUSHS GF@a
+CREATEFRAME
+DEFVAR TF@b
+BREAK
+WRITE GF@a
+DPRINT string@done
+'''
+
+STACK = '''.IPPcode23
+DEFVAR GF@x
+PUSHS int@6
+PUSHS int@7
+MULS
+PUSHS int@42
+JUMPIFEQS equal
+WRITE string@different
+LABEL equal
+PUSHS string@a
+POPS GF@x
+WRITE GF@x
+'''
+
+# Programs failing at runtime with every code from 52 to 58, output
+# written before the error has to be the same too
+ERRORS = {
+    52: '''.IPPcode23
+WRITE string@before
+JUMP nowhere
+''',
+    53: '''.IPPcode23
+DEFVAR GF@a
+WRITE string@before
+ADD GF@a int@1 string@x
+''',
+    54: '''.IPPcode23
+WRITE string@before
+WRITE GF@missing
+''',
+    55: '''.IPPcode23
+WRITE string@before
+DEFVAR LF@a
+''',
+    56: '''.IPPcode23
+DEFVAR GF@a
+WRITE string@before
+WRITE GF@a
+''',
+    57: '''.IPPcode23
+DEFVAR GF@a
+WRITE string@before
+IDIV GF@a int@1 int@0
+''',
+    58: '''.IPPcode23
+DEFVAR GF@a
+WRITE string@before
+GETCHAR GF@a string@abc int@3
+'''}
+
+class EnginesTest(unittest.TestCase):
+
+    # Block engine at every level gives the same stdout, stderr and exit
+    # code as loop engine without optimizations
+    def assert_same(self, source: str, input: str, exit_code: int):
+        expected = support.run(source, input, 0, 'loop')
+        self.assertEqual(expected[2], exit_code)
+        for level in (0, 1, 2):
+            with self.subTest(level=level):
+                self.assertEqual(support.run(source, input, level, 'block'), expected)
+
+    def test_call_return_across_blocks(self):
+        self.assert_same(FUNCTIONS, '5\n', 0)
+
+    def test_jump_into_middle_of_block(self):
+        self.assert_same(MIDDLE_OF_BLOCK, '', 0)
+
+    def test_break_dprint(self):
+        self.assert_same(DEBUG, '', 0)
+
+    # Code point too large for C long fails as any other invalid one
+    def test_int2char_overflow(self):
+        source = '''.IPPcode23
+DEFVAR GF@a
+WRITE string@before
+INT2CHAR GF@a int@99999999999999999999
+'''
+        self.assert_same(source, '', 58)
+
+    def test_exit(self):
+        for code in (0, 7, 49):
+            with self.subTest(code=code):
+                source = '.IPPcode23\nWRITE string@before\nEXIT int@' + str(code) + '\nWRITE string@after\n'
+                self.assert_same(source, '', code)
+
+    def test_exit_invalid_value(self):
+        self.assert_same('.IPPcode23\nWRITE string@before\nEXIT int@50\n', '', 57)
+
+    def test_stack_instructions(self):
+        self.assert_same(STACK, '', 0)
+
+    def test_runtime_errors(self):
+        for code, source in ERRORS.items():
+            with self.subTest(code=code):
+                self.assert_same(source, '', code)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+## @file test_fold.py
+# @brief Constant folding of optimizer against unoptimized execution
+# @author Marián Tarageľ
+
+import unittest
+import support
+import opcodes
+
+# CONCAT of constants exceeds the limit before anything is written,
+# STRLEN of its result is still folded
+CONCAT = '''.IPPcode23
+DEFVAR GF@s
+DEFVAR GF@n
+CONCAT GF@s string@abc string@def
+STRLEN GF@n GF@s
+WRITE GF@n
+WRITE GF@s
+'''
+
+# Dead code before CALL is dropped, BREAK in the function still reports
+# return address of the loaded program
+DEAD_CODE = '''.IPPcode23
+DEFVAR GF@a
+JUMP start
+WRITE string@dead
+MOVE GF@a int@1
+WRITE GF@a
+ADD GF@a GF@a int@2
+LABEL start
+MOVE GF@a int@3
+CALL f
+WRITE GF@a
+EXIT int@0
+WRITE string@dead
+LABEL f
+BREAK
+RETURN
+'''
+
+class FoldTest(unittest.TestCase):
+
+    # Program gives the same stdout, stderr and exit code at every level
+    # and with both engines
+    def assert_same(self, source: str, exit_code: int, **options):
+        expected = support.run(source, '', 0, **options)
+        self.assertEqual(expected[2], exit_code)
+        for engine in ('loop', 'block'):
+            for level in (1, 2):
+                with self.subTest(engine=engine, level=level):
+                    self.assertEqual(support.run(source, '', level, engine, **options), expected)
+
+    def test_concat_string_limit(self):
+        self.assert_same(CONCAT, 60, max_string_size=5)
+
+    def test_concat_within_string_limit(self):
+        self.assert_same(CONCAT, 0, max_string_size=6)
+        self.assert_same(CONCAT, 0)
+
+    def test_concat_result_known(self):
+        ops = support.load(CONCAT, 1).ops
+        self.assertEqual([op.code for op in ops[2:4]], [opcodes.CONCAT, opcodes.MOVE])
+        self.assertEqual(ops[3].args[1].value, 6)
+
+    def test_dead_code_before_call(self):
+        self.assertLess(len(support.load(DEAD_CODE, 1).ops), len(support.load(DEAD_CODE, 0).ops))
+        self.assert_same(DEAD_CODE, 0)
+        self.assertIn('Call stack:\n[9]\n', support.run(DEAD_CODE)[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,248 @@
+## @file test_peephole.py
+# @brief Fused instructions of optimizer against unoptimized execution
+# @author Marián Tarageľ
+
+import unittest
+import support
+import opcodes
+
+# Global variables a and b read from input, c and u defined without value
+PROLOGUE = '''.IPPcode23
+DEFVAR GF@a
+DEFVAR GF@b
+DEFVAR GF@c
+DEFVAR GF@u
+DEFVAR GF@s
+MOVE GF@s string@text
+READ GF@a int
+READ GF@b int
+'''
+
+class PeepholeTest(unittest.TestCase):
+
+    # Program gives the same stdout, stderr and exit code at every level,
+    # fused is code of op which level 1 has to create
+    def assert_same(self, source: str, input: str, fused: int, exit_code: int, **options):
+        codes = [op.code for op in support.load(source, 1).ops]
+        self.assertIn(fused, codes)
+        expected = support.run(source, input, 0, **options)
+        self.assertEqual(expected[2], exit_code)
+        for level in (1, 2):
+            with self.subTest(level=level):
+                self.assertEqual(support.run(source, input, level, **options), expected)
+
+    # LT/GT/EQ into temporary followed by JUMPIFEQ/JUMPIFNEQ
+
+    def test_compare_jump_loop(self):
+        source = PROLOGUE + '''
+LABEL loop
+LT GF@c GF@a GF@b
+JUMPIFEQ end GF@c bool@false
+WRITE GF@a
+ADD GF@a GF@a int@1
+JUMP loop
+LABEL end
+WRITE GF@c
+BREAK
+'''
+        self.assert_same(source, '1\n5\n', opcodes.LT_JUMPIF, 0)
+
+    def test_compare_jump_constant_first(self):
+        source = PROLOGUE + '''
+GT GF@c GF@a GF@b
+JUMPIFNEQ skip bool@true GF@c
+WRITE string@greater
+LABEL skip
+EQ GF@c GF@a nil@nil
+JUMPIFEQ end bool@false GF@c
+WRITE string@nil
+LABEL end
+BREAK
+'''
+        for input in ('7\n3\n', '3\n7\n'):
+            with self.subTest(input=input):
+                self.assert_same(source, input, opcodes.GT_JUMPIF, 0)
+
+    def test_compare_jump_undefined_variable(self):
+        source = PROLOGUE + '''
+WRITE string@before
+LT GF@c GF@a GF@missing
+JUMPIFEQ end GF@c bool@true
+LABEL end
+'''
+        self.assert_same(source, '1\n2\n', opcodes.LT_JUMPIF, 54)
+
+    def test_compare_jump_type_mismatch(self):
+        source = PROLOGUE + '''
+WRITE string@before
+EQ GF@c GF@a GF@s
+JUMPIFEQ end GF@c bool@true
+LABEL end
+'''
+        self.assert_same(source, '1\n2\n', opcodes.EQ_JUMPIF, 53)
+
+    def test_compare_jump_missing_value(self):
+        source = PROLOGUE + '''
+WRITE string@before
+GT GF@c GF@u GF@a
+JUMPIFEQ end GF@c bool@true
+LABEL end
+'''
+        self.assert_same(source, '1\n2\n', opcodes.GT_JUMPIF, 56)
+
+    def test_compare_jump_undefined_label(self):
+        source = PROLOGUE + '''
+WRITE string@before
+LT GF@c GF@a GF@b
+JUMPIFEQ nowhere GF@c bool@true
+WRITE string@after
+'''
+        self.assert_same(source, '1\n2\n', opcodes.LT_JUMPIF, 52)
+
+    # DEFVAR directly followed by MOVE to the same variable
+
+    def test_defvar_move_in_function(self):
+        source = PROLOGUE + '''
+CALL twice
+CALL twice
+WRITE GF@a
+BREAK
+EXIT int@0
+LABEL twice
+CREATEFRAME
+DEFVAR TF@x
+MOVE TF@x GF@a
+PUSHFRAME
+ADD GF@a LF@x LF@x
+POPFRAME
+RETURN
+'''
+        self.assert_same(source, '3\n0\n', opcodes.DEFVAR_MOVE, 0)
+
+    def test_defvar_move_before_call_break(self):
+        source = '''.IPPcode23
+DEFVAR GF@a
+MOVE GF@a int@1
+CALL f
+EXIT int@0
+LABEL f
+BREAK
+RETURN
+'''
+        self.assert_same(source, '', opcodes.DEFVAR_MOVE, 0)
+        for engine in ('loop', 'block'):
+            for level in (0, 1, 2):
+                with self.subTest(engine=engine, level=level):
+                    stdout = support.run(source, '', level, engine)[0]
+                    self.assertTrue(stdout.endswith('Call stack:\n[3]\n'))
+
+    def test_defvar_move_undefined_variable(self):
+        source = PROLOGUE + '''
+WRITE string@before
+DEFVAR GF@x
+MOVE GF@x GF@missing
+'''
+        self.assert_same(source, '1\n2\n', opcodes.DEFVAR_MOVE, 54)
+
+    def test_defvar_move_missing_value(self):
+        source = PROLOGUE + '''
+WRITE string@before
+DEFVAR GF@x
+MOVE GF@x GF@u
+'''
+        self.assert_same(source, '1\n2\n', opcodes.DEFVAR_MOVE, 56)
+
+    def test_defvar_move_redefinition(self):
+        source = PROLOGUE + '''
+LABEL loop
+DEFVAR GF@x
+MOVE GF@x GF@a
+WRITE GF@x
+JUMP loop
+'''
+        self.assert_same(source, '1\n2\n', opcodes.DEFVAR_MOVE, 52)
+
+    def test_defvar_move_missing_frame(self):
+        source = PROLOGUE + '''
+WRITE string@before
+DEFVAR TF@x
+MOVE TF@x GF@a
+'''
+        self.assert_same(source, '1\n2\n', opcodes.DEFVAR_MOVE, 55)
+
+    # PUSHS directly followed by POPS
+
+    def test_pushs_pops(self):
+        source = PROLOGUE + '''
+PUSHS GF@b
+PUSHS GF@a
+POPS GF@c
+POPS GF@a
+WRITE GF@a
+WRITE GF@c
+BREAK
+'''
+        self.assert_same(source, '1\n2\n', opcodes.PUSHS_POPS, 0)
+
+    def test_pushs_pops_undefined_variable(self):
+        source = PROLOGUE + '''
+WRITE string@before
+PUSHS GF@a
+POPS GF@missing
+'''
+        self.assert_same(source, '1\n2\n', opcodes.PUSHS_POPS, 54)
+
+    def test_pushs_pops_missing_value(self):
+        source = PROLOGUE + '''
+WRITE string@before
+PUSHS GF@u
+POPS GF@c
+'''
+        self.assert_same(source, '1\n2\n', opcodes.PUSHS_POPS, 56)
+
+    def test_pushs_pops_full_stack(self):
+        source = PROLOGUE + '''
+PUSHS int@1
+PUSHS GF@a
+POPS GF@c
+WRITE GF@c
+'''
+        self.assert_same(source, '1\n2\n', opcodes.PUSHS_POPS, 60, max_data_depth=1)
+
+    # ADD/SUB of variable and int constant
+
+    def test_add_sub_counter(self):
+        source = PROLOGUE + '''
+ADD GF@a GF@a int@1
+ADD GF@b int@10 GF@b
+SUB GF@c GF@a int@3
+WRITE GF@a
+WRITE GF@b
+WRITE GF@c
+BREAK
+'''
+        self.assert_same(source, '1\n2\n', opcodes.ADD_INT, 0)
+
+    def test_add_sub_undefined_variable(self):
+        source = PROLOGUE + '''
+WRITE string@before
+SUB GF@a GF@missing int@1
+'''
+        self.assert_same(source, '1\n2\n', opcodes.SUB_INT, 54)
+
+    def test_add_sub_type_mismatch(self):
+        source = PROLOGUE + '''
+WRITE string@before
+ADD GF@a GF@s int@1
+'''
+        self.assert_same(source, '1\n2\n', opcodes.ADD_INT, 53)
+
+    def test_add_sub_missing_value(self):
+        source = PROLOGUE + '''
+WRITE string@before
+ADD GF@a int@1 GF@u
+'''
+        self.assert_same(source, '1\n2\n', opcodes.ADD_INT, 56)
+
+if __name__ == '__main__':
+    unittest.main()
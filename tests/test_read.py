@@ -0,0 +1,66 @@
+## @file test_read.py
+# @brief Values read by READ from input providers
+# @author Marián Tarageľ
+
+import os
+import tempfile
+import unittest
+import support
+import api
+from input_provider import FileInput
+
+# Every line is read with type of its READ and printed with its type
+PROGRAM = '''.IPPcode23
+DEFVAR GF@v
+DEFVAR GF@t
+READ GF@v bool
+TYPE GF@t GF@v
+WRITE GF@t
+WRITE GF@v
+WRITE string@\\032
+READ GF@v string
+TYPE GF@t GF@v
+WRITE GF@t
+WRITE GF@v
+WRITE string@\\032
+READ GF@v int
+TYPE GF@t GF@v
+WRITE GF@t
+WRITE string@\\032
+READ GF@v bool
+TYPE GF@t GF@v
+WRITE GF@t
+'''
+
+class ReadTest(unittest.TestCase):
+
+    # Empty line is false as bool, empty string as string and nil as int,
+    # after the last line READ gives nil
+    def test_empty_lines(self):
+        expected = ('boolfalse string nil nil', '', 0)
+        self.assertEqual(support.run(PROGRAM, '\n\n\n'), expected)
+        self.assertEqual(support.run(PROGRAM, '\r\n\r\n\r\n'), expected)
+
+    def test_empty_lines_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'input')
+            with open(path, 'wb') as file:
+                file.write(b'\n\n\n')
+            result = api.Interpreter(None, 0, 'loop', 'ippcode').run(
+                PROGRAM.encode('utf-8'), FileInput(path))
+        self.assertEqual((result.stdout, result.exit_code), ('boolfalse string nil nil', 0))
+
+    def test_values(self):
+        self.assertEqual(support.run(PROGRAM, 'TRUE\n a b \n 42\nyes\n'),
+                         ('booltrue stringa b int bool', '', 0))
+
+    # Empty bool literal is still an error of XML structure
+    def test_empty_bool_literal(self):
+        source = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                  b'<program language="IPPcode23">\n'
+                  b'<instruction order="1" opcode="WRITE"><arg1 type="bool"></arg1></instruction>\n'
+                  b'</program>\n')
+        self.assertEqual(api.Interpreter().run(source).exit_code, 32)
+
+if __name__ == '__main__':
+    unittest.main()
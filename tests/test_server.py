@@ -0,0 +1,85 @@
+## @file test_server.py
+# @brief Requests of clients checked by interpret server
+# @author Marián Tarageľ
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import support
+import protocol
+
+SERVER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'interpret', 'server.py')
+
+SOURCE = b'''.IPPcode23
+WRITE string@hello
+'''
+
+class ServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'server.sock')
+        cls.server = subprocess.Popen([sys.executable, SERVER, '--socket', cls.path,
+                                       '--workers', '1'])
+        while not os.path.exists(cls.path):
+            time.sleep(0.01)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait()
+        cls.directory.cleanup()
+
+    # Stdout, stderr and exit code of request, source is sent after it
+    # only when the request is valid, bad ones are answered before it
+    def request(self, args: dict, source: bytes = None) -> tuple:
+        stdout = b''
+        stderr = b''
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.path)
+            protocol.send_json(connection, protocol.REQUEST, {'args': args})
+            if source != None:
+                protocol.send(connection, protocol.SOURCE, source)
+            while True:
+                kind, payload = protocol.receive(connection)
+                match kind:
+                    case protocol.STDOUT:
+                        stdout += payload
+                    case protocol.STDERR:
+                        stderr += payload
+                    case protocol.READ:
+                        protocol.send(connection, protocol.INPUT)
+                    case protocol.EXIT:
+                        return stdout, stderr, json.loads(payload)['exit_code']
+
+    def test_valid_request(self):
+        result = self.request({'source_format': 'ippcode', 'max_instructions': 10,
+                               'time_limit': 1, 'no_cache': True}, SOURCE)
+        self.assertEqual(result, (b'hello', b'', 0))
+
+    # Bad requests are answered with Error.ARGS without running program
+    def test_bad_requests(self):
+        bad = {'unknown argument': {'max_instruction': 10},
+               'help': {'help': True},
+               'wrong type': {'max_instructions': '10'},
+               'bool for int': {'max_depth': True},
+               'null default': {'source': None},
+               'choice': {'engine': 'fast'},
+               'combination': {'checkpoint_every': 5},
+               'input dir': {'input_dir': '/tmp'}}
+        for name, args in bad.items():
+            with self.subTest(name):
+                stdout, stderr, exit_code = self.request(dict(args, source_format='ippcode',
+                                                              no_cache=True))
+                self.assertEqual((stdout, exit_code), (b'', 10))
+                self.assertTrue(stderr.startswith(b'Error: '))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+## @file test_stack.py
+# @brief Stack extension instructions at every level and with every engine
+# @author Marián Tarageľ
+
+import unittest
+import support
+
+# Every stack instruction with result depending on input n from 0 to 4
+PROGRAM = '''.IPPcode23
+DEFVAR GF@n
+DEFVAR GF@r
+READ GF@n int
+PUSHS GF@n
+PUSHS int@3
+ADDS
+PUSHS int@2
+MULS
+PUSHS int@4
+SUBS
+PUSHS int@3
+IDIVS
+POPS GF@r
+WRITE GF@r
+PUSHS GF@n
+PUSHS int@4
+LTS
+PUSHS GF@n
+PUSHS int@1
+GTS
+ANDS
+PUSHS GF@n
+PUSHS int@0
+EQS
+ORS
+NOTS
+POPS GF@r
+WRITE GF@r
+PUSHS int@1
+PUSHS int@2
+CLEARS
+PUSHS int@97
+PUSHS GF@n
+ADDS
+INT2CHARS
+POPS GF@r
+WRITE GF@r
+PUSHS string@hello
+PUSHS GF@n
+STRI2INTS
+POPS GF@r
+WRITE GF@r
+PUSHS GF@n
+PUSHS int@2
+JUMPIFNEQS other
+WRITE string@two
+LABEL other
+PUSHS nil@nil
+PUSHS GF@n
+JUMPIFEQS end
+WRITE string@end
+LABEL end
+'''
+
+OUTPUTS = {'0': '0falsea104end', '1': '1trueb101end', '2': '2falsec108twoend',
+           '3': '2falsed108end', '4': '3truee111end'}
+
+# Programs failing in stack instructions, output written before the
+# error has to be the same too
+ERRORS = {
+    'adds underflow': (56, 'PUSHS int@1\nADDS\n'),
+    'nots empty': (56, 'NOTS\n'),
+    'clears': (56, 'PUSHS int@1\nCLEARS\nPOPS GF@a\n'),
+    'jumpifneqs underflow': (56, 'PUSHS int@1\nJUMPIFNEQS end\nLABEL end\n'),
+    'subs types': (53, 'PUSHS int@1\nPUSHS string@x\nSUBS\n'),
+    'lts nil': (53, 'PUSHS nil@nil\nPUSHS int@1\nLTS\n'),
+    'gts types': (53, 'PUSHS int@1\nPUSHS bool@true\nGTS\n'),
+    'ors types': (53, 'PUSHS bool@true\nPUSHS int@1\nORS\n'),
+    'nots types': (53, 'PUSHS int@1\nNOTS\n'),
+    'int2chars types': (53, 'PUSHS string@a\nINT2CHARS\n'),
+    'stri2ints types': (53, 'PUSHS int@0\nPUSHS int@0\nSTRI2INTS\n'),
+    'jumpifneqs types': (53, 'PUSHS int@1\nPUSHS string@1\nJUMPIFNEQS end\nLABEL end\n'),
+    'idivs zero': (57, 'PUSHS int@1\nPUSHS int@0\nIDIVS\n'),
+    'int2chars negative': (58, 'PUSHS int@-1\nINT2CHARS\n'),
+    'int2chars overflow': (58, 'PUSHS int@99999999999999999999\nINT2CHARS\n'),
+    'stri2ints index': (58, 'PUSHS string@abc\nPUSHS int@3\nSTRI2INTS\n'),
+}
+
+class StackTest(unittest.TestCase):
+
+    # Loop and block engine at every level give the same stdout, stderr
+    # and exit code as loop engine without optimizations
+    def assert_same(self, source: str, input: str, exit_code: int):
+        expected = support.run(source, input, 0, 'loop')
+        self.assertEqual(expected[2], exit_code)
+        for engine in ('loop', 'block'):
+            for level in (0, 1, 2):
+                with self.subTest(engine=engine, level=level):
+                    self.assertEqual(support.run(source, input, level, engine), expected)
+        return expected
+
+    def test_instructions(self):
+        for input, output in OUTPUTS.items():
+            with self.subTest(input=input):
+                self.assertEqual(self.assert_same(PROGRAM, input, 0)[0], output)
+
+    def test_errors(self):
+        for name, (exit_code, code) in ERRORS.items():
+            with self.subTest(name):
+                source = '.IPPcode23\nDEFVAR GF@a\nWRITE string@before\n' + code
+                stdout = self.assert_same(source, '', exit_code)[0]
+                self.assertEqual(stdout, 'before')
+
+    # Lanes of vector engine take different branches of JUMPIFNEQS
+    @unittest.skipUnless(support.vector.is_available(), "NumPy is not installed")
+    def test_vector_lanes(self):
+        inputs = list(OUTPUTS) + ['2', '2']
+        for level in (0, 1, 2):
+            with self.subTest(level=level):
+                expected = support.run_inputs(PROGRAM, inputs, level)
+                self.assertEqual([result[0] for result in expected],
+                                 [OUTPUTS[input] for input in inputs])
+                self.assertEqual(support.run_inputs(PROGRAM, inputs, level, 'vector'), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+## @file test_vector.py
+# @brief Lockstep runs of vector engine against separate scalar runs
+# @author Marián Tarageľ
+
+import time
+import unittest
+import support
+import vector
+
+# Lanes count to their input and take different branches of JUMPIFEQ,
+# the lane reading nil leaves lockstep and never ends its loop
+COUNT = '''.IPPcode23
+DEFVAR GF@n
+DEFVAR GF@i
+READ GF@n int
+MOVE GF@i int@0
+LABEL loop
+JUMPIFEQ end GF@i GF@n
+WRITE GF@i
+ADD GF@i GF@i int@1
+JUMP loop
+LABEL end
+WRITE string@done
+'''
+
+# Loop which ends only for positive input
+SPIN = '''.IPPcode23
+DEFVAR GF@n
+READ GF@n int
+LABEL loop
+JUMPIFEQ end GF@n int@0
+SUB GF@n GF@n int@1
+JUMP loop
+LABEL end
+'''
+
+@unittest.skipUnless(vector.is_available(), "NumPy is not installed")
+class VectorTest(unittest.TestCase):
+
+    def test_divergent_branches(self):
+        inputs = ['3', '5', '0', '3', '7', '2', 'x']
+        for level in (0, 1, 2):
+            with self.subTest(level=level):
+                expected = support.run_inputs(COUNT, inputs, level, max_instructions=200)
+                self.assertEqual([result[2] for result in expected], [0] * 6 + [60])
+                self.assertEqual(support.run_inputs(COUNT, inputs, level, 'vector',
+                                                    max_instructions=200), expected)
+
+    # Every lane has the time limit of scalar run, lanes ejected after it
+    # passed in lockstep end at once, not each after another full limit
+    def test_time_limit(self):
+        inputs = ['-1'] * 6 + ['2']
+        expected = support.run_inputs(SPIN, inputs, time_limit=0.2)
+        self.assertEqual([result[2] for result in expected], [60] * 6 + [0])
+        start = time.monotonic()
+        results = support.run_inputs(SPIN, inputs, engine='vector', time_limit=0.2)
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(results, expected)
+
+if __name__ == '__main__':
+    unittest.main()